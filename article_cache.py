@@ -0,0 +1,226 @@
+"""
+Cache of extracted article text keyed by canonicalized URL.
+
+Fresh entries (younger than the TTL) are served without touching the
+network. Stale entries are revalidated with a conditional GET using the
+stored ETag / Last-Modified validators, so an unchanged article costs a
+304 response instead of a full download and HTML parse. Entries live in an
+in-memory LRU tier and, optionally, in a size-bounded SQLite database.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from telemetry import span
+
+# Query parameters that only track the visitor and never change the article
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "yclid",
+    "ref", "ref_src", "cmpid", "_ga", "_hsenc", "_hsmi", "spm",
+})
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonicalize a URL so that equivalent links share a cache entry.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters (utm_* and common click ids), and sorts the query.
+
+    Args:
+        url: The URL to canonicalize
+
+    Returns:
+        The canonical form of the URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == "http" and parts.port == 80) and not (scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class ArticleCache:
+    """A TTL cache of extracted article text with HTTP revalidation."""
+
+    DEFAULT_TTL = 60 * 60
+    DEFAULT_MAX_ENTRIES = 256
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        db_path: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry is served without revalidation
+            max_entries: Maximum number of entries kept in memory before LRU eviction
+            db_path: Path to a SQLite database for the on-disk tier. If None, memory only.
+            max_bytes: Maximum total size of the text stored on disk
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "url TEXT PRIMARY KEY, text TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                "fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._db.commit()
+
+    def fetch(
+        self,
+        url: str,
+        extract: Callable[[str, str], str],
+        session: Optional[requests.Session] = None,
+        timeout: float = 15,
+    ) -> str:
+        """
+        Get the article text for a URL, downloading and extracting it only when needed.
+
+        Args:
+            url: The article URL
+            extract: Function turning (url, html) into article text
+            session: Requests session used for downloads. If None, uses requests directly.
+            timeout: Seconds to wait for the download
+
+        Returns:
+            The extracted article text (may be empty)
+
+        Raises:
+            requests.exceptions.RequestException: If the download fails
+        """
+        key = canonicalize_url(url)
+        entry = self._get(key)
+        if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+            with self._lock:
+                self.hits += 1
+            return entry["text"]
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        with span("fetch"):
+            response = (session or requests).get(url, headers=headers, timeout=timeout)
+        if entry is not None and response.status_code == 304:
+            with self._lock:
+                self.revalidations += 1
+            entry["fetched_at"] = time.time()
+            self._put(key, entry)
+            return entry["text"]
+        response.raise_for_status()
+
+        with self._lock:
+            self.misses += 1
+        with span("extract"):
+            text = extract(url, response.text)
+        if text:
+            self._put(key, {
+                "text": text,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+            })
+        return text
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look an entry up in memory, then on disk."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return dict(entry)
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT text, etag, last_modified, fetched_at FROM articles WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE articles SET accessed_at = ? WHERE url = ?", (time.time(), key))
+            self._db.commit()
+            entry = {"text": row[0], "etag": row[1], "last_modified": row[2], "fetched_at": row[3]}
+            self._store_in_memory(key, entry)
+            return dict(entry)
+
+    def _put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an entry in both tiers, enforcing the on-disk size bound."""
+        with self._lock:
+            self._store_in_memory(key, entry)
+            if self._db is None:
+                return
+            size = len(entry["text"].encode("utf-8"))
+            self._db.execute(
+                "INSERT OR REPLACE INTO articles "
+                "(url, text, etag, last_modified, fetched_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, entry["text"], entry.get("etag"), entry.get("last_modified"),
+                 entry["fetched_at"], time.time(), size),
+            )
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+            if total > self.max_bytes:
+                for url, row_size in self._db.execute(
+                    "SELECT url, size FROM articles ORDER BY accessed_at"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._db.execute("DELETE FROM articles WHERE url = ?", (url,))
+                    total -= row_size
+            self._db.commit()
+
+    def _store_in_memory(self, key: str, entry: Dict[str, Any]) -> None:
+        """Insert an entry into the memory tier, evicting the least recently used ones."""
+        self._memory[key] = dict(entry)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/revalidation/miss counters for monitoring.
+
+        Returns:
+            A dictionary of counters
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "revalidations": self.revalidations,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+            }
+
+    def close(self) -> None:
+        """Close the on-disk tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
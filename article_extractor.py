@@ -0,0 +1,148 @@
+"""
+Article text extraction from downloaded HTML.
+
+The HTML stack is imported lazily, on the first URL that is extracted, so
+plain text checks never pay for it at startup. The default "fast" extractor
+is a readability-style scorer over lxml: paragraphs are scored by length and
+comma count, the scores are credited to their parent and grandparent
+elements, and the best scoring container (plus similarly scored siblings)
+is taken as the article body. newspaper3k is an optional fallback for pages
+where the fast extractor finds little text, and can be selected explicitly.
+"""
+
+import re
+from typing import Dict, List
+
+EXTRACTORS = ("fast", "newspaper")
+DEFAULT_EXTRACTOR = "fast"
+
+# Below this many characters the fast result is compared with newspaper's
+MIN_TEXT_LENGTH = 250
+
+_NOISE_TAGS = (
+    "script", "style", "noscript", "nav", "header", "footer", "aside",
+    "form", "iframe", "svg", "button", "figure",
+)
+_NOISE_ATTR_RE = re.compile(
+    r"comment|sidebar|footer|masthead|promo|related|share|social|advert|\bads?\b|"
+    r"cookie|newsletter|subscribe|popup|modal|breadcrumb|\bmenu\b|\bnav\b",
+    re.IGNORECASE,
+)
+_KEEP_TAGS = frozenset({"html", "body", "article", "main"})
+_TEXT_TAGS = ("p", "pre", "h2", "h3", "h4")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class ExtractionError(Exception):
+    """Raised when an extractor cannot process a page."""
+
+
+def extract_article_text(url: str, html: str, extractor: str = DEFAULT_EXTRACTOR) -> str:
+    """
+    Extract the main text of a downloaded article.
+
+    Args:
+        url: URL of the article
+        html: The downloaded HTML
+        extractor: "fast" for the lxml scorer (falling back to newspaper3k, if
+            installed, when it finds little text) or "newspaper" for newspaper3k only
+
+    Returns:
+        The extracted article text (may be empty)
+
+    Raises:
+        ExtractionError: If the extractor is unknown or cannot process the page
+    """
+    if extractor == "newspaper":
+        return _newspaper_extract(url, html)
+    if extractor != "fast":
+        raise ExtractionError(f"Unknown extractor {extractor!r}; expected one of {', '.join(EXTRACTORS)}")
+
+    text = _fast_extract(html)
+    if len(text) < MIN_TEXT_LENGTH:
+        try:
+            fallback = _newspaper_extract(url, html)
+        except ExtractionError:
+            return text
+        if len(fallback) > len(text):
+            return fallback
+    return text
+
+
+def _clean(text: str) -> str:
+    """Collapse runs of whitespace."""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def _fast_extract(html: str) -> str:
+    """Extract the article body with the readability-style lxml scorer."""
+    from lxml import etree
+    from lxml import html as lxml_html
+
+    if not html or not html.strip():
+        return ""
+    try:
+        doc = lxml_html.document_fromstring(html)
+    except ValueError:
+        # lxml rejects str input that carries an XML encoding declaration
+        doc = lxml_html.document_fromstring(html.encode("utf-8"))
+    except etree.ParserError:
+        return ""
+
+    for element in doc.xpath("|".join(f"//{tag}" for tag in _NOISE_TAGS)):
+        element.drop_tree()
+    for element in doc.xpath("//*[@class or @id]"):
+        if element.tag in _KEEP_TAGS:
+            continue
+        if _NOISE_ATTR_RE.search(f"{element.get('class', '')} {element.get('id', '')}"):
+            element.drop_tree()
+
+    scores: Dict[etree._Element, float] = {}
+    for paragraph in doc.iter("p", "pre"):
+        text = _clean(paragraph.text_content())
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(",") + min(len(text) / 100, 3)
+        parent = paragraph.getparent()
+        if parent is None:
+            continue
+        scores[parent] = scores.get(parent, 0) + score
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0) + score / 2
+    if not scores:
+        return ""
+
+    best = max(scores, key=scores.get)
+    containers = [best]
+    parent = best.getparent()
+    if parent is not None:
+        threshold = max(10, scores[best] * 0.2)
+        containers = [
+            sibling for sibling in parent
+            if sibling is best or scores.get(sibling, 0) >= threshold
+        ]
+
+    paragraphs: List[str] = []
+    for container in containers:
+        for element in container.iter(*_TEXT_TAGS):
+            text = _clean(element.text_content())
+            if text:
+                paragraphs.append(text)
+    return "\n\n".join(paragraphs)
+
+
+def _newspaper_extract(url: str, html: str) -> str:
+    """Extract the article body with newspaper3k."""
+    try:
+        from newspaper import Article, ArticleException
+    except ImportError as e:
+        raise ExtractionError("newspaper3k is not installed") from e
+
+    try:
+        article = Article(url=url)
+        article.download(input_html=html)
+        article.parse()
+    except ArticleException as e:
+        raise ExtractionError(str(e)) from e
+    return article.text
@@ -0,0 +1,474 @@
+"""
+Asyncio-native fact checking on top of an existing FactChecker.
+
+AsyncFactChecker reuses the wrapped checker's system prompt, request
+building, response parsing, citation resolution, result cache and
+near-duplicate index, and only replaces the transport: requests go through
+a shared aiohttp connection pool and a semaphore bounds how many are in
+flight at once. Rate limiting, retries and the per-request deadline come from
+the wrapped checker's RequestScheduler, so both transports share one token
+bucket. Result cache, verdict store and near-duplicate index lookups and
+updates, as well as request building (language detection and trimming of
+long texts), run in worker threads, so their disk and CPU work does not
+hold up other requests on the event loop. When the checker has a
+ModelRouter with a hedge model, an "auto"-routed call that has not answered
+within the primary model's tail latency is hedged with a second call to the
+cheaper model, and whichever succeeds first is used.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from model_router import AUTO_MODEL
+from request_scheduler import RETRY_STATUSES, DeadlineExceeded, RetryableError, parse_retry_after
+from result_validation import normalize_overall_rating, validate_claim
+from stream_parser import ClaimStreamParser, Event
+from telemetry import span
+
+
+class AsyncFactChecker:
+    """Concurrent fact checking with aiohttp, mirroring FactChecker.check_claim."""
+
+    DEFAULT_MAX_CONCURRENCY = 64
+
+    def __init__(self, checker: Any, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        Initialize the async checker.
+
+        Args:
+            checker: A FactChecker providing the prompt, parsing, cache and API settings
+            max_concurrency: Maximum number of API requests in flight at once
+        """
+        self.checker = checker
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the pooled aiohttp session, creating it on first use in the running loop.
+
+        Returns:
+            The shared client session
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connect_timeout, read_timeout = self.checker.timeout
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+                headers=self.checker._get_headers(),
+                json_serialize=json.dumps,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session
+
+    async def check_claim(
+        self,
+        text: str,
+        model: Optional[str] = None,
+        use_structured_output: bool = False,
+        cache_only: bool = False,
+        latency_budget: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Check the factual accuracy of a claim or article.
+
+        Args:
+            text: The claim or article text to fact check
+            model: The Perplexity model to use. If None or "auto", the checker's router picks one.
+            use_structured_output: Whether to use structured output API (if model supports it)
+            cache_only: Only look the text up in the result cache, never call the API
+            latency_budget: Seconds the caller is willing to wait, used for routing and hedging
+
+        Returns:
+            The parsed response containing fact check results.
+        """
+        checker = self.checker
+        # Only routed requests are hedged; an explicitly requested model is always used
+        routed = not model or model == AUTO_MODEL
+
+        # The cache, verdict store and near-duplicate index do SQLite and CPU work
+        # that would otherwise stall every other request on the event loop
+        with span("cache_lookup"):
+            early, model, cache_key, namespace, known = await asyncio.to_thread(
+                checker._begin_check, text, model, use_structured_output, cache_only, latency_budget
+            )
+        if early is not None:
+            return early
+
+        async def fetch() -> Dict[str, Any]:
+            cached = await asyncio.to_thread(checker._flight_cached, cache_key)
+            if cached is not None:
+                return cached
+            results = await self._hedged_fact_check(
+                text, model, use_structured_output, latency_budget, routed, known
+            )
+            await asyncio.to_thread(checker._store_result, text, results, cache_key, namespace)
+            return results
+
+        if checker.single_flight is None:
+            return await fetch()
+        key = checker.flight_key(text, model, use_structured_output, cache_key)
+        return await checker.single_flight.do_async(key, fetch)
+
+    async def check_claims(
+        self,
+        texts: Iterable[str],
+        model: Optional[str] = None,
+        use_structured_output: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Check several texts concurrently.
+
+        Args:
+            texts: The claims or articles to fact check
+            model: The Perplexity model to use. If None or "auto", the checker's router picks one.
+            use_structured_output: Whether to use structured output API (if model supports it)
+
+        Returns:
+            The results, in the same order as the input texts.
+        """
+        return await asyncio.gather(
+            *(self.check_claim(text, model, use_structured_output) for text in texts)
+        )
+
+    async def _hedged_fact_check(
+        self,
+        text: str,
+        model: str,
+        use_structured_output: bool,
+        latency_budget: Optional[float] = None,
+        allow_hedge: bool = True,
+        known_claims: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Fact check with the primary model, hedging with the router's cheaper model when it is slow.
+
+        Args:
+            text: The claim or article text to fact check
+            model: The primary Perplexity model
+            use_structured_output: Whether to use structured output API (if model supports it)
+            latency_budget: Seconds the caller is willing to wait, shortening the hedge delay
+            allow_hedge: Whether the call may be hedged (only when the router chose the model)
+            known_claims: Known claims returned by _lookup_cached, or None to look them up
+
+        Returns:
+            The first successful result (marked with "hedged_model" if the hedge
+            answered), or the primary model's error if both calls fail
+        """
+        router = self.checker.router
+        delay = router.hedge_delay(model, latency_budget) if router is not None and allow_hedge else None
+        if delay is None:
+            return await self._fact_check(text, model, use_structured_output, known_claims)
+
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self._fact_check(text, model, use_structured_output, known_claims))
+        pending = {primary}
+        try:
+            await asyncio.wait(pending, timeout=delay)
+            if primary.done():
+                return primary.result()
+
+            hedge = asyncio.ensure_future(
+                self._fact_check(text, router.hedge_model, use_structured_output, known_claims)
+            )
+            pending = {primary, hedge}
+            finished: Dict[asyncio.Future, Dict[str, Any]] = {}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    finished[task] = task.result()
+                for task in (primary, hedge):
+                    if task in finished and "error" not in finished[task]:
+                        won = task is hedge
+                        router.record_hedge(won)
+                        if won and not primary.done():
+                            # Keep the primary's tail in the latency window even though it is cancelled
+                            router.record(model, time.monotonic() - start)
+                        results = finished[task]
+                        if won:
+                            results["hedged_model"] = router.hedge_model
+                        return results
+            router.record_hedge(False)
+            return finished[primary]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _fact_check(
+        self,
+        text: str,
+        model: str,
+        use_structured_output: bool,
+        known_claims: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send the text to the Perplexity API and parse the fact check results.
+
+        Args:
+            text: The claim or article text to fact check
+            model: The Perplexity model to use
+            use_structured_output: Whether to use structured output API (if model supports it)
+            known_claims: Known claims returned by _lookup_cached, or None to look them up
+
+        Returns:
+            The parsed response containing fact check results.
+        """
+        checker = self.checker
+        with span("prompt_build"):
+            data, can_use_structured_output, context = await asyncio.to_thread(
+                checker._build_request, text, model, use_structured_output, known_claims
+            )
+
+        try:
+            start = time.monotonic()
+            with span("api"):
+                result = await self.post_completion(data)
+            if checker.router is not None:
+                checker.router.record(model, time.monotonic() - start)
+            return checker._handle_api_result(result, can_use_structured_output, context)
+        except (RetryableError, DeadlineExceeded) as e:
+            return {"error": f"API request failed: {str(e)}"}
+        except asyncio.TimeoutError:
+            return {"error": "API request failed: request timed out"}
+        except aiohttp.ClientError as e:
+            return {"error": f"API request failed: {str(e)}"}
+        except json.JSONDecodeError:
+            return {"error": "Failed to parse API response as JSON"}
+        except Exception as e:
+            return {"error": f"Unexpected error: {str(e)}"}
+
+    async def stream_claim(
+        self,
+        text: str,
+        model: Optional[str] = None,
+        use_structured_output: bool = False,
+        latency_budget: Optional[float] = None,
+    ) -> AsyncIterator[Event]:
+        """
+        Fact check a text, yielding parts of the result as soon as they are available.
+
+        The upstream completion is requested with ``stream: true`` and parsed
+        incrementally, so each claim is reported the moment its JSON object is
+        complete.
+
+        Args:
+            text: The claim or article text to fact check
+            model: The Perplexity model to use. If None or "auto", the checker's router picks one.
+            use_structured_output: Whether to use structured output API (if model supports it)
+            latency_budget: Seconds the caller is willing to wait, used when routing "auto"
+
+        Yields:
+            (event name, payload) tuples: "overall_rating", "summary", "claim"
+            (with resolved sources), "citations", then "result" with the full
+            parsed result, or a single "error" event
+        """
+        checker = self.checker
+        with span("cache_lookup"):
+            early, model, cache_key, namespace, known = await asyncio.to_thread(
+                checker._begin_check, text, model, use_structured_output, False, latency_budget
+            )
+        if early is not None:
+            for event in result_events(early):
+                yield event
+            return
+
+        with span("prompt_build"):
+            data, can_use_structured_output, context = await asyncio.to_thread(
+                checker._build_request, text, model, use_structured_output, known
+            )
+        data["stream"] = True
+        # Claims known from the verdict store are left out of the prompt, so report them first
+        for claim in context["known_claims"]:
+            yield "claim", claim
+        parser = ClaimStreamParser()
+        citations: List[str] = []
+        usage = None
+
+        try:
+            async for chunk in self.stream_completion(data):
+                citations = chunk.get("citations") or citations
+                usage = chunk.get("usage") or usage
+                choices = chunk.get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if not delta:
+                    continue
+                for name, payload in parser.feed(delta):
+                    if name == "claim":
+                        payload = validate_claim(payload)
+                        if payload is None:
+                            continue
+                        checker._resolve_citations_in_claims([payload], citations)
+                    elif name == "overall_rating":
+                        try:
+                            payload = normalize_overall_rating(payload)
+                        except ValueError:
+                            # Derived from the claims in the final result
+                            continue
+                    yield name, payload
+        except (RetryableError, DeadlineExceeded) as e:
+            yield "error", {"error": f"API request failed: {str(e)}"}
+            return
+        except asyncio.TimeoutError:
+            yield "error", {"error": "API request failed: request timed out"}
+            return
+        except aiohttp.ClientError as e:
+            yield "error", {"error": f"API request failed: {str(e)}"}
+            return
+        except json.JSONDecodeError:
+            yield "error", {"error": "Failed to parse API response as JSON"}
+            return
+
+        results = checker._handle_api_result(
+            {
+                "model": model,
+                "choices": [{"message": {"content": parser.content}}],
+                "citations": citations,
+                "usage": usage,
+            },
+            can_use_structured_output,
+            context,
+        )
+        await asyncio.to_thread(checker._store_result, text, results, cache_key, namespace)
+        if citations:
+            yield "citations", citations
+        yield "result", results
+
+    async def stream_completion(self, data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send a streaming chat completion request and yield its chunks.
+
+        Opening the stream is retried like any other request; once chunks have
+        been yielded a failure is final.
+
+        Args:
+            data: The request body, with "stream" set to true
+
+        Yields:
+            Each decoded server-sent event payload
+
+        Raises:
+            RetryableError: If the request still fails after all retries
+            DeadlineExceeded: If the request deadline passes
+            aiohttp.ClientError: If the request returns a non-retryable error status
+            asyncio.TimeoutError: If the stream stalls
+        """
+        await self._get_session()
+        async with self._semaphore:
+            response = await self.checker.scheduler.run_async(
+                lambda remaining: self._send(data, remaining, {"accept": "text/event-stream"})
+            )
+            async with response:
+                async for raw_line in response.content:
+                    line = raw_line.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    yield json.loads(payload)
+
+    async def post_completion(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a chat completion request through the pooled session.
+
+        Args:
+            data: The request body
+
+        Returns:
+            The decoded JSON response
+
+        Raises:
+            RetryableError: If the request still fails after all retries
+            DeadlineExceeded: If the request deadline passes
+            aiohttp.ClientError: If the request returns a non-retryable error status
+        """
+        async def attempt(remaining: float) -> Dict[str, Any]:
+            async with self._semaphore:
+                async with await self._send(data, remaining) as response:
+                    return await response.json(content_type=None)
+
+        await self._get_session()
+        return await self.checker.scheduler.run_async(attempt)
+
+    async def _send(
+        self, data: Dict[str, Any], remaining: float, headers: Optional[Dict[str, str]] = None
+    ) -> aiohttp.ClientResponse:
+        """
+        Send one chat completion attempt and return the unread response.
+
+        The caller holds the concurrency semaphore.
+
+        Args:
+            data: The request body
+            remaining: Seconds left before the request deadline
+            headers: Extra request headers
+
+        Returns:
+            The response, with a successful status; the caller must release it
+
+        Raises:
+            RetryableError: On connection failures, timeouts, 429 and 5xx responses
+            aiohttp.ClientError: On other error responses
+        """
+        session = await self._get_session()
+        connect_timeout, read_timeout = self.checker.timeout
+        timeout = aiohttp.ClientTimeout(
+            total=remaining, sock_connect=min(connect_timeout, remaining), sock_read=read_timeout
+        )
+        try:
+            response = await session.post(self.checker.API_URL, json=data, headers=headers, timeout=timeout)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            raise RetryableError(str(e) or "request timed out") from e
+        if response.status in RETRY_STATUSES:
+            response.release()
+            raise RetryableError(
+                f"{response.status} {response.reason} for url: {response.url}",
+                status=response.status,
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+        if response.status >= 400:
+            response.release()
+            response.raise_for_status()
+        return response
+
+    async def close(self) -> None:
+        """Close the pooled aiohttp session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "AsyncFactChecker":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+def result_events(results: Dict[str, Any]) -> List[Event]:
+    """
+    Express a complete fact check result as the events stream_claim would yield.
+
+    Args:
+        results: A parsed fact check result
+
+    Returns:
+        The list of (event name, payload) tuples, ending with "result"
+    """
+    if "error" in results:
+        return [("error", results)]
+    events: List[Event] = []
+    for field in ("overall_rating", "summary"):
+        if field in results:
+            events.append((field, results[field]))
+    for claim in results.get("claims") or []:
+        events.append(("claim", claim))
+    events.append(("result", results))
+    return events
@@ -0,0 +1,231 @@
+"""
+Batch fact checking over JSON lines files.
+
+Each input line is a JSON object carrying the text to check in a ``text``
+field (``body`` is accepted too, so backlog-style files work as is) or an
+article ``url``. An ``id`` (or ``request_id``) identifies the record; the line
+number is used when neither is present.
+
+Records are streamed from the input, checked concurrently through an
+AsyncFactChecker and written to the output as soon as they finish, one JSON
+object per line. Because every finished record is flushed to the output
+immediately, the output doubles as a checkpoint: running again with resume
+enabled skips the records already present in it. When failed records are
+retried, their error lines are removed from the checkpoint first, so the
+output holds exactly one line per record id.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+
+from async_fact_checker import AsyncFactChecker
+
+
+def _record_id(record: Dict[str, Any], line_number: int) -> Any:
+    """Get the identifier of an input record, falling back to its line number."""
+    for key in ("id", "request_id"):
+        if key in record:
+            return record[key]
+    return line_number
+
+
+def iter_records(input_path: str) -> Iterator[Tuple[int, Any, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Stream records from a JSON lines file.
+
+    Args:
+        input_path: Path to the input file
+
+    Yields:
+        (line number, record id, record or None, parse error or None) tuples
+    """
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, line_number, None, f"Invalid JSON on line {line_number}: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, line_number, None, f"Line {line_number} is not a JSON object"
+                continue
+            yield line_number, _record_id(record, line_number), record, None
+
+
+def load_checkpoint(output_path: str, retry_errors: bool = False) -> Set[str]:
+    """
+    Read the ids already written to an output file so they can be skipped.
+
+    A trailing partial line left behind by a crash is truncated so that new
+    records can be appended safely. When errors are retried, the file is
+    rewritten without their lines (and without earlier lines of ids that
+    appear more than once), so the retried results do not duplicate them.
+
+    Args:
+        output_path: Path to the output file from a previous run
+        retry_errors: Whether records whose result was an error should be checked again
+
+    Returns:
+        The set of completed record ids, JSON-encoded for hashability
+    """
+    if not os.path.exists(output_path):
+        return set()
+
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+
+    lines = data[:end].decode("utf-8").splitlines()
+    latest: "OrderedDict[str, Tuple[str, bool]]" = OrderedDict()
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        key = json.dumps(entry.get("id"))
+        latest.pop(key, None)
+        latest[key] = (line, "error" in entry.get("result", entry))
+
+    if not retry_errors:
+        return set(latest)
+
+    done = {key for key, (_, failed) in latest.items() if not failed}
+    if len(done) < len(lines):
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key, (line, failed) in latest.items():
+                if not failed:
+                    f.write(line + "\n")
+        os.replace(tmp_path, output_path)
+    return done
+
+
+async def _check_record(
+    checker: AsyncFactChecker,
+    record: Dict[str, Any],
+    model: Optional[str],
+    use_structured_output: bool,
+    cache_only: bool,
+    extract_url: Optional[Callable[[str], str]],
+) -> Dict[str, Any]:
+    """Fact check a single input record."""
+    text = record.get("text") or record.get("body")
+    url = record.get("url")
+    if not text and url:
+        if extract_url is None:
+            return {"error": "URL records are not supported"}
+        try:
+            text = await asyncio.to_thread(extract_url, url)
+        except Exception as e:
+            return {"error": f"Error processing URL: {str(e)}"}
+    if not text:
+        return {"error": "No text found to fact check"}
+    return await checker.check_claim(
+        text,
+        model=record.get("model", model),
+        use_structured_output=use_structured_output,
+        cache_only=cache_only,
+    )
+
+
+async def run_batch(
+    checker: AsyncFactChecker,
+    input_path: str,
+    output_path: Optional[str] = None,
+    workers: int = 8,
+    ordered: bool = False,
+    resume: bool = False,
+    retry_errors: bool = False,
+    model: Optional[str] = None,
+    use_structured_output: bool = False,
+    cache_only: bool = False,
+    extract_url: Optional[Callable[[str], str]] = None,
+) -> Dict[str, int]:
+    """
+    Fact check every record of a JSON lines file, streaming results to the output.
+
+    Args:
+        checker: The async checker used for the API calls
+        input_path: Path to the input JSON lines file
+        output_path: Path to the output JSON lines file. If None, writes to stdout.
+        workers: Maximum number of records checked at the same time
+        ordered: Write results in input order instead of completion order
+        resume: Skip records already present in the output file and append to it
+        retry_errors: When resuming, check records whose previous result was an error again
+        model: Default Perplexity model or "auto"; a record's own "model" field takes precedence
+        use_structured_output: Whether to use structured output API (if model supports it)
+        cache_only: Only return cached results, never call the API
+        extract_url: Function returning the article text of a URL, for records with a "url"
+
+    Returns:
+        Counters for processed, skipped and failed records
+    """
+    done = load_checkpoint(output_path, retry_errors) if resume and output_path else set()
+    stats = {"processed": 0, "skipped": 0, "errors": 0}
+
+    out = open(output_path, "a" if resume else "w", encoding="utf-8") if output_path else sys.stdout
+    pending: Dict[asyncio.Task, Tuple[int, Any]] = {}
+    finished: Dict[int, str] = {}
+    next_to_write = 0
+    sequence = 0
+
+    def emit(index: int, line: str) -> None:
+        nonlocal next_to_write
+        if not ordered:
+            out.write(line)
+            out.flush()
+            return
+        finished[index] = line
+        while next_to_write in finished:
+            out.write(finished.pop(next_to_write))
+            next_to_write += 1
+        out.flush()
+
+    async def drain(return_when: str) -> None:
+        completed, _ = await asyncio.wait(pending, return_when=return_when)
+        for task in completed:
+            index, record_id = pending.pop(task)
+            result = task.result()
+            stats["processed"] += 1
+            if "error" in result:
+                stats["errors"] += 1
+            emit(index, json.dumps({"id": record_id, "result": result}, ensure_ascii=False) + "\n")
+
+    try:
+        for line_number, record_id, record, error in iter_records(input_path):
+            if json.dumps(record_id) in done:
+                stats["skipped"] += 1
+                continue
+
+            index = sequence
+            sequence += 1
+            if error is not None:
+                stats["processed"] += 1
+                stats["errors"] += 1
+                emit(index, json.dumps({"id": record_id, "result": {"error": error}}) + "\n")
+                continue
+
+            task = asyncio.ensure_future(
+                _check_record(checker, record, model, use_structured_output, cache_only, extract_url)
+            )
+            pending[task] = (index, record_id)
+            if len(pending) >= workers:
+                await drain(asyncio.FIRST_COMPLETED)
+
+        if pending:
+            await drain(asyncio.ALL_COMPLETED)
+    finally:
+        for task in pending:
+            task.cancel()
+        if out is not sys.stdout:
+            out.close()
+
+    return stats
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark of cold-start import time and article extraction.
+
+Each measurement runs in a fresh interpreter so nothing is already cached in
+sys.modules. "before" imports newspaper3k up front together with the module,
+as both entry points did before extraction became lazy; "after" imports the
+module alone, which is what a plain text request pays. The extraction part
+compares the fast lxml extractor with newspaper3k on a synthetic article,
+including the one-off import cost paid by the first URL request.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 10] [--paragraphs 40]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from article_extractor import _fast_extract, _newspaper_extract  # noqa: E402
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+{imports}
+print(time.perf_counter() - start)
+"""
+
+
+def time_import(imports, repeat):
+    """Median seconds to run the given import statements in a fresh interpreter."""
+    env = dict(os.environ, PYTHONPATH=ROOT, PPLX_API_KEY=os.environ.get("PPLX_API_KEY", "benchmark"))
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(imports=imports)],
+            capture_output=True, text=True, env=env, check=True,
+        )
+        samples.append(float(out.stdout.strip()))
+    return statistics.median(samples)
+
+
+def make_page(paragraphs):
+    """Build a news-like HTML page with navigation, sidebar and footer noise."""
+    body = "".join(
+        f"<p>In {2000 + i}, the agency reported that output rose by {i}.{i}% compared with the "
+        f"previous year, according to figures published by the statistics office, which also "
+        f"noted regional differences, revisions and seasonal effects.</p>"
+        for i in range(paragraphs)
+    )
+    return (
+        "<html><head><title>Report</title><script>var x = 1;</script></head><body>"
+        "<nav><a href='/'>Home</a><a href='/world'>World</a></nav>"
+        "<div class='sidebar'><p>Trending: ten things you missed this week, and more.</p></div>"
+        f"<article><h1>Annual output report</h1>{body}</article>"
+        "<footer><p>Copyright 2024, Example News. All rights reserved.</p></footer>"
+        "</body></html>"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    args = parser.parse_args()
+
+    print("Cold-start import time (median of fresh interpreters)")
+    print(f"{'module':<32}{'before (ms)':>14}{'after (ms)':>14}")
+    for module in ("fact_checker", "fact_check_function"):
+        try:
+            before = time_import(f"import newspaper\nimport {module}", args.repeat)
+            after = time_import(f"import {module}", args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<32}{'unavailable':>14}  ({e.stderr.strip().splitlines()[-1]})")
+            continue
+        print(f"{module:<32}{before * 1000:>14.1f}{after * 1000:>14.1f}")
+
+    print()
+    print("First URL request: one-off import of the HTML stack")
+    print(f"  lxml.html:  {time_import('import lxml.html', args.repeat) * 1000:.1f} ms")
+    try:
+        print(f"  newspaper:  {time_import('import newspaper', args.repeat) * 1000:.1f} ms")
+    except subprocess.CalledProcessError:
+        print("  newspaper:  not installed")
+
+    html = make_page(args.paragraphs)
+    url = "https://example.com/news/report"
+    print()
+    print(f"Extraction of a {len(html) // 1024} KiB page ({args.paragraphs} paragraphs)")
+    fast_text = _fast_extract(html)
+    fast = min(timeit.repeat(lambda: _fast_extract(html), number=20, repeat=5)) / 20
+    print(f"  fast:       {fast * 1000:.2f} ms  ({len(fast_text)} chars)")
+    try:
+        news_text = _newspaper_extract(url, html)
+        news = min(timeit.repeat(lambda: _newspaper_extract(url, html), number=5, repeat=3)) / 5
+        print(f"  newspaper:  {news * 1000:.2f} ms  ({len(news_text)} chars)")
+    except Exception as e:
+        print(f"  newspaper:  unavailable ({e})")
+
+
+if __name__ == "__main__":
+    main()
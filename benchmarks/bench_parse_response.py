@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark of model output parsing.
+
+Compares the original split-on-fences + json.loads parser with
+stream_parser.parse_fact_check (whole content at once) and with
+ClaimStreamParser fed in small chunks, as during streaming. Also reports how
+many claims each approach keeps when the output is truncated.
+
+Usage:
+    python benchmarks/bench_parse_response.py [--claims 10 100 1000] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stream_parser import ClaimStreamParser, parse_fact_check  # noqa: E402
+
+
+def legacy_parse(content):
+    """The parser FactChecker._parse_response used before the incremental parser."""
+    try:
+        if "```json" in content:
+            return json.loads(content.split("```json")[1].split("```")[0].strip())
+        elif "```" in content:
+            return json.loads(content.split("```")[1].split("```")[0].strip())
+        return json.loads(content)
+    except (json.JSONDecodeError, IndexError):
+        citations = re.findall(r"Sources?:\s*(.+)", content)
+        return {"raw_response": content, "extracted_citations": citations or "No citations found"}
+
+
+def make_response(claim_count):
+    """Build a fenced model response with the given number of claims."""
+    result = {
+        "overall_rating": "MIXED",
+        "summary": "The article mixes accurate statistics with several misleading claims. " * 3,
+        "claims": [
+            {
+                "claim": f"Claim number {i} states that the value rose by {i * 3}% in 2023.",
+                "rating": ["TRUE", "FALSE", "MISLEADING", "UNVERIFIABLE"][i % 4],
+                "explanation": "According to the official statistics office, the reported figure "
+                               "differs from the published data; see the \"annual report\". " * 2,
+                "sources": [f"[{j}]" for j in range(1, 6)],
+            }
+            for i in range(claim_count)
+        ],
+    }
+    return "Here is the fact check:\n```json\n" + json.dumps(result, indent=2) + "\n```\n"
+
+
+def feed_in_chunks(content, size=64):
+    parser = ClaimStreamParser()
+    for i in range(0, len(content), size):
+        parser.feed(content[i:i + size])
+    return parser.finish()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--claims", type=int, nargs="+", default=[10, 100, 1000])
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    print(f"{'claims':>7} {'bytes':>9} {'legacy ms':>10} {'parse ms':>10} {'chunked ms':>11}")
+    for count in args.claims:
+        content = make_response(count)
+        timings = []
+        for fn in (legacy_parse, parse_fact_check, feed_in_chunks):
+            seconds = min(timeit.repeat(lambda: fn(content), number=1, repeat=args.repeat))
+            timings.append(seconds * 1000)
+        print(f"{count:>7} {len(content):>9} {timings[0]:>10.3f} {timings[1]:>10.3f} {timings[2]:>11.3f}")
+
+    print("\nTruncated output (cut at 70% of the content):")
+    for count in args.claims:
+        content = make_response(count)
+        truncated = content[:int(len(content) * 0.7)]
+        legacy_claims = len(legacy_parse(truncated).get("claims", []))
+        new_claims = len((parse_fact_check(truncated) or {}).get("claims", []))
+        print(f"{count:>7} claims: legacy kept {legacy_claims}, incremental parser kept {new_claims}")
+
+
+if __name__ == "__main__":
+    main()
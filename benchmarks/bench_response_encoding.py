@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark of response encoding.
+
+Compares the Azure Function's original json.dumps(results, indent=2) with
+minified stdlib JSON, minified orjson (if installed) and each of them
+compressed with gzip and brotli (if installed), on fact check results of
+increasing size. Reports encoding time, bytes on the wire and the transfer
+time of those bytes at a given bandwidth, as on a mobile connection.
+
+Usage:
+    python benchmarks/bench_response_encoding.py [--claims 5 20 100] [--repeat 20] [--bandwidth-mbps 5]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_encoding import BROTLI_QUALITY, GZIP_LEVEL, brotli, orjson  # noqa: E402
+
+
+def make_result(claim_count):
+    """Build fact check results with the given number of claims, in Vietnamese and English."""
+    return {
+        "overall_rating": "MIXED",
+        "summary": "Bài viết kết hợp các số liệu chính xác với một số tuyên bố gây hiểu lầm. " * 3,
+        "claims": [
+            {
+                "claim": f"Claim number {i} states that the value rose by {i * 3}% in 2023.",
+                "rating": ["TRUE", "FALSE", "MISLEADING", "UNVERIFIABLE"][i % 4],
+                "explanation": "According to the official statistics office, the reported figure "
+                               "differs from the published data; see the \"annual report\". " * 3,
+                "sources": [f"https://www.example{(i + j) % 12}.org/reports/2023/annual-statistics-{(i + j) % 12}"
+                            for j in range(5)],
+            }
+            for i in range(claim_count)
+        ],
+    }
+
+
+def serializers():
+    """The serializers to compare, by name."""
+    options = {
+        "json indent=2": lambda r: json.dumps(r, indent=2).encode("utf-8"),
+        "json minified": lambda r: json.dumps(r, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+    }
+    if orjson is not None:
+        options["orjson"] = orjson.dumps
+    return options
+
+
+def compressors():
+    """The content encodings to compare, by name."""
+    options = {
+        "identity": lambda body: body,
+        "gzip": lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+    }
+    if brotli is not None:
+        options["br"] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    return options
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--claims", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--bandwidth-mbps", type=float, default=5.0,
+                        help="Bandwidth used to estimate transfer time (default: 5 Mbit/s)")
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson is not installed; skipping it")
+    if brotli is None:
+        print("brotli is not installed; skipping it")
+    bytes_per_ms = args.bandwidth_mbps * 1_000_000 / 8 / 1000
+
+    print(f"{'claims':>7} {'serializer':<14} {'encoding':<9} {'encode ms':>10} {'bytes':>9} {'transfer ms':>12}")
+    for count in args.claims:
+        result = make_result(count)
+        for name, serialize in serializers().items():
+            for encoding, compress in compressors().items():
+                def encode():
+                    return compress(serialize(result))
+
+                seconds = min(timeit.repeat(encode, number=1, repeat=args.repeat))
+                size = len(encode())
+                print(f"{count:>7} {name:<14} {encoding:<9} {seconds * 1000:>10.3f} {size:>9} "
+                      f"{size / bytes_per_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
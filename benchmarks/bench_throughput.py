@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark of the fact checking paths.
+
+Starts benchmarks/mock_perplexity.py on a free local port, points
+PPLX_API_URL at it and drives:
+
+    sync    FactChecker.check_claim from a thread pool (the CLI's checker)
+    async   AsyncFactChecker.check_claim with asyncio.gather
+    batch   batch.run_batch over a generated JSON lines file
+    azure   the Azure Function handler, fact_check_function.main
+    cli     fact_checker.py as a subprocess, one text per run (includes startup)
+
+and reports requests per second, p50/p95/p99 latency and peak memory for
+each. Every request carries a unique text and caching, rate limiting and
+hedging are disabled, so each one reaches the mock API.
+
+Usage:
+    python benchmarks/bench_throughput.py [--scenarios sync async batch azure cli]
+        [--requests 200] [--concurrency 32] [--latency lognormal:0.3,0.5]
+        [--error-rate 0.0] [--claims 5] [--citations 8] [--trace-memory]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = ("sync", "async", "batch", "azure", "cli")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock(args: argparse.Namespace) -> subprocess.Popen:
+    """Start the mock API and wait until it accepts requests."""
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, "benchmarks", "mock_perplexity.py"),
+        "--port", str(port), "--latency", args.latency, "--error-rate", str(args.error_rate),
+        "--claims", str(args.claims), "--citations", str(args.citations), "--seed", "1",
+    ])
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"{base}/stats", timeout=1).read()
+            break
+        except OSError:
+            time.sleep(0.1)
+    else:
+        process.kill()
+        raise RuntimeError("Mock API did not start")
+    os.environ["PPLX_API_URL"] = f"{base}/chat/completions"
+    return process
+
+
+def configure_environment() -> None:
+    """Disable everything that would let a request skip or slow down the API call."""
+    os.environ.setdefault("PPLX_API_KEY", "benchmark")
+    os.environ["FACT_CHECK_CACHE_SIZE"] = "0"
+    os.environ["FACT_CHECK_VERDICT_TTL"] = "0"
+    os.environ["FACT_CHECK_SINGLE_FLIGHT"] = "0"
+    os.environ["FACT_CHECK_HEDGE_MODEL"] = ""
+    os.environ["PPLX_RATE_LIMIT_RPM"] = "0"
+
+
+def make_text(i: int) -> str:
+    return f"Request {i}: the city's population grew by {i % 40}% between 2010 and 2020, according to the census."
+
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+
+def timed(fn: Callable[[], Any], latencies: List[float]) -> Any:
+    start = time.perf_counter()
+    result = fn()
+    latencies.append(time.perf_counter() - start)
+    return result
+
+
+def run_sync(args: argparse.Namespace, latencies: List[float]) -> int:
+    from fact_checker import FactChecker
+    from request_scheduler import RequestScheduler
+
+    checker = FactChecker(
+        pool_maxsize=args.concurrency,
+        scheduler=RequestScheduler(rate_limit=0),
+    )
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(
+            lambda i: timed(lambda: checker.check_claim(make_text(i), model="sonar"), latencies),
+            range(args.requests),
+        ))
+    checker.close()
+    return sum("error" in r for r in results)
+
+
+async def _run_async(args: argparse.Namespace, latencies: List[float]) -> int:
+    from async_fact_checker import AsyncFactChecker
+    from fact_checker import FactChecker
+    from request_scheduler import RequestScheduler
+
+    checker = FactChecker(scheduler=RequestScheduler(rate_limit=0))
+    semaphore = asyncio.Semaphore(args.concurrency)
+    async with AsyncFactChecker(checker, max_concurrency=args.concurrency) as async_checker:
+        async def one(i: int) -> Dict[str, Any]:
+            async with semaphore:
+                start = time.perf_counter()
+                result = await async_checker.check_claim(make_text(i), model="sonar")
+                latencies.append(time.perf_counter() - start)
+            return result
+
+        results = await asyncio.gather(*(one(i) for i in range(args.requests)))
+    return sum("error" in r for r in results)
+
+
+def run_async(args: argparse.Namespace, latencies: List[float]) -> int:
+    return asyncio.run(_run_async(args, latencies))
+
+
+async def _run_batch(
+    args: argparse.Namespace, input_path: str, output_path: str, latencies: List[float]
+) -> Dict[str, int]:
+    from async_fact_checker import AsyncFactChecker
+    from batch import run_batch
+    from fact_checker import FactChecker
+    from request_scheduler import RequestScheduler
+
+    checker = FactChecker(scheduler=RequestScheduler(rate_limit=0))
+    async with AsyncFactChecker(checker, max_concurrency=args.concurrency) as async_checker:
+        check_claim = async_checker.check_claim
+
+        async def timed_check_claim(*call_args: Any, **kwargs: Any) -> Dict[str, Any]:
+            # Time each record from the moment a batch worker picks it up
+            start = time.perf_counter()
+            result = await check_claim(*call_args, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+        async_checker.check_claim = timed_check_claim
+        return await run_batch(
+            async_checker, input_path, output_path, workers=args.concurrency, model="sonar"
+        )
+
+
+def run_batch_scenario(args: argparse.Namespace, latencies: List[float]) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "input.jsonl")
+        with open(input_path, "w", encoding="utf-8") as f:
+            for i in range(args.requests):
+                f.write(json.dumps({"id": i, "text": make_text(i)}) + "\n")
+        stats = asyncio.run(_run_batch(args, input_path, os.path.join(tmp, "output.jsonl"), latencies))
+    return stats["errors"]
+
+
+async def _run_azure(args: argparse.Namespace, latencies: List[float]) -> int:
+    import azure.functions as func
+
+    import fact_check_function
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int) -> bool:
+        body = json.dumps({"text": make_text(i), "model": "sonar"}).encode("utf-8")
+        request = func.HttpRequest("POST", "/api/fact_check", body=body, headers={"Content-Type": "application/json"})
+        async with semaphore:
+            start = time.perf_counter()
+            response = await fact_check_function.main(request)
+            latencies.append(time.perf_counter() - start)
+        return response.status_code != 200 or "error" in json.loads(response.get_body())
+
+    errors = sum(await asyncio.gather(*(one(i) for i in range(args.requests))))
+    await fact_check_function.get_async_fact_checker().close()
+    return errors
+
+
+def run_azure(args: argparse.Namespace, latencies: List[float]) -> int:
+    return asyncio.run(_run_azure(args, latencies))
+
+
+def run_cli(args: argparse.Namespace, latencies: List[float]) -> int:
+    errors = 0
+    for i in range(min(args.requests, args.cli_runs)):
+        command = [
+            sys.executable, os.path.join(ROOT, "fact_checker.py"), "-t", make_text(i),
+            "--model", "sonar", "--no-cache", "--rate-limit", "0", "--json",
+        ]
+        start = time.perf_counter()
+        completed = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+        latencies.append(time.perf_counter() - start)
+        if completed.returncode != 0 or '"error"' in completed.stdout:
+            errors += 1
+    return errors
+
+
+RUNNERS = {"sync": run_sync, "async": run_async, "batch": run_batch_scenario, "azure": run_azure, "cli": run_cli}
+
+
+def fmt_ms(value: Optional[float]) -> str:
+    return f"{value * 1000:.1f}" if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--cli-runs", type=int, default=10, help="Subprocess runs for the cli scenario")
+    parser.add_argument("--latency", default="lognormal:0.3,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--claims", type=int, default=5)
+    parser.add_argument("--citations", type=int, default=8)
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Report the Python heap peak per scenario with tracemalloc (slows the run)")
+    args = parser.parse_args()
+
+    configure_environment()
+    mock = start_mock(args)
+    print(f"Mock API: {os.environ['PPLX_API_URL']} latency={args.latency} error_rate={args.error_rate} "
+          f"claims={args.claims} citations={args.citations}")
+    print(f"{'scenario':<8}{'requests':>9}{'errors':>8}{'seconds':>9}{'req/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak MiB':>10}")
+    try:
+        for name in args.scenarios:
+            latencies: List[float] = []
+            if args.trace_memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                errors = RUNNERS[name](args, latencies)
+            except ImportError as e:
+                print(f"{name:<8} skipped ({e})")
+                continue
+            finally:
+                if args.trace_memory:
+                    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                    tracemalloc.stop()
+            elapsed = time.perf_counter() - start
+            count = args.requests if name != "cli" else min(args.requests, args.cli_runs)
+            if not args.trace_memory:
+                usage = resource.RUSAGE_CHILDREN if name == "cli" else resource.RUSAGE_SELF
+                peak = resource.getrusage(usage).ru_maxrss / 1024
+            print(f"{name:<8}{count:>9}{errors:>8}{elapsed:>9.2f}{count / elapsed:>9.1f}"
+                  f"{fmt_ms(percentile(latencies, 50)):>9}{fmt_ms(percentile(latencies, 95)):>9}"
+                  f"{fmt_ms(percentile(latencies, 99)):>9}{peak:>10.1f}")
+    finally:
+        mock.terminate()
+        mock.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark of model output validation.
+
+Compares the structured output path before validation existed (json.loads
+plus dict access of every field, which leaves malformed ratings and missing
+fields in place) with json.loads followed by result_validation.validate_result
+and with result_validation.validate_result_json, which parses and validates
+the content in one step. Also times the repair path on output with
+nonstandard ratings and missing fields.
+
+Usage:
+    python benchmarks/bench_validation.py [--claims 10 100 1000] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_validation import validate_result, validate_result_json  # noqa: E402
+
+
+def make_content(claim_count, malformed=False):
+    """Build structured model output with the given number of claims."""
+    ratings = ["True", "partly true", "Mostly False", "unproven"] if malformed else \
+        ["TRUE", "FALSE", "MISLEADING", "UNVERIFIABLE"]
+    claims = []
+    for i in range(claim_count):
+        claim = {
+            "claim": f"Claim number {i} states that the value rose by {i * 3}% in 2023.",
+            "rating": ratings[i % 4],
+            "explanation": "According to the official statistics office, the reported figure "
+                           "differs from the published data. " * 2,
+            "sources": [f"https://example.org/report/{j}" for j in range(5)],
+        }
+        if malformed and i % 3 == 0:
+            del claim["explanation"]
+        claims.append(claim)
+    result = {"overall_rating": "Mixed" if malformed else "MIXED", "summary": "The article mixes facts. " * 3,
+              "claims": claims}
+    return json.dumps(result)
+
+
+def loads_and_access(content):
+    """The path before validation: json.loads and reading every field."""
+    parsed = json.loads(content)
+    parsed["overall_rating"], parsed["summary"]
+    for claim in parsed["claims"]:
+        claim.get("claim"), claim.get("rating"), claim.get("explanation"), claim.get("sources")
+    return parsed
+
+
+def loads_and_validate(content):
+    return validate_result(json.loads(content))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--claims", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    variants = (
+        ("loads+access", loads_and_access),
+        ("loads+validate", loads_and_validate),
+        ("validate_json", validate_result_json),
+    )
+    print(f"{'claims':>7} {'output':<10} {'bytes':>9}" + "".join(f"{name + ' ms':>18}" for name, _ in variants))
+    for count in args.claims:
+        for label, malformed in (("valid", False), ("malformed", True)):
+            content = make_content(count, malformed)
+            timings = [
+                min(timeit.repeat(lambda: fn(content), number=1, repeat=args.repeat)) * 1000
+                for _, fn in variants
+            ]
+            print(f"{count:>7} {label:<10} {len(content):>9}" + "".join(f"{t:>18.3f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
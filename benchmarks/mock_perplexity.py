@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Perplexity chat completions API.
+
+Answers POST /chat/completions with a fact check of configurable size after
+a latency drawn from a configurable distribution, fails a configurable share
+of requests with 429 or 5xx responses, and supports streaming (``"stream":
+true``) with server-sent events. Point the checkers at it with
+PPLX_API_URL=http://127.0.0.1:<port>/chat/completions.
+
+Latency distributions:
+    fixed:0.2            always 200 ms
+    uniform:0.1,0.5      uniformly between 100 and 500 ms
+    lognormal:0.3,0.5    log-normal with a 300 ms median and sigma 0.5
+
+Usage:
+    python benchmarks/mock_perplexity.py [--port 8765] [--latency lognormal:0.3,0.5]
+        [--error-rate 0.02] [--claims 5] [--citations 8] [--seed 1]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+from typing import Any, Callable, Dict, List
+
+from aiohttp import web
+
+RATINGS = ["TRUE", "FALSE", "MISLEADING", "UNVERIFIABLE"]
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Build a latency sampler from a distribution spec.
+
+    Args:
+        spec: "fixed:S", "uniform:A,B" or "lognormal:MEDIAN,SIGMA", in seconds
+
+    Returns:
+        A function returning one latency sample in seconds
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def make_content(claims: int, citations: int) -> str:
+    """Build the model output: a fact check JSON document with the given number of claims."""
+    return json.dumps({
+        "overall_rating": "MIXED",
+        "summary": "The text contains a mix of accurate and inaccurate statements. " * 3,
+        "claims": [
+            {
+                "claim": f"Claim {i}: the figure rose by {i * 3}% in 2023.",
+                "rating": RATINGS[i % len(RATINGS)],
+                "explanation": "According to the published statistics, the figure differs from the reported value. " * 2,
+                "sources": [f"[{(i + j) % citations + 1}]" for j in range(min(3, citations))],
+            }
+            for i in range(claims)
+        ],
+    })
+
+
+def make_app(args: argparse.Namespace) -> web.Application:
+    """Create the mock API application."""
+    sample_latency = parse_latency(args.latency)
+    content = make_content(args.claims, args.citations)
+    citations: List[str] = [f"https://example.com/source/{i}" for i in range(1, args.citations + 1)]
+    usage = {"prompt_tokens": 900, "completion_tokens": len(content) // 4}
+    stats = {"requests": 0, "errors": 0}
+
+    async def completions(request: web.Request) -> web.StreamResponse:
+        body: Dict[str, Any] = await request.json()
+        stats["requests"] += 1
+        await asyncio.sleep(sample_latency())
+
+        if random.random() < args.error_rate:
+            stats["errors"] += 1
+            if random.random() < 0.5:
+                return web.Response(status=429, headers={"Retry-After": "0"})
+            return web.Response(status=random.choice([500, 502, 503]))
+
+        if not body.get("stream"):
+            return web.json_response({
+                "model": body.get("model"),
+                "choices": [{"message": {"role": "assistant", "content": content}}],
+                "citations": citations,
+                "usage": usage,
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i in range(0, len(content), 64):
+            chunk = {"choices": [{"delta": {"content": content[i:i + 64]}}], "citations": citations}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        final = {"choices": [{"delta": {}}], "citations": citations, "usage": usage}
+        await response.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app.router.add_post("/chat/completions", completions)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:0.3,0.5", help="Latency distribution (see above)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 429/5xx")
+    parser.add_argument("--claims", type=int, default=5, help="Claims per response")
+    parser.add_argument("--citations", type=int, default=8, help="Citations per response")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    web.run_app(make_app(args), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Citation resolution and source URL canonicalization.
+
+The model cites sources as URLs or as references like "[3]" into the API's
+citation list, and the same source often shows up several times: repeated
+within a claim, with tracking parameters, behind a redirect wrapper
+(google.com/url?q=..., l.facebook.com/l.php?u=...) or a link shortener.
+CitationResolver resolves the sources of all claims in one pass:
+
+1. references ("[3]", "[1][4]", "[2, 5]") become the cited URLs
+2. URLs are unwrapped and canonicalized: redirect wrappers carrying the
+   target in a query parameter are unwrapped, known short links are looked
+   up in an offline table, and scheme, host, tracking parameters and
+   fragments are normalized (see article_cache.canonicalize_url)
+3. sources are deduplicated per claim, ignoring http/https, "www." and
+   trailing slashes
+
+with the canonical form of every URL computed once per resolver. For
+source-heavy results, compact_sources moves the sources into one shared
+table that claims reference by index.
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from article_cache import canonicalize_url
+
+# Redirect wrappers that carry the target URL in a query parameter:
+# host -> (path of the redirect endpoint, or None for any path; parameter)
+REDIRECT_WRAPPERS = {
+    "google.com": ("/url", "q"),
+    "www.google.com": ("/url", "q"),
+    "l.facebook.com": ("/l.php", "u"),
+    "lm.facebook.com": ("/l.php", "u"),
+    "l.instagram.com": (None, "u"),
+    "out.reddit.com": (None, "url"),
+    "t.umblr.com": ("/redirect", "z"),
+    "slack-redir.net": ("/link", "url"),
+}
+# Google AMP cache links: https://www.google.com/amp/s/<host>/<path>
+AMP_PREFIX = "/amp/s/"
+
+# Canonical URLs computed per resolver before the memo is cleared
+MAX_MEMO_ENTRIES = 8192
+
+_REFERENCES_RE = re.compile(r"^\s*\[\s*\d+(?:\s*,\s*\d+)*\s*\](?:\s*,?\s*\[\s*\d+(?:\s*,\s*\d+)*\s*\])*\s*$")
+_NUMBER_RE = re.compile(r"\d+")
+_URL_RE = re.compile(r"^https?://", re.IGNORECASE)
+
+
+def load_redirects(path: str) -> Dict[str, str]:
+    """
+    Load a table of short links and the URLs they redirect to.
+
+    Args:
+        path: A JSON file with an object mapping short links to their targets
+
+    Returns:
+        The targets by canonical short link
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a JSON object of strings
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    if not isinstance(table, dict) or not all(isinstance(v, str) for v in table.values()):
+        raise ValueError(f"{path} must contain a JSON object mapping short links to URLs")
+    return {canonicalize_url(short): target for short, target in table.items()}
+
+
+def source_key(source: str) -> str:
+    """
+    Build the key under which equivalent sources are deduplicated.
+
+    Args:
+        source: A canonical URL or a free-text source
+
+    Returns:
+        The URL without scheme, "www." and trailing slash, or the lowercased text
+    """
+    if not _URL_RE.match(source):
+        return " ".join(source.split()).lower()
+    key = source.split("://", 1)[1]
+    if key.startswith("www."):
+        key = key[4:]
+    return key.rstrip("/")
+
+
+class CitationResolver:
+    """Resolves citation references and canonicalizes and deduplicates claim sources."""
+
+    def __init__(self, redirects: Optional[Dict[str, str]] = None):
+        """
+        Initialize the resolver.
+
+        Args:
+            redirects: Targets of short links by canonical short link (see load_redirects)
+        """
+        self.redirects = redirects or {}
+        self._memo: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def canonical(self, url: str) -> str:
+        """
+        Get the canonical form of a source URL.
+
+        Args:
+            url: The URL as cited
+
+        Returns:
+            The canonical URL, unwrapped from redirect wrappers and known short links
+        """
+        canonical = self._memo.get(url)
+        if canonical is None:
+            canonical = self._canonicalize(url)
+            with self._lock:
+                if len(self._memo) >= MAX_MEMO_ENTRIES:
+                    self._memo.clear()
+                self._memo[url] = canonical
+        return canonical
+
+    def _canonicalize(self, url: str) -> str:
+        """Unwrap and canonicalize a URL, following at most a few redirects."""
+        try:
+            for _ in range(3):
+                parts = urlsplit(url.strip())
+                host = (parts.hostname or "").lower()
+                wrapper = REDIRECT_WRAPPERS.get(host)
+                if wrapper is not None and wrapper[0] in (None, parts.path):
+                    target = dict(parse_qsl(parts.query)).get(wrapper[1], "")
+                    if _URL_RE.match(target):
+                        url = target
+                        continue
+                if host in ("google.com", "www.google.com") and parts.path.startswith(AMP_PREFIX):
+                    url = "https://" + parts.path[len(AMP_PREFIX):]
+                    continue
+                canonical = canonicalize_url(url)
+                target = self.redirects.get(canonical)
+                if target is None:
+                    return canonical
+                url = target
+            return canonicalize_url(url)
+        except ValueError:
+            # Malformed URLs (bad ports, brackets) are kept as cited
+            return url.strip()
+
+    def resolve_sources(self, sources: Any, citations: List[str]) -> List[Any]:
+        """
+        Resolve, canonicalize and deduplicate the sources of one claim.
+
+        Args:
+            sources: The claim's "sources" value
+            citations: The citation URLs returned by the API, for references like [1]
+
+        Returns:
+            The resolved sources in their original order, without duplicates.
+            References outside the citation list are kept as cited.
+        """
+        if not isinstance(sources, list):
+            return sources
+        resolved: List[Any] = []
+        seen = set()
+        for source in sources:
+            if not isinstance(source, str):
+                resolved.append(source)
+                continue
+            if citations and _REFERENCES_RE.match(source):
+                targets = []
+                for number in _NUMBER_RE.findall(source):
+                    index = int(number) - 1
+                    targets.append(citations[index] if 0 <= index < len(citations) else f"[{number}]")
+            else:
+                targets = [source]
+            for target in targets:
+                target = self.canonical(target) if _URL_RE.match(target.strip()) else target.strip()
+                key = source_key(target)
+                if target and key not in seen:
+                    seen.add(key)
+                    resolved.append(target)
+        return resolved
+
+    def resolve(self, claims: List[Dict[str, Any]], citations: List[str]) -> None:
+        """
+        Resolve the sources of every claim in place.
+
+        Args:
+            claims: List of claim dictionaries to update
+            citations: The citation URLs returned by the API
+        """
+        for claim in claims:
+            if isinstance(claim, dict) and claim.get("sources"):
+                claim["sources"] = self.resolve_sources(claim["sources"], citations)
+
+
+def compact_sources(results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Move the sources of all claims into one shared, deduplicated table.
+
+    Args:
+        results: Fact check results with resolved claim sources
+
+    Returns:
+        A copy of the results with a top-level "sources" list and, instead of
+        "sources", a "source_ids" list of indices into it on every claim
+    """
+    claims = results.get("claims")
+    if not isinstance(claims, list):
+        return results
+    table: List[str] = []
+    index: Dict[str, int] = {}
+    compact_claims = []
+    for claim in claims:
+        if not isinstance(claim, dict):
+            compact_claims.append(claim)
+            continue
+        ids: List[int] = []
+        for source in claim.get("sources") or []:
+            if not isinstance(source, str):
+                continue
+            key = source_key(source)
+            if key not in index:
+                index[key] = len(table)
+                table.append(source)
+            if index[key] not in ids:
+                ids.append(index[key])
+        compact = {k: v for k, v in claim.items() if k != "sources"}
+        compact["source_ids"] = ids
+        compact_claims.append(compact)
+    return {**results, "claims": compact_claims, "sources": table}
@@ -0,0 +1,70 @@
+"""
+Local sentence splitting and claim extraction.
+
+These helpers are pure text functions without API calls, shared by the claim
+pipeline, the prompt budget and the verdict store. They live apart from
+claim_pipeline so that the synchronous checker can use them without loading
+the async client and aiohttp.
+"""
+
+import re
+from typing import List
+
+DEFAULT_MAX_CLAIMS = 8
+
+# Whitespace after terminal punctuation, which may be followed by up to two closing quotes or brackets
+_SENTENCE_RE = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"'”’)\]])|(?<=[.!?][\"'”’)\]]{2}))\s+")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_NUMBER_RE = re.compile(r"\d")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences on terminal punctuation and paragraph breaks.
+
+    Args:
+        text: The text to split
+
+    Returns:
+        The non-empty sentences, stripped of surrounding whitespace
+    """
+    sentences = []
+    for paragraph in re.split(r"\n\s*\n|\n", text):
+        sentences.extend(s.strip() for s in _SENTENCE_RE.split(paragraph) if s.strip())
+    return sentences
+
+
+def claim_score(sentence: str) -> float:
+    """Score how likely a sentence is to contain a checkable factual claim."""
+    words = _WORD_RE.findall(sentence)
+    if not 6 <= len(words) <= 60 or sentence.endswith("?"):
+        return 0.0
+    numbers = len(_NUMBER_RE.findall(sentence))
+    proper_nouns = sum(1 for w in words[1:] if w[0].isupper())
+    return 1.0 + min(numbers, 6) * 0.5 + min(proper_nouns, 6) * 0.3
+
+
+def extract_claims_locally(text: str, max_claims: int = DEFAULT_MAX_CLAIMS) -> List[str]:
+    """
+    Pick the most claim-dense sentences of a text without calling the API.
+
+    Sentences with numbers and proper nouns score higher; the selected
+    sentences keep their original order.
+
+    Args:
+        text: The article text
+        max_claims: Maximum number of claims to return
+
+    Returns:
+        The candidate claims
+    """
+    sentences = split_sentences(text)
+    scored = [(score, i) for i, s in enumerate(sentences) if (score := claim_score(s)) > 0]
+    best = sorted(scored, key=lambda item: (-item[0], item[1]))[:max_claims]
+    seen = set()
+    claims = []
+    for _, i in sorted(best, key=lambda item: item[1]):
+        if sentences[i] not in seen:
+            seen.add(sentences[i])
+            claims.append(sentences[i])
+    return claims
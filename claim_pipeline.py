@@ -0,0 +1,148 @@
+"""
+Claim-level fan-out for long articles.
+
+Instead of sending a whole article as one prompt, the pipeline first extracts
+candidate claims (locally with a sentence heuristic, or with one cheap model
+call) and then fact checks every claim concurrently as its own sub-request.
+The per-claim results are merged into a single FactCheckResult-shaped
+dictionary whose overall_rating is computed deterministically from the claim
+ratings. A failed sub-request only loses its own claim. Claims with a
+verdict in the checker's verdict store for the same model and prompt are
+looked up in bulk and not checked again.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from async_fact_checker import AsyncFactChecker
+from claim_extraction import DEFAULT_MAX_CLAIMS, extract_claims_locally
+from result_validation import compute_overall_rating
+
+DEFAULT_EXTRACTION_MODEL = "sonar"
+
+EXTRACTION_PROMPT = (
+    "Extract the distinct, independently checkable factual claims from the user's text. "
+    "Skip opinions, questions and predictions. Each claim must be self-contained, quoted or minimally "
+    "paraphrased from the text, and written in the text's original language. "
+    "Respond ONLY with a JSON array of strings containing at most {max_claims} claims."
+)
+
+
+async def extract_claims_with_model(
+    checker: AsyncFactChecker,
+    text: str,
+    max_claims: int = DEFAULT_MAX_CLAIMS,
+    model: str = DEFAULT_EXTRACTION_MODEL,
+) -> List[str]:
+    """
+    Extract candidate claims with one cheap model call, falling back to local extraction.
+
+    Args:
+        checker: The async checker used for the API call
+        text: The article text
+        max_claims: Maximum number of claims to return
+        model: The Perplexity model used for extraction
+
+    Returns:
+        The candidate claims
+    """
+    data = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": EXTRACTION_PROMPT.format(max_claims=max_claims)},
+            {"role": "user", "content": text},
+        ],
+    }
+    try:
+        result = await checker.post_completion(data)
+        content = result["choices"][0]["message"]["content"]
+        claims = json.loads(content[content.index("["):content.rindex("]") + 1])
+        claims = [c.strip() for c in claims if isinstance(c, str) and c.strip()]
+        if claims:
+            return claims[:max_claims]
+    except Exception:
+        pass
+    return extract_claims_locally(text, max_claims)
+
+
+def merge_claim_results(claim_texts: List[str], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-claim fact check results into one result.
+
+    Args:
+        claim_texts: The claims that were checked
+        results: The fact check result for each claim, in the same order
+
+    Returns:
+        A FactCheckResult-shaped dictionary, with a failed_claims list if any sub-request failed
+    """
+    claims: List[Dict[str, Any]] = []
+    summaries: List[str] = []
+    failed: List[Dict[str, Any]] = []
+    for claim_text, result in zip(claim_texts, results):
+        if "error" in result or not isinstance(result.get("claims"), list):
+            failed.append({"claim": claim_text, "error": result.get("error", "No claims in response")})
+            continue
+        claims.extend(result["claims"])
+        if result.get("summary"):
+            summaries.append(str(result["summary"]).strip())
+
+    if not claims:
+        errors = "; ".join(f["error"] for f in failed) or "No claims found"
+        return {"error": f"All claim checks failed: {errors}", "failed_claims": failed}
+
+    merged: Dict[str, Any] = {
+        "overall_rating": compute_overall_rating([c.get("rating", "") for c in claims]),
+        "summary": "\n\n".join(summaries),
+        "claims": claims,
+    }
+    if failed:
+        merged["failed_claims"] = failed
+    return merged
+
+
+async def check_article_claims(
+    checker: AsyncFactChecker,
+    text: str,
+    model: Optional[str] = None,
+    use_structured_output: bool = False,
+    max_claims: int = DEFAULT_MAX_CLAIMS,
+    extraction: str = "local",
+    extraction_model: str = DEFAULT_EXTRACTION_MODEL,
+) -> Dict[str, Any]:
+    """
+    Fact check an article by checking its extracted claims in parallel.
+
+    Texts yielding fewer than two candidate claims are checked as a whole.
+
+    Args:
+        checker: The async checker used for the API calls
+        text: The article text
+        model: The Perplexity model used for the claim checks
+        use_structured_output: Whether to use structured output API (if model supports it)
+        max_claims: Maximum number of claims to extract and check
+        extraction: "local" for the sentence heuristic, "model" for one extraction API call
+        extraction_model: The Perplexity model used when extraction is "model"
+
+    Returns:
+        The merged fact check results
+    """
+    if extraction == "model":
+        claim_texts = await extract_claims_with_model(checker, text, max_claims, extraction_model)
+    else:
+        claim_texts = extract_claims_locally(text, max_claims)
+
+    if len(claim_texts) < 2:
+        return await checker.check_claim(text, model, use_structured_output)
+
+    known = await asyncio.to_thread(checker.checker.lookup_verdicts, claim_texts, model, use_structured_output)
+    pending = [claim for claim in claim_texts if claim not in known]
+    results = await asyncio.gather(
+        *(checker.check_claim(claim, model, use_structured_output) for claim in pending)
+    )
+    by_claim = dict(zip(pending, results))
+    return merge_claim_results(claim_texts, [
+        by_claim[claim] if claim in by_claim else {"claims": [dict(known[claim], claim=claim, reused=True)]}
+        for claim in claim_texts
+    ])
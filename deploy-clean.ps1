@@ -45,6 +45,9 @@ if (-not $functionExists) {
     Write-Host "✓ Function app exists" -ForegroundColor Green
 }
 
+# The HTTP streams extension (streamed fact checks) is loaded at indexing time
+az functionapp config appsettings set --name $functionApp --resource-group $resourceGroup --settings "PYTHON_ENABLE_INIT_INDEXING=1" --output none
+
 # Deploy using Azure Functions Core Tools
 Write-Host "Deploying function code..." -ForegroundColor Yellow
 func azure functionapp publish $functionApp --python
@@ -7,8 +7,8 @@ import { Textarea } from '@/components/ui/textarea'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
 import { Badge } from '@/components/ui/badge'
 import { Loader2, ExternalLink, CheckCircle, XCircle, AlertCircle } from 'lucide-react'
-import { factCheckTextStream } from '@/lib/api'
-import { FactCheckResponse } from '@/lib/types'
+import { FactCheckEvent, factCheckTextStream } from '@/lib/api'
+import { FactCheckResponse, claimSources } from '@/lib/types'
 import { trackFactCheckRequest, trackFactCheckSuccess, trackFactCheckError, trackUserEngagement } from '@/lib/analytics'
 
 export default function FactChecker() {
@@ -17,7 +17,6 @@ export default function FactChecker() {
   
   const [inputText, setInputText] = useState('')
   const [isLoading, setIsLoading] = useState(false)
-  const [streamingResult, setStreamingResult] = useState('')
   const [result, setResult] = useState<FactCheckResponse | null>(null)
   const [error, setError] = useState<string | null>(null)
 
@@ -69,7 +68,6 @@ export default function FactChecker() {
     setIsLoading(true)
     setError(null)
     setResult(null)
-    setStreamingResult('')
 
     const startTime = Date.now()
     
@@ -80,8 +78,25 @@ export default function FactChecker() {
       const response = await factCheckTextStream(
         inputText,
         session?.user?.email || 'anonymous',
-        (chunk) => {
-          setStreamingResult(prev => prev + chunk)
+        (event: FactCheckEvent) => {
+          // Render the partial result as each part arrives
+          setResult(prev => {
+            const partial: FactCheckResponse = prev ?? { overall_rating: '', summary: '', claims: [] }
+            switch (event.event) {
+              case 'overall_rating':
+                return { ...partial, overall_rating: event.data }
+              case 'summary':
+                return { ...partial, summary: event.data }
+              case 'claim':
+                return { ...partial, claims: [...partial.claims, event.data] }
+              case 'citations':
+                return { ...partial, citations: event.data }
+              case 'result':
+                return event.data
+              default:
+                return prev
+            }
+          })
         }
       )
       
@@ -102,6 +117,7 @@ export default function FactChecker() {
       
     } catch (err) {
       const errorMessage = err instanceof Error ? err.message : 'An error occurred'
+      setResult(null)
       setError(errorMessage)
       
       // Track fact check error
@@ -195,40 +211,26 @@ export default function FactChecker() {
         </Card>
       )}
 
-      {isLoading && streamingResult && (
-        <Card>
-          <CardHeader>
-            <CardTitle className="flex items-center gap-2">
-              <Loader2 className="h-5 w-5 animate-spin" />
-              Streaming Result
-            </CardTitle>
-          </CardHeader>
-          <CardContent>
-            <div className="whitespace-pre-wrap text-sm bg-gray-50 p-4 rounded-lg">
-              {streamingResult}
-            </div>
-          </CardContent>
-        </Card>
-      )}
-
       {result && (
         <Card className={getResultColor(result.overall_rating)}>
           <CardHeader>
             <CardTitle className="flex items-center gap-2">
-              {getResultIcon(result.overall_rating)}
+              {isLoading ? <Loader2 className="h-5 w-5 animate-spin" /> : getResultIcon(result.overall_rating)}
               Fact-Check Result
             </CardTitle>
             <CardDescription>
-              Overall Rating: {result.overall_rating}
+              Overall Rating: {result.overall_rating || 'Checking...'}
             </CardDescription>
           </CardHeader>
           <CardContent className="space-y-4 px-4 md:px-6">
-            <div>
-              <h4 className="font-semibold mb-2">Summary:</h4>
-              <p className="text-sm bg-white p-3 rounded border break-words">
-                {result.summary}
-              </p>
-            </div>
+            {result.summary && (
+              <div>
+                <h4 className="font-semibold mb-2">Summary:</h4>
+                <p className="text-sm bg-white p-3 rounded border break-words">
+                  {result.summary}
+                </p>
+              </div>
+            )}
 
             {result.claims && result.claims.length > 0 && (
               <div>
@@ -249,11 +251,11 @@ export default function FactChecker() {
                               <p className="text-xs text-gray-600 mb-2 break-words">
                                 {claim.explanation}
                               </p>
-                              {claim.sources && claim.sources.length > 0 && (
+                              {claimSources(result, claim).length > 0 && (
                                 <div className="text-xs">
                                   <span className="font-medium">Sources:</span>
                                   <ul className="mt-1 space-y-1">
-                                    {claim.sources.map((source, sourceIndex) => (
+                                    {claimSources(result, claim).map((source, sourceIndex) => (
                                       <li key={sourceIndex} className="break-all">
                                         <a
                                           href={source}
@@ -1,4 +1,4 @@
-import { FactCheckResponse } from '@/lib/types'
+import { Claim, FactCheckResponse } from '@/lib/types'
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'https://func-fact-checker-demo.azurewebsites.net/api/fact_check_function'
 
@@ -17,6 +17,7 @@ export async function factCheckText(text: string, userId?: string): Promise<Fact
       body: JSON.stringify({
         text,
         user_id: userId,
+        source_table: true,
       }),
     })
 
@@ -32,11 +33,39 @@ export async function factCheckText(text: string, userId?: string): Promise<Fact
   }
 }
 
+// Events of a streamed fact check, in the order the API sends them
+export type FactCheckEvent =
+  | { event: 'overall_rating'; data: string }
+  | { event: 'summary'; data: string }
+  | { event: 'claim'; data: Claim }
+  | { event: 'citations'; data: string[] }
+  | { event: 'result'; data: FactCheckResponse }
+  | { event: 'error'; data: { error?: string } }
+  | { event: 'timings'; data: unknown }
+
+// Parse one Server-Sent Events message (the lines between two blank lines)
+function parseEvent(message: string): FactCheckEvent | null {
+  let event = 'message'
+  const data: string[] = []
+  for (const line of message.split('\n')) {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim()
+    } else if (line.startsWith('data:')) {
+      data.push(line.slice(5).trimStart())
+    }
+  }
+  if (data.length === 0) {
+    return null
+  }
+  return { event, data: JSON.parse(data.join('\n')) } as FactCheckEvent
+}
+
 export async function factCheckTextStream(
   text: string,
   userId?: string,
-  onChunk?: (chunk: string) => void
+  onEvent?: (event: FactCheckEvent) => void
 ): Promise<FactCheckResponse> {
+  let received = false
   try {
     console.log('Making API request to:', API_URL)
     console.log('Request body:', { text, user_id: userId })
@@ -45,15 +74,17 @@ export async function factCheckTextStream(
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        Accept: 'text/event-stream',
       },
       body: JSON.stringify({
         text,
         user_id: userId,
+        source_table: true,
+        stream: true,
       }),
     })
 
     console.log('Response status:', response.status)
-    console.log('Response headers:', Array.from(response.headers.entries()))
 
     if (!response.ok) {
       const errorText = await response.text()
@@ -61,20 +92,53 @@ export async function factCheckTextStream(
       throw new Error(`HTTP error! status: ${response.status}, message: ${errorText}`)
     }
 
-    const data = await response.json()
-    console.log('Response data:', data)
-    
-    // Simulate streaming by calling onChunk with the complete response
-    if (onChunk) {
-      onChunk(JSON.stringify(data, null, 2))
+    // An API without streaming support answers with a single JSON document
+    if (!response.body || !response.headers.get('Content-Type')?.includes('text/event-stream')) {
+      return await response.json()
     }
-    
-    return data
+
+    // Hand each event to the caller as soon as it arrives
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    let result: FactCheckResponse | null = null
+    for (;;) {
+      const { value, done } = await reader.read()
+      buffer += decoder.decode(value, { stream: !done })
+      let end: number
+      while ((end = buffer.indexOf('\n\n')) !== -1) {
+        const event = parseEvent(buffer.slice(0, end))
+        buffer = buffer.slice(end + 2)
+        if (!event) {
+          continue
+        }
+        received = true
+        if (event.event === 'error') {
+          throw new Error(event.data.error || 'Fact check failed')
+        }
+        if (event.event === 'result') {
+          result = event.data
+        }
+        onEvent?.(event)
+      }
+      if (done) {
+        break
+      }
+    }
+
+    if (!result) {
+      throw new Error('Fact check stream ended without a result')
+    }
+    return result
   } catch (error) {
     console.error('Error in factCheckTextStream:', error)
     if (error instanceof Error) {
       console.error('Error stack:', error.stack)
     }
+    // Once events were shown, report the failure instead of starting over
+    if (received) {
+      throw error
+    }
     // Fall back to regular API call
     return factCheckText(text, userId)
   }
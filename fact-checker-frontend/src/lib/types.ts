@@ -7,16 +7,26 @@ export interface Claim {
   claim: string
   rating: string
   explanation: string
-  sources: string[]
+  sources?: string[]
+  source_ids?: number[]
 }
 
 export interface FactCheckResponse {
   overall_rating: string
   summary: string
   claims: Claim[]
+  sources?: string[]
   citations?: string[]
 }
 
+// Sources of a claim, looked up in the shared table when the response has one
+export function claimSources(result: FactCheckResponse, claim: Claim): string[] {
+  if (claim.source_ids && result.sources) {
+    return claim.source_ids.map((id) => result.sources![id]).filter(Boolean)
+  }
+  return claim.sources ?? []
+}
+
 export interface Source {
   title: string
   url: string
@@ -0,0 +1,896 @@
+"""
+Fact checking engine shared by the CLI (fact_checker.py) and the Azure
+Function (fact_check_function).
+
+FactChecker builds the request (system prompt variant for the detected
+language, trimmed text, known claims), sends it through the scheduler and
+parses, validates and resolves the result, consulting the result cache,
+near-duplicate index and verdict store on the way. Each deployment only
+chooses its backends:
+
+- transport: how a chat completion is sent (Transport; RequestsTransport
+  over a pooled requests session by default, AsyncFactChecker adds aiohttp)
+- cache: where results are kept (result_cache.CacheBackend; ResultCache
+  keeps them in memory and optionally in SQLite)
+- extractor: how article text is taken from downloaded HTML ("fast",
+  "newspaper" or any (url, html) -> text callable), with an optional
+  ArticleCache in front of the download
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3Error
+from pydantic import BaseModel, Field
+
+from article_cache import ArticleCache
+from article_extractor import DEFAULT_EXTRACTOR, extract_article_text
+from citation_resolver import CitationResolver
+from language_detector import LanguageDetector, get_language_detector
+from model_router import AUTO_MODEL, ModelRouter
+from prompt_budget import DEFAULT_TOKEN_BUDGETS, fit_prompt
+from prompt_variants import FALLBACK_SYSTEM_PROMPT, PromptVariants
+from request_scheduler import (
+    RETRY_STATUSES, DeadlineExceeded, RequestScheduler, RetryableError, parse_retry_after,
+)
+from result_cache import CacheBackend, ResultCache, hash_prompt
+from result_validation import validate_result, validate_result_json
+from similarity_index import SimilarityIndex
+from single_flight import SingleFlight
+from stream_parser import parse_fact_check
+from telemetry import record_usage, span
+from verdict_store import VerdictStore, known_result, merge_known_claims, skip_instruction
+
+
+class Claim(BaseModel):
+    """Model for representing a single claim and its fact check."""
+    claim: str = Field(description="The specific claim extracted from the text")
+    rating: str = Field(description="Rating of the claim: TRUE, FALSE, MISLEADING, or UNVERIFIABLE")
+    explanation: str = Field(description="Detailed explanation with supporting evidence")
+    sources: List[str] = Field(description="List of sources used to verify the claim")
+
+
+class FactCheckResult(BaseModel):
+    """Model for the complete fact check result."""
+    overall_rating: str = Field(description="Overall rating: MOSTLY_TRUE, MIXED, or MOSTLY_FALSE")
+    summary: str = Field(description="Brief summary of the overall findings")
+    claims: List[Claim] = Field(description="List of specific claims and their fact checks")
+
+
+# Instruction preceding the text in the user message
+USER_INSTRUCTION = "Fact check the following text and identify any false or misleading claims:\n\n"
+
+# JSON schema sent with structured output requests, derived once per process
+FACT_CHECK_RESULT_SCHEMA = FactCheckResult.model_json_schema()
+
+# Turns a downloaded page (url, html) into article text
+Extractor = Callable[[str, str], str]
+
+# Seconds to wait for an article download
+ARTICLE_TIMEOUT = 15
+
+
+def build_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+    """
+    Create a requests session backed by a keep-alive connection pool.
+
+    Args:
+        pool_connections: Number of per-host connection pools to cache
+        pool_maxsize: Maximum number of connections kept per host
+
+    Returns:
+        A configured requests session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class Transport(ABC):
+    """Sends chat completion requests to the API."""
+
+    @abstractmethod
+    def post(
+        self,
+        url: str,
+        data: Dict[str, Any],
+        headers: Dict[str, str],
+        timeout: Tuple[float, float],
+        total_timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send one chat completion attempt.
+
+        Args:
+            url: The chat completions endpoint
+            data: The request body
+            headers: The request headers, including authorization
+            timeout: (connect, read) timeouts in seconds; the read timeout
+                applies to each socket read, not to the whole response
+            total_timeout: Seconds the whole attempt may take, including reading
+                the response body, or None for no overall bound
+
+        Returns:
+            The decoded JSON response
+
+        Raises:
+            RetryableError: On connection failures, timeouts, 429 and 5xx responses
+            requests.exceptions.RequestException: On other error responses
+        """
+
+    def close(self) -> None:
+        """Release the transport's connections."""
+
+
+class RequestsTransport(Transport):
+    """Transport over a keep-alive requests session."""
+
+    DEFAULT_POOL_CONNECTIONS = int(os.environ.get("PPLX_POOL_CONNECTIONS", "4"))
+    DEFAULT_POOL_MAXSIZE = int(os.environ.get("PPLX_POOL_MAXSIZE", "16"))
+    CHUNK_SIZE = 16384  # most bytes read at a time while checking the total timeout
+    TRICKLE_CHUNK_SIZE = 256  # bytes per read on urllib3 versions without read1
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            session: Existing requests session to reuse. If None, a pooled session is created.
+            pool_connections: Number of per-host connection pools to cache
+            pool_maxsize: Maximum number of keep-alive connections kept per host
+        """
+        self._owns_session = session is None
+        self.session = session or build_session(pool_connections, pool_maxsize)
+
+    def post(
+        self,
+        url: str,
+        data: Dict[str, Any],
+        headers: Dict[str, str],
+        timeout: Tuple[float, float],
+        total_timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        start = time.monotonic()
+        try:
+            response = self.session.post(url, json=data, timeout=timeout, headers=headers, stream=True)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            raise RetryableError(str(e)) from e
+        with response:
+            if response.status_code in RETRY_STATUSES:
+                raise RetryableError(
+                    f"{response.status_code} {response.reason} for url: {response.url}",
+                    status=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                )
+            response.raise_for_status()
+            # The read timeout only bounds each socket read, so an upstream trickling
+            # bytes is cut off here; a response can overrun by at most one read timeout.
+            # read1 returns whatever has arrived instead of waiting for a full chunk.
+            read1 = getattr(response.raw, "read1", None)
+            reads = (
+                iter(lambda: read1(self.CHUNK_SIZE, decode_content=True), b"")
+                if read1 is not None else response.iter_content(self.TRICKLE_CHUNK_SIZE)
+            )
+            chunks = []
+            try:
+                for chunk in reads:
+                    chunks.append(chunk)
+                    if total_timeout is not None and time.monotonic() - start > total_timeout:
+                        raise RetryableError(f"response from {response.url} took longer than {total_timeout:g}s")
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.Timeout,
+                Urllib3Error,
+            ) as e:
+                raise RetryableError(str(e)) from e
+            return json.loads(b"".join(chunks))
+
+    def close(self) -> None:
+        """Close the session if this transport created it."""
+        if self._owns_session:
+            self.session.close()
+
+
+def fetch_article_text(
+    url: str,
+    cache: Optional[ArticleCache] = None,
+    extractor: Union[str, Extractor] = DEFAULT_EXTRACTOR,
+) -> str:
+    """
+    Download an article and extract its main text.
+
+    Args:
+        url: URL of the article
+        cache: Cache of extracted article text. If given, fresh entries skip the
+            download and stale ones are revalidated with a conditional GET.
+        extractor: "fast" or "newspaper" (see article_extractor), or a function
+            turning (url, html) into article text
+
+    Returns:
+        The extracted article text (may be empty)
+    """
+    extract = partial(extract_article_text, extractor=extractor) if isinstance(extractor, str) else extractor
+    if cache is not None:
+        return cache.fetch(url, extract, timeout=ARTICLE_TIMEOUT)
+
+    with span("fetch"):
+        response = requests.get(url, timeout=ARTICLE_TIMEOUT)
+        response.raise_for_status()
+    with span("extract"):
+        return extract(url, response.text)
+
+
+class FactChecker:
+    """A class to interact with Perplexity Sonar API for fact checking."""
+
+    # Overridable so benchmarks can point at a local stand-in (benchmarks/mock_perplexity.py)
+    API_URL = os.environ.get("PPLX_API_URL", "https://api.perplexity.ai/chat/completions")
+    DEFAULT_MODEL = "sonar-pro"
+    PROMPT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "system_prompt.md")
+
+    # Models that support structured outputs (ensure your tier has access)
+    STRUCTURED_OUTPUT_MODELS = ["sonar", "sonar-pro", "sonar-reasoning", "sonar-reasoning-pro"]
+
+    # Timeouts for calls to api.perplexity.ai (override via environment or app settings)
+    DEFAULT_CONNECT_TIMEOUT = float(os.environ.get("PPLX_CONNECT_TIMEOUT", "10"))
+    DEFAULT_READ_TIMEOUT = float(os.environ.get("PPLX_READ_TIMEOUT", "120"))
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        prompt_file: Optional[str] = None,
+        transport: Optional[Transport] = None,
+        session: Optional[requests.Session] = None,
+        pool_connections: int = RequestsTransport.DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = RequestsTransport.DEFAULT_POOL_MAXSIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        cache: Optional[CacheBackend] = None,
+        similarity_index: Optional[SimilarityIndex] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        single_flight: Optional[SingleFlight] = None,
+        router: Optional[ModelRouter] = None,
+        token_budgets: Optional[Dict[str, int]] = None,
+        language_detector: Optional[LanguageDetector] = None,
+        verdict_store: Optional[VerdictStore] = None,
+        citation_resolver: Optional[CitationResolver] = None,
+        article_cache: Optional[ArticleCache] = None,
+        extractor: Union[str, Extractor] = DEFAULT_EXTRACTOR,
+    ):
+        """
+        Initialize the FactChecker with API key and system prompt.
+
+        Args:
+            api_key: Perplexity API key. If None, will try to read from environment or key file.
+            prompt_file: Path to file containing the system prompt. If None, system_prompt.md
+                next to this module is used.
+            transport: Sends the API requests. If None, a RequestsTransport over session is used.
+            session: Requests session for the default transport. If None, a pooled session is created.
+            pool_connections: Number of per-host connection pools of the created session.
+            pool_maxsize: Maximum number of keep-alive connections the created session keeps per host.
+            connect_timeout: Seconds to wait for a connection to the API to be established.
+            read_timeout: Seconds to wait for the API to send a response.
+            cache: Result cache consulted before calling the API. If None, results are not cached.
+            similarity_index: Near-duplicate index consulted after a cache miss. If None, disabled.
+            scheduler: Rate limiter and retry policy for API calls. If None, uses the defaults.
+            single_flight: Deduplicator sharing one API call among concurrent identical requests.
+                If None, every request calls the API.
+            router: Model router resolving the "auto" model. If None, "auto" means DEFAULT_MODEL.
+            token_budgets: Prompt token budget per model (see prompt_budget.parse_token_budgets);
+                longer texts are trimmed to fit. If None, DEFAULT_TOKEN_BUDGETS is used.
+            language_detector: Detects the input language, which selects the system prompt
+                variant. If None, the process-wide detector is used.
+            verdict_store: Per-claim verdicts reused across texts. If None, every claim is checked.
+            citation_resolver: Resolves and deduplicates claim sources. If None, one without
+                a short link table is used.
+            article_cache: Cache of extracted article text for fetch_article. If None, every
+                article is downloaded.
+            extractor: Article text extractor for fetch_article: "fast", "newspaper" or a
+                function turning (url, html) into text.
+        """
+        self.api_key = api_key or self._get_api_key()
+        if not self.api_key:
+            raise ValueError(
+                "API key not found. Please provide via argument, PPLX_API_KEY environment variable, or key file."
+            )
+
+        self.prompt_file = prompt_file or self.PROMPT_FILE
+        self.system_prompt = self._load_system_prompt()
+        self.prompt_variants = self._compile_prompt_variants()
+        self.timeout = (connect_timeout, read_timeout)
+        self._owns_transport = transport is None
+        self.transport = transport or RequestsTransport(session, pool_connections, pool_maxsize)
+        self.headers = self._get_headers()
+        self.cache = cache
+        self.similarity_index = similarity_index
+        self.scheduler = scheduler or RequestScheduler()
+        self.single_flight = single_flight
+        self.router = router
+        self.token_budgets = DEFAULT_TOKEN_BUDGETS if token_budgets is None else token_budgets
+        self.language_detector = language_detector or get_language_detector()
+        self.verdict_store = verdict_store
+        self.citation_resolver = citation_resolver or CitationResolver()
+        self.article_cache = article_cache
+        self.extractor = extractor
+
+    def _get_headers(self) -> Dict[str, str]:
+        """
+        Build the HTTP headers sent with every API request.
+
+        Returns:
+            A dictionary of request headers
+        """
+        return {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+
+    def close(self) -> None:
+        """Close the transport if this checker created it."""
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self) -> "FactChecker":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _get_api_key(self) -> str:
+        """
+        Try to get API key from environment or from a file in the current directory.
+
+        Returns:
+            The API key if found, empty string otherwise.
+        """
+        api_key = os.environ.get("PPLX_API_KEY", "")
+        if api_key:
+            return api_key
+
+        for key_file in ["pplx_api_key", ".pplx_api_key", "PPLX_API_KEY", ".PPLX_API_KEY"]:
+            key_path = Path(key_file)
+            if key_path.exists():
+                try:
+                    return key_path.read_text().strip()
+                except Exception:
+                    pass
+
+        return ""
+
+    def _get_prompt_mtime(self) -> Optional[float]:
+        """
+        Get the modification time of the prompt file.
+
+        Returns:
+            The file's mtime, or None if it does not exist
+        """
+        try:
+            return os.stat(self.prompt_file).st_mtime
+        except OSError:
+            return None
+
+    def reload_system_prompt_if_changed(self) -> bool:
+        """
+        Reload the system prompt if the prompt file changed since it was last read.
+
+        Returns:
+            True if the prompt was reloaded, False otherwise
+        """
+        if self._get_prompt_mtime() == self._prompt_mtime:
+            return False
+        logging.info(f"{self.prompt_file} changed on disk, reloading system prompt")
+        self.system_prompt = self._load_system_prompt()
+        self.prompt_variants = self._compile_prompt_variants()
+        return True
+
+    def _compile_prompt_variants(self) -> PromptVariants:
+        """
+        Build the compact per-language variants of the current system prompt.
+
+        Returns:
+            The prompt variants
+        """
+        variants = PromptVariants(self.system_prompt)
+        stats = variants.stats()
+        logging.info(
+            f"System prompt {stats['base_hash']}: {stats['original_bytes']} bytes as written, "
+            f"{stats['compact_bytes']} compacted, "
+            + ", ".join(f"{language} {v['bytes']} ({v['hash']})" for language, v in stats["variants"].items())
+        )
+        return variants
+
+    def _load_system_prompt(self) -> str:
+        """
+        Load the system prompt from the prompt file.
+
+        Returns:
+            The system prompt as a string, or the built-in prompt if the file cannot be read
+        """
+        self._prompt_mtime = self._get_prompt_mtime()
+        try:
+            with open(self.prompt_file, 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            logging.warning(f"Prompt file not found at {self.prompt_file}, using the default system prompt")
+        except Exception as e:
+            logging.warning(f"Could not load system prompt from {self.prompt_file}: {e}")
+        return FALLBACK_SYSTEM_PROMPT
+
+    def _detect_language(self, text: str) -> Optional[str]:
+        """
+        Detect the language of the input text from its first characters.
+
+        Args:
+            text: The input text to analyze
+
+        Returns:
+            The detected language name, or None if no supported language fits
+        """
+        return self.language_detector.detect(text)
+
+    def fetch_article(self, url: str) -> str:
+        """
+        Download an article and extract its main text with the configured extractor.
+
+        Args:
+            url: URL of the article
+
+        Returns:
+            The extracted article text (may be empty)
+        """
+        return fetch_article_text(url, self.article_cache, self.extractor)
+
+    def check_claim(
+        self,
+        text: str,
+        model: str = DEFAULT_MODEL,
+        use_structured_output: bool = False,
+        cache_only: bool = False,
+        latency_budget: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Check the factual accuracy of a claim or article.
+
+        Args:
+            text: The claim or article text to fact check
+            model: The Perplexity model to use, or "auto" to let the router pick one
+            use_structured_output: Whether to use structured output API (if model supports it)
+            cache_only: Only look the text up in the result cache, never call the API
+            latency_budget: Seconds the caller is willing to wait, used when routing "auto"
+
+        Returns:
+            The parsed response containing fact check results.
+        """
+        with span("cache_lookup"):
+            early, model, cache_key, namespace, known = self._begin_check(
+                text, model, use_structured_output, cache_only, latency_budget
+            )
+        if early is not None:
+            return early
+
+        def fetch() -> Dict[str, Any]:
+            cached = self._flight_cached(cache_key)
+            if cached is not None:
+                return cached
+            results = self._fact_check(text, model, use_structured_output, known)
+            self._store_result(text, results, cache_key, namespace)
+            return results
+
+        if self.single_flight is None:
+            return fetch()
+        return self.single_flight.do(self.flight_key(text, model, use_structured_output, cache_key), fetch)
+
+    def _begin_check(
+        self,
+        text: str,
+        model: Optional[str],
+        use_structured_output: bool,
+        cache_only: bool = False,
+        latency_budget: Optional[float] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], str, Optional[str], str, Optional[List[Dict[str, Any]]]]:
+        """
+        Validate a request, resolve its model and look it up (see _lookup_cached).
+
+        Shared by the synchronous and asynchronous checkers, which only differ
+        in how they call the API.
+
+        Args:
+            text: The claim or article text to fact check
+            model: The requested model, "auto" or None
+            use_structured_output: Whether structured output was requested
+            cache_only: Whether a lookup miss should be reported instead of checked
+            latency_budget: Seconds the caller is willing to wait, used when routing "auto"
+
+        Returns:
+            A (result to return as is or None, resolved model, cache key, similarity
+            namespace, known claims) tuple; the result is the empty text error, a
+            stored result or the cache miss error of a cache_only request
+        """
+        if not text or not text.strip():
+            return {"error": "Input text is empty. Cannot perform fact check."}, "", None, "", None
+        model = self.resolve_model(text, model, latency_budget)
+        cached, cache_key, namespace, known = self._lookup_cached(text, model, use_structured_output)
+        if cached is None and cache_only:
+            cached = {"error": "No cached result available for this text.", "cache_miss": True}
+        return cached, model, cache_key, namespace, known
+
+    def _flight_cached(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Look a result up again once the caller leads its single flight.
+
+        Another caller may have stored the result while this one waited for
+        the flight's lock; without single flight the lookup just missed.
+
+        Args:
+            cache_key: Key returned by _lookup_cached, or None if caching is disabled
+
+        Returns:
+            The cached result, or None
+        """
+        if self.single_flight is None or cache_key is None:
+            return None
+        return self.cache.get(cache_key)
+
+    def resolve_model(
+        self, text: str, model: Optional[str] = None, latency_budget: Optional[float] = None
+    ) -> str:
+        """
+        Resolve the model for a request, routing "auto" (or no model) through the router.
+
+        Args:
+            text: The claim or article text to fact check
+            model: The requested model, "auto" or None
+            latency_budget: Seconds the caller is willing to wait, if limited
+
+        Returns:
+            The concrete model name
+        """
+        if model and model != AUTO_MODEL:
+            return model
+        if self.router is None:
+            return self.DEFAULT_MODEL
+        return self.router.route(text, latency_budget)
+
+    def flight_key(
+        self, text: str, model: str, use_structured_output: bool, cache_key: Optional[str]
+    ) -> str:
+        """
+        Build the key identifying identical in-flight requests.
+
+        Args:
+            text: The claim or article text to fact check
+            model: The Perplexity model to use
+            use_structured_output: Whether structured output was requested
+            cache_key: Key returned by _lookup_cached, reused when caching is enabled
+
+        Returns:
+            The single-flight key
+        """
+        return cache_key or ResultCache.make_key(text, model, use_structured_output, self.system_prompt)
+
+    def result_namespace(self, model: str, use_structured_output: bool) -> str:
+        """
+        Build the namespace of the near-duplicate index and verdict store.
+
+        Like result cache keys, it covers everything besides the text that
+        shapes a result, so one configuration never reuses another's verdicts.
+
+        Args:
+            model: The Perplexity model to use
+            use_structured_output: Whether structured output was requested
+
+        Returns:
+            The model, structured output flag and system prompt hash
+        """
+        return f"{model}|{int(use_structured_output)}|{hash_prompt(self.system_prompt)}"
+
+    def lookup_verdicts(
+        self, claims: List[str], model: Optional[str] = None, use_structured_output: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Look stored verdicts of claims up, as they would be reused by check_claim.
+
+        Args:
+            claims: The claim texts
+            model: The Perplexity model, "auto" or None; "auto" is resolved per claim
+            use_structured_output: Whether structured output was requested
+
+        Returns:
+            The verdict of each known claim, by claim text (see VerdictStore.lookup)
+        """
+        if self.verdict_store is None:
+            return {}
+        by_namespace: Dict[str, List[str]] = {}
+        for claim in claims:
+            namespace = self.result_namespace(self.resolve_model(claim, model), use_structured_output)
+            by_namespace.setdefault(namespace, []).append(claim)
+        found: Dict[str, Dict[str, Any]] = {}
+        for namespace, group in by_namespace.items():
+            found.update(self.verdict_store.lookup(group, namespace))
+        return found
+
+    def _lookup_cached(
+        self, text: str, model: str, use_structured_output: bool
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str], str, Optional[List[Dict[str, Any]]]]:
+        """
+        Look the request up in the result cache, then in the near-duplicate index,
+        then in the verdict store (if every sentence of the text is a known claim).
+
+        Args:
+            text: The claim or article text to fact check
+            model: The Perplexity model to use
+            use_structured_output: Whether structured output was requested
+
+        Returns:
+            A (cached result or None, cache key or None, similarity namespace, known
+            claims) tuple; the known claims are None if the verdict store was not
+            consulted, and are passed on to _build_request so it does not look them up again
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResultCache.make_key(text, model, use_structured_output, self.system_prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached, cache_key, "", None
+
+        namespace = self.result_namespace(model, use_structured_output)
+        if self.similarity_index is not None:
+            match = self.similarity_index.query(text, namespace)
+            if match is not None:
+                similarity, results = match
+                results["near_duplicate"] = {"similarity": round(similarity, 3)}
+                return results, cache_key, namespace, None
+
+        if self.verdict_store is not None:
+            known, complete = self.verdict_store.known_claims(text, namespace)
+            if complete:
+                return known_result(known), cache_key, namespace, known
+            return None, cache_key, namespace, known
+
+        return None, cache_key, namespace, None
+
+    def _store_result(
+        self, text: str, results: Dict[str, Any], cache_key: Optional[str], namespace: str
+    ) -> None:
+        """
+        Remember a successful result in the result cache, near-duplicate index and verdict store.
+
+        Answers of a hedge model are not stored: the key and namespace belong to the
+        requested model, whose answer later requests would expect.
+
+        Args:
+            text: The text that was fact checked
+            results: The fact check results
+            cache_key: Key returned by _lookup_cached, or None if caching is disabled
+            namespace: Similarity namespace returned by _lookup_cached
+        """
+        if "error" in results or "hedged_model" in results:
+            return
+        if cache_key is not None:
+            self.cache.set(cache_key, results)
+        if self.similarity_index is not None:
+            self.similarity_index.add(text, results, namespace)
+        if self.verdict_store is not None and isinstance(results.get("claims"), list):
+            self.verdict_store.add_claims(results["claims"], text, namespace)
+
+    def _fact_check(
+        self,
+        text: str,
+        model: str,
+        use_structured_output: bool,
+        known_claims: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send the text to the Perplexity API and parse the fact check results.
+
+        Args:
+            text: The claim or article text to fact check
+            model: The Perplexity model to use
+            use_structured_output: Whether to use structured output API (if model supports it)
+            known_claims: Known claims returned by _lookup_cached, or None to look them up
+
+        Returns:
+            The parsed response containing fact check results.
+        """
+        with span("prompt_build"):
+            data, can_use_structured_output, context = self._build_request(
+                text, model, use_structured_output, known_claims
+            )
+
+        try:
+            start = time.monotonic()
+            with span("api"):
+                result = self.scheduler.run(lambda remaining: self._post_completion(data, remaining))
+            if self.router is not None:
+                self.router.record(model, time.monotonic() - start)
+            return self._handle_api_result(result, can_use_structured_output, context)
+        except (RetryableError, DeadlineExceeded) as e:
+            return {"error": f"API request failed: {str(e)}"}
+        except requests.exceptions.RequestException as e:
+            return {"error": f"API request failed: {str(e)}"}
+        except json.JSONDecodeError:
+            return {"error": "Failed to parse API response as JSON"}
+        except Exception as e:
+            return {"error": f"Unexpected error: {str(e)}"}
+
+    def _post_completion(self, data: Dict[str, Any], remaining: float) -> Dict[str, Any]:
+        """
+        Send one chat completion attempt through the transport.
+
+        The connect and per-read timeouts are capped by the time left, and the
+        transport stops reading once the whole attempt exceeds it.
+
+        Args:
+            data: The request body
+            remaining: Seconds left before the request deadline
+
+        Returns:
+            The decoded JSON response
+
+        Raises:
+            RetryableError: On connection failures, timeouts, 429 and 5xx responses
+            requests.exceptions.RequestException: On other error responses
+        """
+        connect_timeout, read_timeout = self.timeout
+        return self.transport.post(
+            self.API_URL,
+            data,
+            self.headers,
+            (min(connect_timeout, remaining), min(read_timeout, remaining)),
+            total_timeout=remaining,
+        )
+
+    def _build_request(
+        self,
+        text: str,
+        model: str,
+        use_structured_output: bool,
+        known_claims: Optional[List[Dict[str, Any]]] = None,
+    ) -> Tuple[Dict[str, Any], bool, Dict[str, Any]]:
+        """
+        Build the chat completion request body for a fact check.
+
+        Texts exceeding the model's prompt token budget are trimmed to their
+        most claim-dense sentences first. Claims with a verdict in the verdict
+        store are listed in the prompt as already verified.
+
+        Args:
+            text: The claim or article text to fact check
+            model: The Perplexity model to use
+            use_structured_output: Whether to use structured output API (if model supports it)
+            known_claims: Known claims returned by _lookup_cached, or None to look them up
+
+        Returns:
+            The request body, whether structured output is actually used and the
+            request context for _handle_api_result: a "prompt_budget" report of what
+            was trimmed to fit the token budget and the "known_claims" left out
+        """
+        # The precompiled variant for the detected language carries the language
+        # rule, so every request in that language sends the same system message.
+        # Undetermined languages get the compact prompt, which has the model detect it.
+        system_prompt, _ = self.prompt_variants.get(self._detect_language(text))
+        text, budget = fit_prompt(text, model, self.token_budgets, system_prompt, USER_INSTRUCTION)
+        context: Dict[str, Any] = {"prompt_budget": budget, "known_claims": known_claims or []}
+        if known_claims is None and self.verdict_store is not None:
+            context["known_claims"], _ = self.verdict_store.known_claims(
+                text, self.result_namespace(model, use_structured_output)
+            )
+        user_prompt = f"{USER_INSTRUCTION}{text}{skip_instruction(context['known_claims'])}"
+
+        data = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+        }
+
+        can_use_structured_output = model in self.STRUCTURED_OUTPUT_MODELS and use_structured_output
+        if can_use_structured_output:
+            data["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"schema": FACT_CHECK_RESULT_SCHEMA},
+            }
+        return data, can_use_structured_output, context
+
+    def _handle_api_result(
+        self, result: Dict[str, Any], can_use_structured_output: bool, context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract and parse the fact check from a decoded API response.
+
+        Args:
+            result: The decoded JSON body returned by the API
+            can_use_structured_output: Whether the request used structured output
+            context: Request context returned by _build_request. Its trim report is added to the
+                results as "prompt_budget" and its known claims are merged into the claims.
+
+        Returns:
+            The parsed fact check results, validated and normalized (see result_validation),
+            with citation references resolved.
+        """
+        # Get citations from API response for resolving references
+        api_citations = result.get("citations", [])
+        record_usage(result.get("model"), result.get("usage"))
+
+        if "choices" in result and result["choices"] and "message" in result["choices"][0]:
+            content = result["choices"][0]["message"]["content"]
+
+            with span("parse"):
+                if can_use_structured_output:
+                    # Parsed and validated in one step
+                    parsed = validate_result_json(content)
+                    if parsed is None:
+                        # Keep whatever claims completed before the output was cut off
+                        partial = parse_fact_check(content)
+                        if partial is None:
+                            return {"error": "Failed to parse structured output: invalid JSON", "raw_response": content}
+                        parsed = validate_result(partial)
+                else:
+                    parsed = self._parse_response(content)
+                    if "raw_response" not in parsed:
+                        parsed = validate_result(parsed)
+
+            # Resolve citation references and deduplicate the sources in the parsed output
+            if isinstance(parsed.get("claims"), list):
+                with span("citations"):
+                    self._resolve_citations_in_claims(parsed["claims"], api_citations)
+            if context is not None:
+                if context.get("prompt_budget") is not None:
+                    parsed["prompt_budget"] = context["prompt_budget"]
+                merge_known_claims(parsed, context.get("known_claims", []))
+            return parsed
+
+        return {"error": "Unexpected API response format", "raw_response": result}
+
+    def _resolve_citations_in_claims(self, claims: List[Dict[str, Any]], api_citations: List[str]) -> None:
+        """
+        Resolve citation references like [1], [2] to actual URLs in the claims,
+        canonicalizing and deduplicating each claim's sources.
+
+        Args:
+            claims: List of claim dictionaries to update
+            api_citations: List of actual citation URLs from the API
+        """
+        self.citation_resolver.resolve(claims, api_citations)
+
+    def _parse_response(self, content: str) -> Dict[str, Any]:
+        """
+        Parse the response content to extract JSON if possible.
+        Code fences and leading prose are skipped, and the completed claims of
+        truncated output are kept. If no JSON is found, fall back to extracting
+        citations from the text.
+
+        Args:
+            content: The response content from the API
+
+        Returns:
+            A dictionary with parsed JSON fields or with a fallback containing raw response and extracted citations.
+        """
+        parsed = parse_fact_check(content)
+        if parsed is not None:
+            return parsed
+
+        citations = re.findall(r"Sources?:\s*(.+)", content)
+        return {
+            "raw_response": content,
+            "extracted_citations": citations if citations else "No citations found"
+        }
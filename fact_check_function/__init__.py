@@ -1,326 +1,563 @@
-import azure.functions as func
+import asyncio
 import json
 import logging
 import os
-import re
-from typing import Dict, List, Optional, Any
+import threading
+from typing import AsyncIterator, Dict, Optional, Any
 
 import requests
-from pydantic import BaseModel, Field
-from newspaper import Article, ArticleException
+from azurefunctions.extensions.http.fastapi import Request, Response, StreamingResponse
 from requests.exceptions import RequestException
 
+from article_cache import ArticleCache
+from article_extractor import DEFAULT_EXTRACTOR, ExtractionError
+from async_fact_checker import AsyncFactChecker
+from citation_resolver import CitationResolver, compact_sources, load_redirects
+from claim_pipeline import DEFAULT_MAX_CLAIMS, check_article_claims
+from fact_check_core import FactChecker, RequestsTransport, build_session
+from job_queue import JobQueue, SQLiteJobStore
+from model_router import AUTO_MODEL, ModelRouter
+from prompt_budget import DEFAULT_TOKEN_BUDGETS, parse_token_budgets
+from request_scheduler import RequestScheduler
+from response_encoding import encode_response
+from result_cache import ResultCache
+from similarity_index import SimilarityIndex
+from single_flight import SingleFlight
+from telemetry import Timings, finish_timings, render_metrics, start_timings
+from verdict_store import VerdictStore
+
+
+# Process-wide HTTP session, kept alive across warm function invocations
+_http_session: Optional[requests.Session] = None
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the shared keep-alive session used for outbound API calls.
+
+    The pool size can be tuned with the PPLX_POOL_CONNECTIONS and
+    PPLX_POOL_MAXSIZE app settings.
+
+    Returns:
+        The process-wide requests session
+    """
+    global _http_session
+    if _http_session is None:
+        _http_session = build_session(
+            RequestsTransport.DEFAULT_POOL_CONNECTIONS, RequestsTransport.DEFAULT_POOL_MAXSIZE
+        )
+    return _http_session
 
-class Claim(BaseModel):
-    """Model for representing a single claim and its fact check."""
-    claim: str = Field(description="The specific claim extracted from the text")
-    rating: str = Field(description="Rating of the claim: TRUE, FALSE, MISLEADING, or UNVERIFIABLE")
-    explanation: str = Field(description="Detailed explanation with supporting evidence")
-    sources: List[str] = Field(description="List of sources used to verify the claim")
 
+# Process-wide result cache, shared by every request handled by this worker
+_result_cache: Optional[ResultCache] = None
 
-class FactCheckResult(BaseModel):
-    """Model for the complete fact check result."""
-    overall_rating: str = Field(description="Overall rating: MOSTLY_TRUE, MIXED, or MOSTLY_FALSE")
-    summary: str = Field(description="Brief summary of the overall findings")
-    claims: List[Claim] = Field(description="List of specific claims and their fact checks")
 
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Get the shared result cache, creating it on first use.
 
-class FactChecker:
-    """A class to interact with Perplexity Sonar API for fact checking."""
+    Configured with the FACT_CHECK_CACHE_SIZE, FACT_CHECK_CACHE_TTL and
+    FACT_CHECK_CACHE_DB app settings. Setting FACT_CHECK_CACHE_SIZE to 0
+    disables caching.
 
-    API_URL = "https://api.perplexity.ai/chat/completions"
-    DEFAULT_MODEL = "sonar-pro"
-    
-    # Models that support structured outputs (ensure your tier has access)
-    STRUCTURED_OUTPUT_MODELS = ["sonar", "sonar-pro", "sonar-reasoning", "sonar-reasoning-pro"]
-
-    def __init__(self, api_key: Optional[str] = None):
-        """
-        Initialize the FactChecker with API key and system prompt.
-
-        Args:
-            api_key: Perplexity API key. If None, will try to read from environment.
-        """
-        self.api_key = api_key or self._get_api_key()
-        if not self.api_key:
-            raise ValueError(
-                "API key not found. Please provide via environment variable PPLX_API_KEY."
+    Returns:
+        The process-wide ResultCache, or None if caching is disabled
+    """
+    global _result_cache
+    max_entries = int(os.environ.get("FACT_CHECK_CACHE_SIZE", str(ResultCache.DEFAULT_MAX_ENTRIES)))
+    if _result_cache is None and max_entries > 0:
+        _result_cache = ResultCache(
+            max_entries=max_entries,
+            ttl=float(os.environ.get("FACT_CHECK_CACHE_TTL", str(ResultCache.DEFAULT_TTL))),
+            db_path=os.environ.get("FACT_CHECK_CACHE_DB") or None,
+        )
+    return _result_cache
+
+
+# Process-wide rate limiter, so every invocation in this worker shares one token bucket
+_request_scheduler: Optional[RequestScheduler] = None
+
+
+def get_request_scheduler() -> RequestScheduler:
+    """
+    Get the shared request scheduler, creating it on first use.
+
+    Configured with the PPLX_RATE_LIMIT_RPM (0 disables rate limiting),
+    PPLX_RATE_LIMIT_BURST, PPLX_MAX_RETRIES and PPLX_REQUEST_DEADLINE app
+    settings. The rate limit applies per worker process.
+
+    Returns:
+        The process-wide RequestScheduler
+    """
+    global _request_scheduler
+    if _request_scheduler is None:
+        _request_scheduler = RequestScheduler(
+            rate_limit=float(os.environ.get("PPLX_RATE_LIMIT_RPM", str(RequestScheduler.DEFAULT_RATE_LIMIT))),
+            burst=float(os.environ.get("PPLX_RATE_LIMIT_BURST", str(RequestScheduler.DEFAULT_BURST))),
+            max_retries=int(os.environ.get("PPLX_MAX_RETRIES", str(RequestScheduler.DEFAULT_MAX_RETRIES))),
+            deadline=float(os.environ.get("PPLX_REQUEST_DEADLINE", str(RequestScheduler.DEFAULT_DEADLINE))),
+        )
+    return _request_scheduler
+
+
+# Process-wide deduplicator of concurrent identical requests
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """
+    Get the shared single-flight deduplicator, creating it on first use.
+
+    Enabled unless the FACT_CHECK_SINGLE_FLIGHT app setting is 0. Pointing
+    FACT_CHECK_LOCK_DIR at a directory shared by the worker processes of an
+    instance extends deduplication across them; waiting workers then read
+    the leader's result from the result cache, so FACT_CHECK_CACHE_DB should
+    be set as well.
+
+    Returns:
+        The process-wide SingleFlight, or None if it is disabled
+    """
+    global _single_flight
+    if _single_flight is None and os.environ.get("FACT_CHECK_SINGLE_FLIGHT", "1") != "0":
+        _single_flight = SingleFlight(lock_dir=os.environ.get("FACT_CHECK_LOCK_DIR") or None)
+    return _single_flight
+
+
+# Process-wide model router, keeping per-model latency statistics for hedging
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """
+    Get the shared model router, creating it on first use.
+
+    Configured with the FACT_CHECK_SHORT_MODEL, FACT_CHECK_LONG_MODEL,
+    FACT_CHECK_ROUTING_THRESHOLD, FACT_CHECK_HEDGE_MODEL (empty disables
+    hedging) and FACT_CHECK_HEDGE_PERCENTILE app settings.
+
+    Returns:
+        The process-wide ModelRouter
+    """
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter(
+            short_model=os.environ.get("FACT_CHECK_SHORT_MODEL", ModelRouter.DEFAULT_SHORT_MODEL),
+            long_model=os.environ.get("FACT_CHECK_LONG_MODEL", ModelRouter.DEFAULT_LONG_MODEL),
+            length_threshold=int(os.environ.get(
+                "FACT_CHECK_ROUTING_THRESHOLD", str(ModelRouter.DEFAULT_LENGTH_THRESHOLD)
+            )),
+            hedge_model=os.environ.get("FACT_CHECK_HEDGE_MODEL", ModelRouter.DEFAULT_SHORT_MODEL) or None,
+            hedge_percentile=float(os.environ.get(
+                "FACT_CHECK_HEDGE_PERCENTILE", str(ModelRouter.DEFAULT_HEDGE_PERCENTILE)
+            )),
+        )
+    return _model_router
+
+
+# Process-wide near-duplicate index, loaded once per worker
+_similarity_index: Optional[SimilarityIndex] = None
+
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    """
+    Get the shared near-duplicate index, loading it on first use.
+
+    Enabled by pointing the FACT_CHECK_SIMILARITY_INDEX app setting at a
+    writable file; FACT_CHECK_SIMILARITY_THRESHOLD tunes the match threshold.
+
+    Returns:
+        The process-wide SimilarityIndex, or None if it is not configured
+    """
+    global _similarity_index
+    path = os.environ.get("FACT_CHECK_SIMILARITY_INDEX")
+    if _similarity_index is None and path:
+        _similarity_index = SimilarityIndex(
+            path,
+            threshold=float(os.environ.get(
+                "FACT_CHECK_SIMILARITY_THRESHOLD", str(SimilarityIndex.DEFAULT_THRESHOLD)
+            )),
+        )
+    return _similarity_index
+
+
+# Process-wide per-claim verdict store
+_verdict_store: Optional[VerdictStore] = None
+
+
+def get_verdict_store() -> Optional[VerdictStore]:
+    """
+    Get the shared verdict store, opening it on first use.
+
+    Verdict reuse is opt-in: it is enabled by the FACT_CHECK_VERDICT_DB app
+    setting (a SQLite file shared across workers and restarts, or ":memory:"
+    for a per-process store). FACT_CHECK_VERDICT_TTL sets how long verdicts
+    are reused; 0 disables the store.
+
+    Returns:
+        The process-wide VerdictStore, or None if it is disabled
+    """
+    global _verdict_store
+    db_path = os.environ.get("FACT_CHECK_VERDICT_DB")
+    ttl = float(os.environ.get("FACT_CHECK_VERDICT_TTL", str(VerdictStore.DEFAULT_TTL)))
+    if _verdict_store is None and db_path and ttl > 0:
+        _verdict_store = VerdictStore(db_path, ttl=ttl)
+    return _verdict_store
+
+
+def _load_token_budgets() -> Dict[str, int]:
+    """
+    Parse the FACT_CHECK_TOKEN_BUDGETS app setting.
+
+    A malformed setting is a deployment problem rather than a bad request, so
+    it is logged as a configuration error and the default budgets are used.
+
+    Returns:
+        The prompt token budgets by model
+    """
+    spec = os.environ.get("FACT_CHECK_TOKEN_BUDGETS", "")
+    try:
+        return parse_token_budgets(spec)
+    except ValueError as e:
+        logging.error(f"Configuration error in FACT_CHECK_TOKEN_BUDGETS: {str(e)}; using the default budgets")
+        return dict(DEFAULT_TOKEN_BUDGETS)
+
+
+# Prompt token budgets, validated once when the worker process starts
+_token_budgets = _load_token_budgets()
+
+
+# Process-wide fact checker, built on first use and reused across warm invocations
+_fact_checker: Optional[FactChecker] = None
+_fact_checker_lock = threading.Lock()
+
+
+def get_fact_checker() -> FactChecker:
+    """
+    Get the shared FactChecker, creating it on first use.
+
+    The system prompt is reloaded when system_prompt.md's mtime changes.
+    Articles for "url" requests are extracted with the FACT_CHECK_EXTRACTOR
+    app setting ("fast" or "newspaper"); the HTML stack is only imported on
+    first use.
+
+    Returns:
+        The process-wide FactChecker instance
+    """
+    global _fact_checker
+    with _fact_checker_lock:
+        if _fact_checker is None:
+            redirects_file = os.environ.get("FACT_CHECK_REDIRECTS_FILE")
+            _fact_checker = FactChecker(
+                session=get_http_session(),
+                cache=get_result_cache(),
+                similarity_index=get_similarity_index(),
+                verdict_store=get_verdict_store(),
+                citation_resolver=CitationResolver(load_redirects(redirects_file) if redirects_file else None),
+                scheduler=get_request_scheduler(),
+                single_flight=get_single_flight(),
+                router=get_model_router(),
+                token_budgets=_token_budgets,
+                article_cache=get_article_cache(),
+                extractor=os.environ.get("FACT_CHECK_EXTRACTOR", DEFAULT_EXTRACTOR),
             )
-        
-        self.system_prompt = self._get_default_system_prompt()
+        else:
+            _fact_checker.reload_system_prompt_if_changed()
+        return _fact_checker
 
-    def _get_api_key(self) -> str:
-        """
-        Try to get API key from environment.
 
-        Returns:
-            The API key if found, empty string otherwise.
-        """
-        return os.environ.get("PPLX_API_KEY", "")
+# Process-wide async checker sharing one aiohttp pool across invocations
+_async_fact_checker: Optional[AsyncFactChecker] = None
 
-    def _get_default_system_prompt(self) -> str:
-        """
-        Get the default system prompt from file.
 
-        Returns:
-            The system prompt as a string
-        """
-        try:
-            # Try to read from system_prompt.md file
-            import os
-            script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            system_prompt_path = os.path.join(script_dir, "system_prompt.md")
-            
-            if os.path.exists(system_prompt_path):
-                with open(system_prompt_path, 'r', encoding='utf-8') as f:
-                    return f.read().strip()
-        except Exception as e:
-            logging.warning(f"Could not read system_prompt.md: {e}")
-        
-        # Fallback to hardcoded prompt with enhanced language instructions
-        return """⚠️ MANDATORY LANGUAGE RULE: YOU MUST RESPOND IN THE SAME LANGUAGE AS THE INPUT TEXT ⚠️
-
-You are a professional fact-checker with extensive research capabilities. Your task is to evaluate claims or articles for factual accuracy. Focus on identifying false, misleading, or unsubstantiated claims.
-
-## 🚨 CRITICAL LANGUAGE DETECTION STEPS 🚨
-
-STEP 1: READ THE INPUT TEXT CAREFULLY
-STEP 2: IDENTIFY THE LANGUAGE (English, Vietnamese, Spanish, etc.)
-STEP 3: WRITE YOUR ENTIRE RESPONSE IN THAT EXACT SAME LANGUAGE
-STEP 4: DOUBLE-CHECK that summary, explanations, and all text match the input language
-
-⚠️ EXAMPLES TO FOLLOW EXACTLY ⚠️
-
-**IF INPUT IS ENGLISH (like "The Earth is flat"):**
-- summary: "This claim is completely false according to scientific evidence..." (ENGLISH)
-- explanation: "The Earth is actually spherical as confirmed by..." (ENGLISH)
-- claim: "The Earth is flat" (keep original)
-
-**IF INPUT IS VIETNAMESE (like "Trái đất có hình phẳng"):**
-- summary: "Tuyên bố này hoàn toàn sai theo bằng chứng khoa học..." (VIETNAMESE)
-- explanation: "Trái đất thực tế có hình cầu được xác nhận bởi..." (VIETNAMESE)
-- claim: "Trái đất có hình phẳng" (keep original)
-
-⚠️ NEVER MIX LANGUAGES! The only English exceptions are:
-- Rating values: TRUE, FALSE, MISLEADING, UNVERIFIABLE  
-- Overall rating: MOSTLY_TRUE, MIXED, MOSTLY_FALSE
-- JSON field names: "summary", "claims", etc.
-
-## Source Count Requirements
-⚠️ IMPORTANT: Each claim MUST have at least 3 but no more than 10 distinct, high-quality sources.
-
-## Evaluation Process
-For each piece of content, you will:
-1. Identify specific claims that can be verified
-2. Research each claim thoroughly using the most reliable sources available
-3. Determine if each claim is:
-   - TRUE: Factually accurate and supported by credible evidence
-   - FALSE: Contradicted by credible evidence
-   - MISLEADING: Contains some truth but presents information in a way that could lead to incorrect conclusions
-   - UNVERIFIABLE: Cannot be conclusively verified with available information
-4. For claims rated as FALSE or MISLEADING, explain why and provide corrections
-
-## Rating Criteria
-- TRUE: Claim is supported by multiple credible sources with no significant contradicting evidence
-- FALSE: Claim is contradicted by clear evidence from credible sources
-- MISLEADING: Claim contains factual elements but is presented in a way that omits crucial context or leads to incorrect conclusions
-- UNVERIFIABLE: Claim cannot be conclusively verified or refuted with available evidence
-
-## Guidelines
-- Remain politically neutral and focus solely on factual accuracy
-- Do not use political leaning as a factor in your evaluation
-- Prioritize official data, peer-reviewed research, and reports from credible institutions
-- Cite specific, reliable sources for your determinations
-- Consider the context and intended meaning of statements
-- Distinguish between factual claims and opinions
-- Pay attention to dates, numbers, and specific details
-- Be precise and thorough in your explanations
-
-## Response Format
-Respond in JSON format with the following structure:
-```json
-{
-    "overall_rating": "MOSTLY_TRUE|MIXED|MOSTLY_FALSE",
-    "summary": "Brief summary of your overall findings (in same language as input)",
-    "claims": [
-        {
-            "claim": "The specific claim extracted from the text (in same language as input)",
-            "rating": "TRUE|FALSE|MISLEADING|UNVERIFIABLE",
-            "explanation": "Your explanation with supporting evidence (in same language as input)",
-            "sources": ["Source URL 1", "Source URL 2", "Source URL 3", ...]
-        }
-    ]
-}
-```
-
-## Criteria for Overall Rating
-- MOSTLY_TRUE: Most claims are true, with minor inaccuracies that don't affect the main message
-- MIXED: The content contains a roughly equal mix of true and false/misleading claims
-- MOSTLY_FALSE: Most claims are false or misleading"""
-
-    def _detect_language(self, text: str) -> str:
-        """
-        Simple language detection based on character patterns.
-        
-        Args:
-            text: The input text to analyze
-            
-        Returns:
-            The detected language name
-        """
-        text = text.lower().strip()
-        
-        # Vietnamese indicators
-        vietnamese_chars = set('áàạảãâấầậẩẫăắằặẳẵéèẹẻẽêếềệểễíìịỉĩóòọỏõôốồộổỗơớờợởỡúùụủũưứừựửữýỳỵỷỹđ')
-        vietnamese_words = {'là', 'có', 'được', 'của', 'và', 'trái', 'đất', 'hình', 'phẳng', 'với', 'trong', 'này', 'cho', 'một', 'không', 'sẽ', 'đã', 'tại', 'về', 'từ', 'như', 'khi', 'nếu', 'vì', 'để', 'hoặc', 'mà', 'thì', 'đó', 'họ', 'tôi', 'bạn', 'chúng', 'những'}
-        
-        # Check for Vietnamese characters
-        has_vietnamese_chars = any(char in vietnamese_chars for char in text)
-        
-        # Check for Vietnamese words
-        words = text.split()
-        vietnamese_word_count = sum(1 for word in words if word in vietnamese_words)
-        vietnamese_ratio = vietnamese_word_count / len(words) if words else 0
-        
-        # If significant Vietnamese indicators, classify as Vietnamese
-        if has_vietnamese_chars or vietnamese_ratio > 0.2:
-            return "Vietnamese"
-        
-        # Default to English
-        return "English"
-
-    def check_claim(self, text: str, model: str = DEFAULT_MODEL, use_structured_output: bool = False) -> Dict[str, Any]:
-        """
-        Check the factual accuracy of a claim or article.
-
-        Args:
-            text: The claim or article text to fact check
-            model: The Perplexity model to use
-            use_structured_output: Whether to use structured output API (if model supports it)
-
-        Returns:
-            The parsed response containing fact check results.
-        """
-        if not text or not text.strip():
-            return {"error": "Input text is empty. Cannot perform fact check."}
-        
-        # Detect language and create explicit instruction
-        detected_language = self._detect_language(text)
-        language_instruction = f"\n\n🚨 CRITICAL: The input text is in {detected_language}. You MUST respond entirely in {detected_language}. Do NOT use any other language in your response. Every word of your summary and explanation must be in {detected_language}."
-        
-        user_prompt = f"Fact check the following text and identify any false or misleading claims:\n\n{text}{language_instruction}"
-
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
-        data = {
-            "model": model,
-            "messages": [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        }
-
-        can_use_structured_output = model in self.STRUCTURED_OUTPUT_MODELS and use_structured_output
-        if can_use_structured_output:
-            data["response_format"] = {
-                "type": "json_schema",
-                "json_schema": {"schema": FactCheckResult.model_json_schema()},
-            }
+def get_async_fact_checker() -> AsyncFactChecker:
+    """
+    Get the shared AsyncFactChecker wrapping the process-wide FactChecker.
 
-        try:
-            response = requests.post(self.API_URL, headers=headers, json=data)
-            response.raise_for_status()
-            result = response.json()
-            
-            # Get citations from API response for resolving references
-            api_citations = result.get("citations", [])
-            
-            if "choices" in result and result["choices"] and "message" in result["choices"][0]:
-                content = result["choices"][0]["message"]["content"]
-                
-                if can_use_structured_output:
-                    try:
-                        parsed = json.loads(content)
-                        # Resolve citation references in the structured output
-                        if api_citations and "claims" in parsed:
-                            self._resolve_citations_in_claims(parsed["claims"], api_citations)
-                        return parsed
-                    except json.JSONDecodeError as e:
-                        return {"error": f"Failed to parse structured output: {str(e)}", "raw_response": content}
-                else:
-                    parsed = self._parse_response(content)
-                    # Resolve citation references in the parsed output
-                    if api_citations and "claims" in parsed:
-                        self._resolve_citations_in_claims(parsed["claims"], api_citations)
-                    return parsed
-            
-            return {"error": "Unexpected API response format", "raw_response": result}
-            
-        except requests.exceptions.RequestException as e:
-            return {"error": f"API request failed: {str(e)}"}
-        except json.JSONDecodeError:
-            return {"error": "Failed to parse API response as JSON"}
-        except Exception as e:
-            return {"error": f"Unexpected error: {str(e)}"}
+    The number of concurrent API calls is bounded by the
+    FACT_CHECK_MAX_CONCURRENCY app setting.
 
-    def _resolve_citations_in_claims(self, claims: List[Dict[str, Any]], api_citations: List[str]) -> None:
-        """
-        Resolve citation references like [1], [2] to actual URLs in the claims.
-        
-        Args:
-            claims: List of claim dictionaries to update
-            api_citations: List of actual citation URLs from the API
-        """
-        for claim in claims:
-            if "sources" in claim and claim["sources"]:
-                updated_sources = []
-                for source in claim["sources"]:
-                    m = re.match(r"\[(\d+)\]", source.strip())
-                    if m:
-                        idx = int(m.group(1)) - 1
-                        if 0 <= idx < len(api_citations):
-                            updated_sources.append(api_citations[idx])
-                        else:
-                            updated_sources.append(source)
-                    else:
-                        updated_sources.append(source)
-                claim["sources"] = updated_sources
-
-    def _parse_response(self, content: str) -> Dict[str, Any]:
-        """
-        Parse the response content to extract JSON if possible.
-        If not, fall back to extracting citations from the text.
-
-        Args:
-            content: The response content from the API
-
-        Returns:
-            A dictionary with parsed JSON fields or with a fallback containing raw response and extracted citations.
-        """
-        try:
-            if "```json" in content:
-                json_content = content.split("```json")[1].split("```")[0].strip()
-                return json.loads(json_content)
-            elif "```" in content:
-                json_content = content.split("```")[1].split("```")[0].strip()
-                return json.loads(json_content)
-            else:
-                return json.loads(content)
-        except (json.JSONDecodeError, IndexError):
-            citations = re.findall(r"Sources?:\s*(.+)", content)
-            return {
-                "raw_response": content,
-                "extracted_citations": citations if citations else "No citations found"
-            }
+    Returns:
+        The process-wide AsyncFactChecker instance
+    """
+    global _async_fact_checker
+    checker = get_fact_checker()
+    if _async_fact_checker is None:
+        _async_fact_checker = AsyncFactChecker(
+            checker,
+            max_concurrency=int(os.environ.get(
+                "FACT_CHECK_MAX_CONCURRENCY", str(AsyncFactChecker.DEFAULT_MAX_CONCURRENCY)
+            )),
+        )
+    return _async_fact_checker
+
+
+# Process-wide cache of extracted article text, keyed by canonical URL
+_article_cache: Optional[ArticleCache] = None
+
+
+def get_article_cache() -> Optional[ArticleCache]:
+    """
+    Get the shared article text cache, creating it on first use.
+
+    Configured with the FACT_CHECK_URL_CACHE_TTL, FACT_CHECK_URL_CACHE_DB and
+    FACT_CHECK_URL_CACHE_MAX_MB app settings. Setting FACT_CHECK_URL_CACHE_TTL
+    to 0 disables the cache.
+
+    Returns:
+        The process-wide ArticleCache, or None if it is disabled
+    """
+    global _article_cache
+    ttl = float(os.environ.get("FACT_CHECK_URL_CACHE_TTL", str(ArticleCache.DEFAULT_TTL)))
+    if _article_cache is None and ttl > 0:
+        _article_cache = ArticleCache(
+            ttl=ttl,
+            db_path=os.environ.get("FACT_CHECK_URL_CACHE_DB") or None,
+            max_bytes=int(float(os.environ.get(
+                "FACT_CHECK_URL_CACHE_MAX_MB", str(ArticleCache.DEFAULT_MAX_BYTES / (1024 * 1024))
+            )) * 1024 * 1024),
+        )
+    return _article_cache
 
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
-    """Main Azure Function entry point."""
+async def _get_request_text(req_body: Dict[str, Any]) -> str:
+    """
+    Get the text to fact check from a request body, downloading it for "url" requests.
+
+    Args:
+        req_body: The parsed request body
+
+    Returns:
+        The text to fact check
+
+    Raises:
+        ValueError: If the body has no usable text or the article cannot be fetched or parsed
+        RuntimeError: On unexpected errors while processing a URL
+    """
+    text = req_body.get('text')
+    url = req_body.get('url')
+    if not text and not url:
+        raise ValueError("Either 'text' or 'url' parameter is required")
+
+    if url:
+        try:
+            logging.info(f"Fetching content from URL: {url}")
+            # Blocking fetch and parse run in a worker thread to keep the event loop free;
+            # the article cache skips both for popular URLs while they are fresh
+            text = await asyncio.to_thread(get_fact_checker().fetch_article, url)
+        except RequestException as e:
+            raise ValueError(f"Error fetching URL: {str(e)}") from e
+        except ExtractionError as e:
+            raise ValueError(f"Error parsing article content: {str(e)}") from e
+        except Exception as e:
+            raise RuntimeError(f"Unexpected error processing URL: {str(e)}") from e
+        if not text:
+            raise ValueError(f"Could not extract text from URL: {url}")
+
+    if not text or not text.strip():
+        raise ValueError("No text found to fact check")
+    return text
+
+
+async def _check_text(fact_checker: AsyncFactChecker, text: str, req_body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fact check a text as a whole or claim by claim, as the request body asks.
+
+    Args:
+        fact_checker: The process-wide async checker
+        text: The text to fact check
+        req_body: The parsed request body with the check parameters
+
+    Returns:
+        The fact check results, with a shared source table if the request asked for one
+    """
+    results = await _run_check(fact_checker, text, req_body)
+    if req_body.get('source_table', False):
+        results = compact_sources(results)
+    return results
+
+
+async def _run_check(fact_checker: AsyncFactChecker, text: str, req_body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the fact check of a text as the request body asks.
+
+    Args:
+        fact_checker: The process-wide async checker
+        text: The text to fact check
+        req_body: The parsed request body with the check parameters
+
+    Returns:
+        The fact check results
+    """
+    model = req_body.get('model', FactChecker.DEFAULT_MODEL)
+    structured_output = req_body.get('structured_output', False)
+    cache_only = req_body.get('cache_only', False)
+    if req_body.get('pipeline', False) and not cache_only:
+        return await check_article_claims(
+            fact_checker,
+            text,
+            model=model,
+            use_structured_output=structured_output,
+            max_claims=int(req_body.get('max_claims', DEFAULT_MAX_CLAIMS)),
+            extraction=req_body.get('claim_extraction', 'local')
+        )
+    latency_budget = req_body.get('latency_budget')
+    return await fact_checker.check_claim(
+        text=text,
+        model=model,
+        use_structured_output=structured_output,
+        cache_only=cache_only,
+        latency_budget=float(latency_budget) if latency_budget is not None else None
+    )
+
+
+def format_sse_event(event: str, payload: Any) -> str:
+    """
+    Encode a fact check event as a Server-Sent Events message.
+
+    Args:
+        event: The event name (overall_rating, summary, claim, citations, result, error, timings)
+        payload: The JSON-serializable event data
+
+    Returns:
+        The SSE-formatted message
+    """
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+async def _stream_check(
+    fact_checker: AsyncFactChecker, text: str, req_body: Dict[str, Any], timings: Timings
+) -> AsyncIterator[str]:
+    """
+    Fact check a text, yielding Server-Sent Events as parts of the result arrive.
+
+    Runs while the response is being sent, after the handler has returned, so
+    failures are reported as an "error" event rather than an error status.
+
+    Args:
+        fact_checker: The process-wide async checker
+        text: The text to fact check
+        req_body: The parsed request body with the check parameters
+        timings: The request's timings, resumed in the streaming task
+
+    Yields:
+        SSE messages: overall_rating, summary, one claim per claim, citations and
+        result (or a single error), then timings if the request asked for them
+    """
+    start_timings(timings)
+    try:
+        latency_budget = req_body.get('latency_budget')
+        async for event, payload in fact_checker.stream_claim(
+            text,
+            model=req_body.get('model', FactChecker.DEFAULT_MODEL),
+            use_structured_output=req_body.get('structured_output', False),
+            latency_budget=float(latency_budget) if latency_budget is not None else None
+        ):
+            if event == "result" and req_body.get('source_table', False):
+                payload = compact_sources(payload)
+            yield format_sse_event(event, payload)
+    except ValueError as e:
+        yield format_sse_event("error", {"error": str(e)})
+        return
+    except Exception as e:
+        logging.error(f"Unexpected error while streaming: {str(e)}")
+        yield format_sse_event("error", {"error": f"Internal server error: {str(e)}"})
+        return
+
+    timings_block = finish_timings(timings)
+    logging.info(f"Fact check stream finished: {json.dumps(timings_block)}")
+    if req_body.get('timings', False):
+        yield format_sse_event("timings", timings_block)
+
+
+async def _run_job(req_body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process a request submitted to the job queue.
+
+    Args:
+        req_body: The parsed request body
+
+    Returns:
+        The fact check results, with timings if the request asked for them
+    """
+    timings = start_timings()
+    text = await _get_request_text(req_body)
+    results = await _check_text(get_async_fact_checker(), text, req_body)
+    timings_block = finish_timings(timings)
+    logging.info(f"Fact check job finished: {json.dumps(timings_block)}")
+    if req_body.get('timings', False):
+        results = {**results, "timings": timings_block}
+    return results
+
+
+# Longest long-poll a GET for a job may ask for, in seconds
+MAX_JOB_WAIT = 30.0
+
+# Process-wide background job queue and its worker pool
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> Optional[JobQueue]:
+    """
+    Get the shared job queue, creating it on first use.
+
+    Configured with the FACT_CHECK_JOB_DB, FACT_CHECK_JOB_WORKERS and
+    FACT_CHECK_JOB_TTL app settings. Background jobs need FACT_CHECK_JOB_DB:
+    an in-memory store would only be visible to the worker process that
+    accepted a job, and would lose it when that process is recycled. The file
+    must be on the instance's local disk, since SQLite locking is unreliable on
+    Azure Files (SMB) mounts, so the app must run on a single instance.
+
+    Returns:
+        The process-wide JobQueue, or None if FACT_CHECK_JOB_DB is not set
+    """
+    global _job_queue
+    if _job_queue is None:
+        db_path = os.environ.get("FACT_CHECK_JOB_DB")
+        if not db_path:
+            return None
+        _job_queue = JobQueue(
+            _run_job,
+            store=SQLiteJobStore(db_path),
+            workers=int(os.environ.get("FACT_CHECK_JOB_WORKERS", str(JobQueue.DEFAULT_WORKERS))),
+            ttl=float(os.environ.get("FACT_CHECK_JOB_TTL", str(JobQueue.DEFAULT_TTL))),
+        )
+    return _job_queue
+
+
+# Returned for job requests when no durable job store is configured
+JOBS_DISABLED_ERROR = (
+    "Background jobs are disabled: set FACT_CHECK_JOB_DB to a job database on the local disk "
+    "of a single-instance app"
+)
+
+
+def _json_response(
+    req: Request, payload: Any, status_code: int, headers: Dict[str, str]
+) -> Response:
+    """
+    Build a JSON response, minified and compressed as the request allows.
+
+    Args:
+        req: The request, whose Accept-Encoding header picks the compression
+            and whose "pretty" query parameter asks for indented output
+        payload: The JSON-serializable payload
+        status_code: The HTTP status code
+        headers: Headers to send along (CORS and content type)
+
+    Returns:
+        The HTTP response
+    """
+    body, encoding_headers = encode_response(
+        payload,
+        req.headers.get("Accept-Encoding"),
+        pretty=req.query_params.get("pretty", "").lower() in ("1", "true"),
+    )
+    return Response(body, status_code=status_code, headers={**headers, **encoding_headers})
+
+
+async def main(req: Request) -> Response:
+    """Main Azure Function entry point, registered in function_app.py."""
     logging.info('Python HTTP trigger function processed a request.')
 
     # CORS headers
@@ -328,7 +565,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
         "Access-Control-Allow-Headers": "Content-Type, Authorization",
-        "Content-Type": "application/json"
+        "Content-Type": "application/json; charset=utf-8"
     }
 
     try:
@@ -337,146 +574,149 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         
         # Handle preflight OPTIONS request
         if method == "OPTIONS":
-            return func.HttpResponse(
+            return Response(
                 "",
                 status_code=200,
                 headers=cors_headers
             )
         
-        if method == "GET":
-            return func.HttpResponse(
-                json.dumps({
-                    "message": "Fact Checker API",
-                    "description": "Send a POST request with text, file content, or URL to fact-check",
-                    "usage": {
-                        "text": "Send JSON with 'text' field",
-                        "url": "Send JSON with 'url' field",
-                        "parameters": {
-                            "model": "Perplexity model to use (default: sonar-pro)",
-                            "structured_output": "Boolean to enable structured output (default: false)"
-                        }
-                    }
-                }),
+        if method == "GET" and req.query_params.get("format") == "prometheus":
+            return Response(
+                render_metrics(),
                 status_code=200,
-                headers=cors_headers
+                headers={**cors_headers, "Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
             )
+
+        if method == "GET" and req.query_params.get("job_id"):
+            job_id = req.query_params.get("job_id")
+            try:
+                wait = min(float(req.query_params.get("wait") or 0), MAX_JOB_WAIT)
+            except ValueError:
+                return _json_response(req, {"error": "'wait' must be a number of seconds"}, 400, cors_headers)
+            job_queue = get_job_queue()
+            if job_queue is None:
+                return _json_response(req, {"error": JOBS_DISABLED_ERROR}, 501, cors_headers)
+            job = await job_queue.wait(job_id, wait) if wait > 0 else await job_queue.get(job_id)
+            if job is None:
+                return _json_response(req, {"error": f"Unknown job: {job_id}"}, 404, cors_headers)
+            return _json_response(req, job, 200, cors_headers)
+
+        if method == "GET":
+            result_cache = get_result_cache()
+            article_cache = get_article_cache()
+            single_flight = get_single_flight()
+            model_router = get_model_router()
+            verdict_store = get_verdict_store()
+            job_stats = await _job_queue.stats() if _job_queue else None
+            return _json_response(req, {
+                "message": "Fact Checker API",
+                "description": "Send a POST request with text, file content, or URL to fact-check",
+                "usage": {
+                    "text": "Send JSON with 'text' field",
+                    "url": "Send JSON with 'url' field",
+                    "parameters": {
+                        "model": f"Perplexity model to use, or '{AUTO_MODEL}' to route by length and latency budget (default: {FactChecker.DEFAULT_MODEL})",
+                        "latency_budget": "Seconds the caller is willing to wait; steers routing and hedging of 'auto' requests (optional)",
+                        "structured_output": "Boolean to enable structured output (default: false)",
+                        "cache_only": "Boolean to only return a cached result, never calling the API (default: false)",
+                        "stream": "Boolean to receive the result as Server-Sent Events, each claim as soon as it is checked (default: false; also enabled by 'Accept: text/event-stream')",
+                        "pipeline": "Boolean to split the text into claims and check them in parallel (default: false)",
+                        "max_claims": f"Maximum number of claims checked in pipeline mode (default: {DEFAULT_MAX_CLAIMS})",
+                        "claim_extraction": "'local' or 'model' claim extraction in pipeline mode (default: local)",
+                        "timings": "Boolean to add per-stage timings and token usage to the response (default: false)",
+                        "async": "Boolean to queue the check as a background job and return its job_id at once; requires FACT_CHECK_JOB_DB (default: false)",
+                        "source_table": "Boolean to list sources once in a shared 'sources' table that claims reference by index (default: false)"
+                    },
+                    "jobs": "GET with 'job_id' (and optionally 'wait' seconds to long-poll) to get a job's status and result",
+                    "lookup_claims": "Send JSON with a 'lookup_claims' list (and optionally 'model' and 'structured_output') to get the stored verdict (or null) of each claim; requires FACT_CHECK_VERDICT_DB"
+                },
+                "cache": result_cache.stats() if result_cache else None,
+                "url_cache": article_cache.stats() if article_cache else None,
+                "single_flight": single_flight.stats() if single_flight else None,
+                "verdicts": verdict_store.stats() if verdict_store else None,
+                "routing": model_router.stats(),
+                "prompt": _fact_checker.prompt_variants.stats() if _fact_checker else None,
+                "jobs": job_stats
+            }, 200, cors_headers)
         
         elif method == "POST":
+            timings = start_timings()
             try:
                 # Parse request body
-                req_body = req.get_json()
+                req_body = await req.json()
                 if not req_body:
-                    return func.HttpResponse(
-                        json.dumps({"error": "Request body must be valid JSON"}),
-                        status_code=400,
-                        headers=cors_headers
-                    )
-                
-                # Extract parameters
-                text = req_body.get('text')
-                url = req_body.get('url')
-                model = req_body.get('model', 'sonar-pro')
-                structured_output = req_body.get('structured_output', False)
+                    return _json_response(req, {"error": "Request body must be valid JSON"}, 400, cors_headers)
                 
-                if not text and not url:
-                    return func.HttpResponse(
-                        json.dumps({"error": "Either 'text' or 'url' parameter is required"}),
-                        status_code=400,
-                        headers=cors_headers
+                # Bulk lookup of known claim verdicts, without fact checking anything
+                if 'lookup_claims' in req_body:
+                    claims = req_body['lookup_claims']
+                    if not isinstance(claims, list) or not all(isinstance(c, str) for c in claims):
+                        raise ValueError("'lookup_claims' must be a list of strings")
+                    found = await asyncio.to_thread(
+                        get_fact_checker().lookup_verdicts,
+                        claims,
+                        req_body.get('model', FactChecker.DEFAULT_MODEL),
+                        req_body.get('structured_output', False)
                     )
-                
-                # Initialize fact checker
-                fact_checker = FactChecker()
-                
+                    verdicts = {claim: found.get(claim) for claim in claims}
+                    return _json_response(req, {"verdicts": verdicts}, 200, cors_headers)
+
+                # Queue long checks as background jobs and answer at once
+                if req_body.get('async', False) or "respond-async" in req.headers.get("Prefer", ""):
+                    if not req_body.get('text') and not req_body.get('url'):
+                        raise ValueError("Either 'text' or 'url' parameter is required")
+                    job_queue = get_job_queue()
+                    if job_queue is None:
+                        return _json_response(req, {"error": JOBS_DISABLED_ERROR}, 501, cors_headers)
+                    job = await job_queue.submit(req_body)
+                    status_url = f"{str(req.url).split('?')[0]}?job_id={job['job_id']}"
+                    return _json_response(req, {**job, "status_url": status_url}, 202, cors_headers)
+
+                include_timings = req_body.get('timings', False)
+                stream = req_body.get('stream', False) or "text/event-stream" in req.headers.get("Accept", "")
+
+                # Reuse the process-wide fact checker
+                fact_checker = get_async_fact_checker()
+
                 # Get text content
-                if url:
-                    try:
-                        logging.info(f"Fetching content from URL: {url}")
-                        response = requests.get(url, timeout=15)
-                        response.raise_for_status()
-                        
-                        article = Article(url=url)
-                        article.download(input_html=response.text)
-                        article.parse()
-                        text = article.text
-                        
-                        if not text:
-                            return func.HttpResponse(
-                                json.dumps({"error": f"Could not extract text from URL: {url}"}),
-                                status_code=400,
-                                headers=cors_headers
-                            )
-                    except RequestException as e:
-                        return func.HttpResponse(
-                            json.dumps({"error": f"Error fetching URL: {str(e)}"}),
-                            status_code=400,
-                            headers=cors_headers
-                        )
-                    except ArticleException as e:
-                        return func.HttpResponse(
-                            json.dumps({"error": f"Error parsing article content: {str(e)}"}),
-                            status_code=400,
-                            headers=cors_headers
-                        )
-                    except Exception as e:
-                        return func.HttpResponse(
-                            json.dumps({"error": f"Unexpected error processing URL: {str(e)}"}),
-                            status_code=500,
-                            headers=cors_headers
-                        )
-                
-                if not text or not text.strip():
-                    return func.HttpResponse(
-                        json.dumps({"error": "No text found to fact check"}),
-                        status_code=400,
-                        headers=cors_headers
-                    )
-                
+                text = await _get_request_text(req_body)
+
                 # Perform fact check
                 logging.info("Starting fact check process")
-                results = fact_checker.check_claim(
-                    text=text,
-                    model=model,
-                    use_structured_output=structured_output
-                )
-                
+                if stream and not req_body.get('cache_only', False) and not req_body.get('pipeline', False):
+                    return StreamingResponse(
+                        _stream_check(fact_checker, text, req_body, timings),
+                        status_code=200,
+                        headers={
+                            **cors_headers,
+                            "Content-Type": "text/event-stream; charset=utf-8",
+                            "Cache-Control": "no-cache"
+                        }
+                    )
+                results = await _check_text(fact_checker, text, req_body)
+
+                timings_block = finish_timings(timings)
+                logging.info(f"Fact check finished: {json.dumps(timings_block)}")
+                if include_timings:
+                    results = {**results, "timings": timings_block}
+
                 # Return results
-                return func.HttpResponse(
-                    json.dumps(results, indent=2),
-                    status_code=200,
-                    headers=cors_headers
-                )
+                return _json_response(req, results, 200, cors_headers)
                 
             except json.JSONDecodeError:
-                return func.HttpResponse(
-                    json.dumps({"error": "Invalid JSON in request body"}),
-                    status_code=400,
-                    headers=cors_headers
-                )
+                return _json_response(req, {"error": "Invalid JSON in request body"}, 400, cors_headers)
             except ValueError as e:
-                return func.HttpResponse(
-                    json.dumps({"error": str(e)}),
-                    status_code=400,
-                    headers=cors_headers
-                )
+                return _json_response(req, {"error": str(e)}, 400, cors_headers)
             except Exception as e:
                 logging.error(f"Unexpected error: {str(e)}")
-                return func.HttpResponse(
-                    json.dumps({"error": f"Internal server error: {str(e)}"}),
-                    status_code=500,
-                    headers=cors_headers
-                )
+                return _json_response(req, {"error": f"Internal server error: {str(e)}"}, 500, cors_headers)
         
         else:
-            return func.HttpResponse(
-                json.dumps({"error": f"Method {method} not allowed"}),
-                status_code=405,
-                headers=cors_headers
-            )
+            return _json_response(req, {"error": f"Method {method} not allowed"}, 405, cors_headers)
     
     except Exception as e:
         logging.error(f"Critical error: {str(e)}")
-        return func.HttpResponse(
+        return Response(
             json.dumps({"error": "Internal server error"}),
             status_code=500,
             headers={
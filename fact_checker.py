@@ -6,232 +6,60 @@ Structured output is disabled by default.
 """
 
 import argparse
+import asyncio
 import json
 import os
-import re
 import sys
-from pathlib import Path
-from typing import Dict, List, Optional, Any
+import time
+from typing import Dict, Any
 import pdb  # For debugging
 
-import requests
-from pydantic import BaseModel, Field
-from newspaper import Article, ArticleException
 from requests.exceptions import RequestException
 
+from article_cache import ArticleCache
+from article_extractor import DEFAULT_EXTRACTOR, EXTRACTORS, ExtractionError
+from citation_resolver import CitationResolver, compact_sources, load_redirects
+from claim_extraction import DEFAULT_MAX_CLAIMS
+from fact_check_core import FactChecker
+from model_router import AUTO_MODEL, ModelRouter
+from prompt_budget import parse_token_budgets
+from request_scheduler import RequestScheduler
+from result_cache import ResultCache
+from similarity_index import SimilarityIndex
+from single_flight import SingleFlight
+from telemetry import finish_timings, start_timings
+from verdict_store import VerdictStore
+
+
+def display_claim(index: int, claim: Dict[str, Any]):
+    """
+    Display a single claim and its fact check in a human-readable format.
 
-class Claim(BaseModel):
-    """Model for representing a single claim and its fact check."""
-    claim: str = Field(description="The specific claim extracted from the text")
-    rating: str = Field(description="Rating of the claim: TRUE, FALSE, MISLEADING, or UNVERIFIABLE")
-    explanation: str = Field(description="Detailed explanation with supporting evidence")
-    sources: List[str] = Field(description="List of sources used to verify the claim")
-
-
-class FactCheckResult(BaseModel):
-    """Model for the complete fact check result."""
-    overall_rating: str = Field(description="Overall rating: MOSTLY_TRUE, MIXED, or MOSTLY_FALSE")
-    summary: str = Field(description="Brief summary of the overall findings")
-    claims: List[Claim] = Field(description="List of specific claims and their fact checks")
-
-
-class FactChecker:
-    """A class to interact with Perplexity Sonar API for fact checking."""
-
-    API_URL = "https://api.perplexity.ai/chat/completions"
-    DEFAULT_MODEL = "sonar-pro"
-    PROMPT_FILE = "system_prompt.md"
-    
-    # Models that support structured outputs (ensure your tier has access)
-    STRUCTURED_OUTPUT_MODELS = ["sonar", "sonar-pro", "sonar-reasoning", "sonar-reasoning-pro"]
-
-    def __init__(self, api_key: Optional[str] = None, prompt_file: Optional[str] = None):
-        """
-        Initialize the FactChecker with API key and system prompt.
-
-        Args:
-            api_key: Perplexity API key. If None, will try to read from file or environment.
-            prompt_file: Path to file containing the system prompt. If None, uses default.
-        """
-        self.api_key = api_key or self._get_api_key()
-        if not self.api_key:
-            raise ValueError(
-                "API key not found. Please provide via argument, environment variable, or key file."
-            )
-        
-        self.system_prompt = self._load_system_prompt(prompt_file or self.PROMPT_FILE)
-
-    def _get_api_key(self) -> str:
-        """
-        Try to get API key from environment or from a file in the current directory.
-
-        Returns:
-            The API key if found, empty string otherwise.
-        """
-        api_key = os.environ.get("PPLX_API_KEY", "")
-        if api_key:
-            return api_key
-
-        for key_file in ["pplx_api_key", ".pplx_api_key", "PPLX_API_KEY", ".PPLX_API_KEY"]:
-            key_path = Path(key_file)
-            if key_path.exists():
-                try:
-                    return key_path.read_text().strip()
-                except Exception:
-                    pass
-
-        return ""
-    
-    def _load_system_prompt(self, prompt_file: str) -> str:
-        """
-        Load the system prompt from a file.
-
-        Args:
-            prompt_file: Path to the file containing the system prompt
-
-        Returns:
-            The system prompt as a string
-        """
-        try:
-            with open(prompt_file, 'r', encoding='utf-8') as f:
-                return f.read().strip()
-        except FileNotFoundError:
-            print(f"Warning: Prompt file not found at {prompt_file}", file=sys.stderr)
-        except Exception as e:
-            print(f"Warning: Could not load system prompt from {prompt_file}: {e}", file=sys.stderr)
-            print("Using default system prompt.", file=sys.stderr)
-            return (
-                "You are a professional fact-checker with extensive research capabilities. "
-                "Your task is to evaluate claims or articles for factual accuracy. "
-                "Focus on identifying false, misleading, or unsubstantiated claims. "
-                "CRITICAL REQUIREMENT: You MUST detect the language of the input text and respond ENTIRELY in that SAME language. "
-                "EVERY SINGLE PART of your response must be in the same language as the input: the summary, claim explanations, "
-                "all descriptive text, and source descriptions. The ONLY exceptions are rating values (TRUE, FALSE, etc.) and "
-                "JSON field names which should remain in English. Do NOT mix languages. Do NOT use English phrases in non-English responses."
-            )
-
-    def check_claim(self, text: str, model: str = DEFAULT_MODEL, use_structured_output: bool = False) -> Dict[str, Any]:
-        """
-        Check the factual accuracy of a claim or article.
-
-        Args:
-            text: The claim or article text to fact check
-            model: The Perplexity model to use
-            use_structured_output: Whether to use structured output API (if model supports it)
-
-        Returns:
-            The parsed response containing fact check results.
-        """
-        if not text or not text.strip():
-            return {"error": "Input text is empty. Cannot perform fact check."}
-        user_prompt = f"Fact check the following text and identify any false or misleading claims:\n\n{text}"
-
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
-        data = {
-            "model": model,
-            "messages": [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        }
-
-        can_use_structured_output = model in self.STRUCTURED_OUTPUT_MODELS and use_structured_output
-        if can_use_structured_output:
-            data["response_format"] = {
-                "type": "json_schema",
-                "json_schema": {"schema": FactCheckResult.model_json_schema()},
-            }
-
-        try:
-            response = requests.post(self.API_URL, headers=headers, json=data)
-            response.raise_for_status()
-            result = response.json()
-            
-            # Get citations from API response for resolving references
-            api_citations = result.get("citations", [])
-            
-            if "choices" in result and result["choices"] and "message" in result["choices"][0]:
-                content = result["choices"][0]["message"]["content"]
-                
-                if can_use_structured_output:
-                    try:
-                        parsed = json.loads(content)
-                        # Resolve citation references in the structured output
-                        if api_citations and "claims" in parsed:
-                            self._resolve_citations_in_claims(parsed["claims"], api_citations)
-                        return parsed
-                    except json.JSONDecodeError as e:
-                        return {"error": f"Failed to parse structured output: {str(e)}", "raw_response": content}
-                else:
-                    parsed = self._parse_response(content)
-                    # Resolve citation references in the parsed output
-                    if api_citations and "claims" in parsed:
-                        self._resolve_citations_in_claims(parsed["claims"], api_citations)
-                    return parsed
-            
-            return {"error": "Unexpected API response format", "raw_response": result}
-            
-        except requests.exceptions.RequestException as e:
-            return {"error": f"API request failed: {str(e)}"}
-        except json.JSONDecodeError:
-            return {"error": "Failed to parse API response as JSON"}
-        except Exception as e:
-            return {"error": f"Unexpected error: {str(e)}"}
-
-    def _resolve_citations_in_claims(self, claims: List[Dict[str, Any]], api_citations: List[str]) -> None:
-        """
-        Resolve citation references like [1], [2] to actual URLs in the claims.
-        
-        Args:
-            claims: List of claim dictionaries to update
-            api_citations: List of actual citation URLs from the API
-        """
-        for claim in claims:
-            if "sources" in claim and claim["sources"]:
-                updated_sources = []
-                for source in claim["sources"]:
-                    m = re.match(r"\[(\d+)\]", source.strip())
-                    if m:
-                        idx = int(m.group(1)) - 1
-                        if 0 <= idx < len(api_citations):
-                            updated_sources.append(api_citations[idx])
-                        else:
-                            updated_sources.append(source)
-                    else:
-                        updated_sources.append(source)
-                claim["sources"] = updated_sources
-
-    def _parse_response(self, content: str) -> Dict[str, Any]:
-        """
-        Parse the response content to extract JSON if possible.
-        If not, fall back to extracting citations from the text.
-
-        Args:
-            content: The response content from the API
-
-        Returns:
-            A dictionary with parsed JSON fields or with a fallback containing raw response and extracted citations.
-        """
-        try:
-            if "```json" in content:
-                json_content = content.split("```json")[1].split("```")[0].strip()
-                return json.loads(json_content)
-            elif "```" in content:
-                json_content = content.split("```")[1].split("```")[0].strip()
-                return json.loads(json_content)
-            else:
-                return json.loads(content)
-        except (json.JSONDecodeError, IndexError):
-            citations = re.findall(r"Sources?:\s*(.+)", content)
-            return {
-                "raw_response": content,
-                "extracted_citations": citations if citations else "No citations found"
-            }
+    Args:
+        index: The 1-based position of the claim
+        claim: The claim dictionary
+    """
+    rating = claim.get("rating", "UNKNOWN")
+    if rating == "TRUE":
+        rating_emoji = "✅"
+    elif rating == "FALSE":
+        rating_emoji = "❌"
+    elif rating == "MISLEADING":
+        rating_emoji = "⚠️"
+    elif rating == "UNVERIFIABLE":
+        rating_emoji = "❓"
+    else:
+        rating_emoji = "🔄"
+
+    reused = f" (verified {time.strftime('%Y-%m-%d', time.localtime(claim['checked_at']))})" if claim.get("reused") else ""
+    print(f"\nClaim {index}: {rating_emoji} {rating}{reused}")
+    print(f"  Statement: \"{claim.get('claim', 'No claim text')}\"")
+    print(f"  Explanation: {claim.get('explanation', 'No explanation provided')}")
+
+    if "sources" in claim and claim["sources"]:
+        print(f"  Sources:")
+        for source in claim["sources"]:
+            print(f"    - {source}")
 
 
 def display_results(results: Dict[str, Any], format_json: bool = False):
@@ -264,26 +92,7 @@ def display_results(results: Dict[str, Any], format_json: bool = False):
         if "claims" in results:
             print("🔍 CLAIMS ANALYSIS:")
             for i, claim in enumerate(results["claims"], 1):
-                rating = claim.get("rating", "UNKNOWN")
-                if rating == "TRUE":
-                    rating_emoji = "✅"
-                elif rating == "FALSE":
-                    rating_emoji = "❌"
-                elif rating == "MISLEADING":
-                    rating_emoji = "⚠️"
-                elif rating == "UNVERIFIABLE":
-                    rating_emoji = "❓"
-                else:
-                    rating_emoji = "🔄"
-                
-                print(f"\nClaim {i}: {rating_emoji} {rating}")
-                print(f"  Statement: \"{claim.get('claim', 'No claim text')}\"")
-                print(f"  Explanation: {claim.get('explanation', 'No explanation provided')}")
-                
-                if "sources" in claim and claim["sources"]:
-                    print(f"  Sources:")
-                    for source in claim["sources"]:
-                        print(f"    - {source}")
+                display_claim(i, claim)
     
     elif "raw_response" in results:
         print("Response:")
@@ -296,6 +105,114 @@ def display_results(results: Dict[str, Any], format_json: bool = False):
             else:
                 print(f"  {results['extracted_citations']}")
 
+    budget = results.get("prompt_budget")
+    if budget:
+        dropped = budget["dropped"]
+        print(
+            f"\n✂️  Input trimmed to {budget['final_tokens']} of {budget['original_tokens']} estimated tokens "
+            f"(budget {budget['token_budget']}): dropped {dropped['boilerplate_paragraphs']} boilerplate and "
+            f"{dropped['duplicate_paragraphs']} duplicate paragraphs and {dropped['sentences']} sentences"
+        )
+
+
+async def _run_batch(
+    fact_checker: FactChecker,
+    args: argparse.Namespace,
+) -> Dict[str, int]:
+    """
+    Run the batch pipeline for the parsed command line arguments.
+
+    Args:
+        fact_checker: The configured fact checker, which also fetches URL records
+        args: Parsed command line arguments
+
+    Returns:
+        Counters for processed, skipped and failed records
+    """
+    # The async modules load aiohttp, which a plain check does not need
+    from async_fact_checker import AsyncFactChecker
+    from batch import run_batch
+
+    async with AsyncFactChecker(fact_checker, max_concurrency=args.workers) as checker:
+        return await run_batch(
+            checker,
+            args.batch,
+            output_path=args.output,
+            workers=args.workers,
+            ordered=args.ordered,
+            resume=args.resume,
+            retry_errors=args.retry_errors,
+            model=args.model,
+            use_structured_output=args.structured_output,
+            cache_only=args.cache_only,
+            extract_url=fact_checker.fetch_article,
+        )
+
+
+async def _stream_results(fact_checker: FactChecker, text: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Fact check a text with a streaming API call, printing each part as it arrives.
+
+    With --json every event is printed as one JSON line; otherwise the summary
+    and claims are displayed in the human-readable format.
+
+    Args:
+        fact_checker: The configured fact checker
+        text: The text to fact check
+        args: Parsed command line arguments
+
+    Returns:
+        The final fact check results
+    """
+    from async_fact_checker import AsyncFactChecker
+
+    results: Dict[str, Any] = {}
+    claim_count = 0
+    async with AsyncFactChecker(fact_checker) as checker:
+        async for event, payload in checker.stream_claim(
+            text, args.model, args.structured_output, latency_budget=args.latency_budget
+        ):
+            if event in ("result", "error"):
+                results = payload
+            if args.json:
+                if event != "result":
+                    print(json.dumps({"event": event, "data": payload}, ensure_ascii=False), flush=True)
+            elif event == "overall_rating":
+                print(f"\nOVERALL RATING: {payload}", flush=True)
+            elif event == "summary":
+                print(f"\n📝 SUMMARY:\n{payload}\n\n🔍 CLAIMS ANALYSIS:", flush=True)
+            elif event == "claim":
+                claim_count += 1
+                display_claim(claim_count, payload)
+                sys.stdout.flush()
+    return results
+
+
+async def _run_pipeline(fact_checker: FactChecker, text: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Check a text claim by claim in parallel for the parsed command line arguments.
+
+    Args:
+        fact_checker: The configured fact checker
+        text: The text to fact check
+        args: Parsed command line arguments
+
+    Returns:
+        The merged fact check results
+    """
+    from async_fact_checker import AsyncFactChecker
+    from claim_pipeline import check_article_claims
+
+    async with AsyncFactChecker(fact_checker) as checker:
+        return await check_article_claims(
+            checker,
+            text,
+            model=args.model,
+            use_structured_output=args.structured_output,
+            max_claims=args.max_claims,
+            extraction=args.claim_extraction,
+        )
+
 
 def main():
     """Main entry point for the fact checker CLI."""
@@ -307,13 +224,27 @@ def main():
     input_group.add_argument("-t", "--text", type=str, help="Text to fact check")
     input_group.add_argument("-f", "--file", type=str, help="Path to file containing text to fact check")
     input_group.add_argument("-u", "--url", type=str, help="URL of the article to fact check")
+    input_group.add_argument(
+        "-b", "--batch", type=str, help="Path to a JSON lines file of records to fact check concurrently"
+    )
     
     parser.add_argument(
         "-m",
         "--model", 
         type=str, 
         default=FactChecker.DEFAULT_MODEL,
-        help=f"Perplexity model to use (default: {FactChecker.DEFAULT_MODEL})"
+        help=f"Perplexity model to use, or '{AUTO_MODEL}' to pick one by text length and latency budget "
+             f"(default: {FactChecker.DEFAULT_MODEL})"
+    )
+    parser.add_argument(
+        "--latency-budget",
+        type=float,
+        help="Seconds you are willing to wait; with --model auto, avoids models that are usually slower"
+    )
+    parser.add_argument(
+        "--no-hedge",
+        action="store_true",
+        help="Do not hedge slow calls with a second call to a cheaper model (batch and pipeline modes)"
     )
     parser.add_argument(
         "-k", 
@@ -325,7 +256,7 @@ def main():
         "-p", 
         "--prompt-file", 
         type=str, 
-        help=f"Path to file containing the system prompt (default: {FactChecker.PROMPT_FILE})"
+        help="Path to file containing the system prompt (default: system_prompt.md next to this script)"
     )
     parser.add_argument(
         "-j", 
@@ -333,11 +264,191 @@ def main():
         action="store_true", 
         help="Output results as JSON"
     )
+    parser.add_argument(
+        "--source-table",
+        action="store_true",
+        help="With --json, list sources once in a shared \"sources\" table that claims reference by index"
+    )
+    parser.add_argument(
+        "--redirects-file",
+        type=str,
+        default=os.environ.get("FACT_CHECK_REDIRECTS_FILE"),
+        help="JSON file mapping short links to their targets, used to canonicalize sources offline "
+             "(default: $FACT_CHECK_REDIRECTS_FILE)"
+    )
     parser.add_argument(
         "--structured-output", 
         action="store_true", 
         help="Enable structured output format (default is non-structured output)"
     )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=FactChecker.DEFAULT_CONNECT_TIMEOUT,
+        help=f"Seconds to wait when connecting to the API (default: {FactChecker.DEFAULT_CONNECT_TIMEOUT})"
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=FactChecker.DEFAULT_READ_TIMEOUT,
+        help=f"Seconds to wait for the API response (default: {FactChecker.DEFAULT_READ_TIMEOUT})"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=float(os.environ.get("PPLX_RATE_LIMIT_RPM", RequestScheduler.DEFAULT_RATE_LIMIT)),
+        help="API requests per minute allowed by your Perplexity tier, 0 for no limit "
+             f"(default: $PPLX_RATE_LIMIT_RPM or {RequestScheduler.DEFAULT_RATE_LIMIT})"
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=RequestScheduler.DEFAULT_MAX_RETRIES,
+        help=f"Retries for rate-limited, failed or timed out API calls (default: {RequestScheduler.DEFAULT_MAX_RETRIES})"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=RequestScheduler.DEFAULT_DEADLINE,
+        help=f"Seconds an API call may take including retries (default: {RequestScheduler.DEFAULT_DEADLINE})"
+    )
+    parser.add_argument(
+        "--lock-dir",
+        type=str,
+        default=os.environ.get("FACT_CHECK_LOCK_DIR"),
+        help="Directory for lock files so concurrent processes share identical API calls "
+             "through the --cache-db cache (default: $FACT_CHECK_LOCK_DIR)"
+    )
+    parser.add_argument(
+        "--cache-db",
+        type=str,
+        default=os.environ.get("FACT_CHECK_CACHE_DB"),
+        help="Path to a SQLite file used to cache results between runs (default: $FACT_CHECK_CACHE_DB)"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=ResultCache.DEFAULT_TTL,
+        help=f"Seconds a cached result stays valid (default: {ResultCache.DEFAULT_TTL})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the API, bypassing the result cache and verdict store"
+    )
+    parser.add_argument(
+        "--url-cache-db",
+        type=str,
+        default=os.environ.get("FACT_CHECK_URL_CACHE_DB"),
+        help="Path to a SQLite file caching extracted article text between runs (default: $FACT_CHECK_URL_CACHE_DB)"
+    )
+    parser.add_argument(
+        "--url-cache-ttl",
+        type=float,
+        default=ArticleCache.DEFAULT_TTL,
+        help=f"Seconds a fetched article is reused before revalidating it (default: {ArticleCache.DEFAULT_TTL})"
+    )
+    parser.add_argument(
+        "--extractor",
+        choices=EXTRACTORS,
+        default=os.environ.get("FACT_CHECK_EXTRACTOR", DEFAULT_EXTRACTOR),
+        help="Article text extractor for --url: fast lxml scorer or newspaper3k (default: $FACT_CHECK_EXTRACTOR or fast)"
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=parse_token_budgets,
+        default=os.environ.get("FACT_CHECK_TOKEN_BUDGETS", ""),
+        help="Prompt token budget: one number for all models or model=tokens pairs such as "
+             "sonar=8000,sonar-pro=16000; longer texts are trimmed to their most claim-dense sentences, "
+             "0 disables trimming (default: $FACT_CHECK_TOKEN_BUDGETS or per-model defaults)"
+    )
+    parser.add_argument(
+        "--similarity-index",
+        type=str,
+        default=os.environ.get("FACT_CHECK_SIMILARITY_INDEX"),
+        help="Path to a near-duplicate index file; reuses verdicts for near-identical texts (default: $FACT_CHECK_SIMILARITY_INDEX)"
+    )
+    parser.add_argument(
+        "--similarity-threshold",
+        type=float,
+        default=SimilarityIndex.DEFAULT_THRESHOLD,
+        help=f"Minimum similarity (0-1) for reusing a near-duplicate verdict (default: {SimilarityIndex.DEFAULT_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--verdict-db",
+        type=str,
+        default=os.environ.get("FACT_CHECK_VERDICT_DB"),
+        help="Path to a SQLite file (or :memory:) of per-claim verdicts reused across texts and runs; "
+             "claim verdicts are only reused when set (default: $FACT_CHECK_VERDICT_DB)"
+    )
+    parser.add_argument(
+        "--verdict-ttl",
+        type=float,
+        default=VerdictStore.DEFAULT_TTL,
+        help=f"Seconds a claim verdict is reused (default: {VerdictStore.DEFAULT_TTL})"
+    )
+    parser.add_argument(
+        "--cache-only",
+        action="store_true",
+        help="Only return a cached result; never call the API"
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Report time spent per stage and API token usage (added to --json output, otherwise printed to stderr)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the API response and print each claim as soon as it is complete"
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Split the text into claims and check them in parallel, merging the results"
+    )
+    parser.add_argument(
+        "--max-claims",
+        type=int,
+        default=DEFAULT_MAX_CLAIMS,
+        help=f"Maximum number of claims checked in pipeline mode (default: {DEFAULT_MAX_CLAIMS})"
+    )
+    parser.add_argument(
+        "--claim-extraction",
+        choices=["local", "model"],
+        default="local",
+        help="Extract claims with a local heuristic or one cheap API call (default: local)"
+    )
+
+    batch_group = parser.add_argument_group("batch mode")
+    batch_group.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Path of the JSON lines file batch results are written to (default: stdout)"
+    )
+    batch_group.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=8,
+        help="Number of records checked concurrently in batch mode (default: 8)"
+    )
+    batch_group.add_argument(
+        "--ordered",
+        action="store_true",
+        help="Write batch results in input order instead of completion order"
+    )
+    batch_group.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip records already present in --output and append to it"
+    )
+    batch_group.add_argument(
+        "--retry-errors",
+        action="store_true",
+        help="With --resume, check records whose previous result was an error again"
+    )
     
     args = parser.parse_args()
     
@@ -345,8 +456,44 @@ def main():
     # pdb.set_trace()  # Uncomment this line to start debugging
     
     try:
-        fact_checker = FactChecker(api_key=args.api_key, prompt_file=args.prompt_file)
+        fact_checker = FactChecker(
+            api_key=args.api_key,
+            prompt_file=args.prompt_file,
+            connect_timeout=args.connect_timeout,
+            read_timeout=args.read_timeout,
+            cache=None if args.no_cache else ResultCache(ttl=args.cache_ttl, db_path=args.cache_db),
+            similarity_index=(
+                SimilarityIndex(args.similarity_index, threshold=args.similarity_threshold)
+                if args.similarity_index and not args.no_cache else None
+            ),
+            scheduler=RequestScheduler(
+                rate_limit=args.rate_limit, max_retries=args.max_retries, deadline=args.deadline
+            ),
+            single_flight=SingleFlight(lock_dir=args.lock_dir),
+            router=ModelRouter(hedge_model=None if args.no_hedge else ModelRouter.DEFAULT_SHORT_MODEL),
+            token_budgets=args.token_budget,
+            verdict_store=(
+                VerdictStore(args.verdict_db, ttl=args.verdict_ttl) if args.verdict_db and not args.no_cache else None
+            ),
+            citation_resolver=CitationResolver(load_redirects(args.redirects_file) if args.redirects_file else None),
+            article_cache=ArticleCache(ttl=args.url_cache_ttl, db_path=args.url_cache_db),
+            extractor=args.extractor,
+        )
+        timings = start_timings()
         
+        if args.batch:
+            if args.resume and not args.output:
+                print("Error: --resume requires --output.", file=sys.stderr)
+                return 1
+            print(f"Batch fact checking {args.batch} with {args.workers} workers...", file=sys.stderr)
+            stats = asyncio.run(_run_batch(fact_checker, args))
+            print(
+                f"Batch complete: {stats['processed']} processed, {stats['skipped']} skipped, "
+                f"{stats['errors']} errors",
+                file=sys.stderr
+            )
+            return 0
+
         if args.file:
             try:
                 with open(args.file, "r", encoding="utf-8") as f:
@@ -357,20 +504,14 @@ def main():
         elif args.url:
             try:
                 print(f"Fetching content from URL: {args.url}", file=sys.stderr)
-                response = requests.get(args.url, timeout=15) # Add a timeout
-                response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-                
-                article = Article(url=args.url)
-                article.download(input_html=response.text)
-                article.parse()
-                text = article.text
+                text = fact_checker.fetch_article(args.url)
                 if not text:
                     print(f"Error: Could not extract text from URL: {args.url}", file=sys.stderr)
                     return 1
             except RequestException as e:
                 print(f"Error fetching URL: {e}", file=sys.stderr)
                 return 1
-            except ArticleException as e:
+            except ExtractionError as e:
                  print(f"Error parsing article content: {e}", file=sys.stderr)
                  return 1
             except Exception as e: # Catch other potential errors during fetch/parse
@@ -384,11 +525,36 @@ def main():
              return 1
 
         print("Fact checking in progress...", file=sys.stderr)
-        results = fact_checker.check_claim(
-            text, 
-            model=args.model, 
-            use_structured_output=args.structured_output
-        )
+        if args.stream and not args.cache_only:
+            results = asyncio.run(_stream_results(fact_checker, text, args))
+            if "error" in results:
+                display_results(results)
+            if args.timings:
+                # As in the Azure Function, streaming mode sends timings as a final event
+                timings_block = finish_timings(timings)
+                if args.json:
+                    print(json.dumps({"event": "timings", "data": timings_block}, ensure_ascii=False), flush=True)
+                else:
+                    print(f"Timings: {json.dumps(timings_block)}", file=sys.stderr)
+            return 0
+        elif args.pipeline and not args.cache_only:
+            results = asyncio.run(_run_pipeline(fact_checker, text, args))
+        else:
+            results = fact_checker.check_claim(
+                text, 
+                model=args.model, 
+                use_structured_output=args.structured_output,
+                cache_only=args.cache_only,
+                latency_budget=args.latency_budget
+            )
+        if args.timings:
+            timings_block = finish_timings(timings)
+            if args.json:
+                results = {**results, "timings": timings_block}
+            else:
+                print(f"Timings: {json.dumps(timings_block)}", file=sys.stderr)
+        if args.json and args.source_table:
+            results = compact_sources(results)
         display_results(results, format_json=args.json)
         
     except Exception as e:
@@ -0,0 +1,21 @@
+"""
+Azure Functions entry point (Python v2 programming model).
+
+The HTTP trigger uses the FastAPI request and response types of the HTTP
+streams extension, so Server-Sent Events are sent to the client as they are
+produced instead of being buffered by the Functions host. The app needs the
+PYTHON_ENABLE_INIT_INDEXING=1 app setting for the extension to load.
+"""
+
+import azure.functions as func
+from azurefunctions.extensions.http.fastapi import Request, Response
+
+from fact_check_function import main
+
+app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
+
+
+@app.route(route="fact_check_function", methods=[func.HttpMethod.GET, func.HttpMethod.POST])
+async def fact_check_function(req: Request) -> Response:
+    """Fact check text or a URL; see fact_check_function.main."""
+    return await main(req)
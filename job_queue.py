@@ -0,0 +1,507 @@
+"""
+Background job queue for long fact checks.
+
+A client submits a request and immediately gets a job ID back; a pool of
+worker tasks on the event loop processes the queue, and the client polls (or
+long-polls) for the result. Jobs and results live in a JobStore, so a client
+that disconnects can fetch its result later. The bundled SQLiteJobStore
+keeps jobs in memory or in a SQLite file; with a file shared by several
+worker processes, each process also picks up jobs submitted to the others,
+and jobs left running by a crashed process are retried once they go stale
+(and failed once they are out of attempts). The file must be on a local disk:
+SQLite relies on file locks that network file systems such as SMB shares do
+not implement reliably, so processes on different machines cannot share it.
+Other backends (a database, a storage account table) can be plugged in by
+implementing JobStore.
+"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobStore(ABC):
+    """Storage backend of the job queue."""
+
+    @abstractmethod
+    def add(self, job_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a new queued job.
+
+        Args:
+            job_id: The job's unique ID
+            request: The request to process
+
+        Returns:
+            The job as returned by get
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look a job up.
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            The job (job_id, status, request, result, error, attempts and
+            created_at, started_at, finished_at timestamps), or None if unknown
+        """
+
+    @abstractmethod
+    def claim(self, job_id: str, stale_after: float, max_attempts: int) -> Optional[Dict[str, Any]]:
+        """
+        Atomically mark a job as running, so only one worker processes it.
+
+        Args:
+            job_id: The job ID
+            stale_after: Seconds after which a running job is considered abandoned
+            max_attempts: Attempts after which a job is no longer claimed
+
+        Returns:
+            The claimed job, or None if it is not queued (or stale) or out of attempts
+        """
+
+    @abstractmethod
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        """
+        Record the outcome of a job.
+
+        Args:
+            job_id: The job ID
+            result: The result of a successful job
+            error: The error message of a failed job
+        """
+
+    @abstractmethod
+    def pending(self, stale_after: float, max_attempts: int) -> List[str]:
+        """
+        List jobs waiting for a worker: queued ones and stale running ones.
+
+        Args:
+            stale_after: Seconds after which a running job is considered abandoned
+            max_attempts: Attempts after which a job is no longer retried
+
+        Returns:
+            The job IDs, oldest first
+        """
+
+    @abstractmethod
+    def fail_exhausted(self, stale_after: float, max_attempts: int, error: str) -> int:
+        """
+        Mark stale running jobs that are out of attempts as failed.
+
+        Args:
+            stale_after: Seconds after which a running job is considered abandoned
+            max_attempts: Attempts after which a job is no longer retried
+            error: The error message recorded for the failed jobs
+
+        Returns:
+            The number of failed jobs
+        """
+
+    @abstractmethod
+    def purge(self, older_than: float) -> int:
+        """
+        Delete finished jobs.
+
+        Args:
+            older_than: Timestamp before which finished jobs are deleted
+
+        Returns:
+            The number of deleted jobs
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """
+        Count jobs by status.
+
+        Returns:
+            A dictionary of counts
+        """
+
+
+class SQLiteJobStore(JobStore):
+    """Job store in a SQLite database, in memory by default."""
+
+    def __init__(self, db_path: str = ":memory:"):
+        """
+        Open the store.
+
+        Args:
+            db_path: Path to the SQLite file, or ":memory:" for a per-process store
+        """
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "request TEXT NOT NULL, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            self._db.commit()
+
+    _COLUMNS = "job_id, status, request, result, error, attempts, created_at, started_at, finished_at"
+
+    def _row_to_job(self, row: tuple) -> Dict[str, Any]:
+        job_id, status, request, result, error, attempts, created_at, started_at, finished_at = row
+        return {
+            "job_id": job_id,
+            "status": status,
+            "request": json.loads(request),
+            "result": json.loads(result) if result is not None else None,
+            "error": error,
+            "attempts": attempts,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+        }
+
+    def add(self, job_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (job_id, status, request, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(request), time.time()),
+            )
+            self._db.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def claim(self, job_id: str, stale_after: float, max_attempts: int) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            claimed = self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 "
+                "WHERE job_id = ? AND attempts < ? AND (status = ? OR (status = ? AND started_at < ?))",
+                (RUNNING, now, job_id, max_attempts, QUEUED, RUNNING, now - stale_after),
+            ).rowcount
+            self._db.commit()
+        return self.get(job_id) if claimed else None
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                (
+                    FAILED if error is not None else DONE,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                ),
+            )
+            self._db.commit()
+
+    def pending(self, stale_after: float, max_attempts: int) -> List[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT job_id FROM jobs WHERE attempts < ? AND (status = ? OR (status = ? AND started_at < ?)) "
+                "ORDER BY created_at",
+                (max_attempts, QUEUED, RUNNING, time.time() - stale_after),
+            ).fetchall()
+        return [job_id for (job_id,) in rows]
+
+    def fail_exhausted(self, stale_after: float, max_attempts: int, error: str) -> int:
+        now = time.time()
+        with self._lock:
+            failed = self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND attempts >= ? AND started_at < ?",
+                (FAILED, error, now, RUNNING, max_attempts, now - stale_after),
+            ).rowcount
+            self._db.commit()
+        return failed
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            deleted = self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, older_than)
+            ).rowcount
+            self._db.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+
+class JobQueue:
+    """Processes submitted jobs with a fixed number of worker tasks."""
+
+    DEFAULT_WORKERS = 4
+    DEFAULT_TTL = 86400.0  # seconds finished jobs are kept
+    DEFAULT_STALE_AFTER = 900.0  # seconds after which a running job is retried
+    MAX_ATTEMPTS = 3
+    SCAN_INTERVAL = 5.0  # seconds between scans of the store for jobs of other processes
+    FINISH_ATTEMPTS = 3  # tries to record a job's outcome while the store is busy
+
+    def __init__(
+        self,
+        handler: Handler,
+        store: Optional[JobStore] = None,
+        workers: int = DEFAULT_WORKERS,
+        ttl: float = DEFAULT_TTL,
+        stale_after: float = DEFAULT_STALE_AFTER,
+    ):
+        """
+        Initialize the queue. Workers start with the first submission or lookup.
+
+        Args:
+            handler: Coroutine function processing a job's request into its result.
+                Exceptions mark the job as failed with the exception's message.
+            store: Where jobs and results are kept. If None, an in-memory SQLiteJobStore.
+            workers: Number of jobs processed concurrently
+            ttl: Seconds finished jobs are kept before they are purged
+            stale_after: Seconds after which a job still running is assumed
+                abandoned by a crashed process and retried
+        """
+        self.handler = handler
+        self.store = store or SQLiteJobStore()
+        self.workers = workers
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: set = set()
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._running: set = set()
+        self._tasks: List[asyncio.Task] = []
+
+    def _ensure_started(self) -> None:
+        """Start the worker and scanner tasks on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._queued = set()
+        self._finished = {}
+        self._running = set()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(loop.create_task(self._scan()))
+
+    def _enqueue(self, job_id: str) -> None:
+        if job_id not in self._queued:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _enqueue_pending(self) -> None:
+        # Jobs abandoned on their last attempt would otherwise stay running forever
+        await asyncio.to_thread(
+            self.store.fail_exhausted,
+            self.stale_after,
+            self.MAX_ATTEMPTS,
+            f"Job abandoned after {self.MAX_ATTEMPTS} attempts",
+        )
+        for job_id in await asyncio.to_thread(self.store.pending, self.stale_after, self.MAX_ATTEMPTS):
+            self._enqueue(job_id)
+
+    def _release(self, job_id: str) -> None:
+        """Drop a job's finished event, waking anyone still waiting on it."""
+        event = self._finished.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _release_finished(self) -> None:
+        """Drop the events of jobs finished by other processes, which never set them."""
+        for job_id in list(self._finished):
+            if job_id in self._queued or job_id in self._running:
+                continue
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None or job["status"] in (DONE, FAILED):
+                self._release(job_id)
+
+    async def submit(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a request for processing.
+
+        Args:
+            request: The request, passed to the handler as is
+
+        Returns:
+            The job's public view (see view)
+        """
+        self._ensure_started()
+        job = await asyncio.to_thread(self.store.add, uuid.uuid4().hex, request)
+        self._finished[job["job_id"]] = asyncio.Event()
+        self._enqueue(job["job_id"])
+        return self.view(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the public view of a job.
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            The job's view, or None if the job is unknown or purged
+        """
+        # A process that only answers polls still works through jobs left in the store
+        self._ensure_started()
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job["status"] in (DONE, FAILED):
+            self._release(job_id)
+        return self.view(job) if job is not None else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait until a job is finished or the timeout expires.
+
+        Args:
+            job_id: The job ID
+            timeout: Longest time to wait in seconds
+
+        Returns:
+            The job's view, or None if the job is unknown
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in (DONE, FAILED):
+                return job
+            if remaining <= 0:
+                if job_id not in self._queued and job_id not in self._running:
+                    # Not going to finish in this process, so nothing will set the event
+                    self._release(job_id)
+                return job
+            event = self._finished.get(job_id) if self._loop is asyncio.get_running_loop() else None
+            try:
+                if event is not None:
+                    await asyncio.wait_for(event.wait(), remaining)
+                else:
+                    # Processed by another process: poll the store
+                    await asyncio.sleep(min(1.0, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def view(job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the client-facing representation of a job.
+
+        Args:
+            job: The job as stored
+
+        Returns:
+            The job ID, status and timestamps, plus the result or error once finished
+        """
+        view = {key: job[key] for key in ("job_id", "status", "created_at", "started_at", "finished_at")}
+        if job["status"] == DONE:
+            view["result"] = job["result"]
+        elif job["status"] == FAILED:
+            view["error"] = job["error"]
+        return view
+
+    async def _worker(self) -> None:
+        """Process queued jobs one at a time."""
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                job = await asyncio.to_thread(self.store.claim, job_id, self.stale_after, self.MAX_ATTEMPTS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Still queued in the store, so the next scan enqueues it again
+                logging.warning(f"Could not claim job {job_id}, retrying on the next scan: {e}")
+                continue
+            if job is None:
+                continue  # taken by another process, or finished meanwhile
+            self._running.add(job_id)
+            try:
+                try:
+                    outcome = {"result": await self.handler(job["request"])}
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    outcome = {"error": str(e) or type(e).__name__}
+                await self._finish(job_id, **outcome)
+            finally:
+                self._running.discard(job_id)
+            self._release(job_id)
+
+    async def _finish(
+        self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None
+    ) -> None:
+        """
+        Record a job's outcome, retrying while the store is busy.
+
+        If the outcome cannot be recorded, the job stays running in the store
+        and is retried once it goes stale.
+        """
+        for attempt in range(1, self.FINISH_ATTEMPTS + 1):
+            try:
+                await asyncio.to_thread(self.store.finish, job_id, result=result, error=error)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.FINISH_ATTEMPTS:
+                    logging.error(
+                        f"Could not record the outcome of job {job_id}, "
+                        f"it is retried after {self.stale_after:.0f}s: {e}"
+                    )
+                    return
+                await asyncio.sleep(attempt)
+
+    async def _scan(self) -> None:
+        """Periodically pick up jobs of other processes and purge expired ones."""
+        while True:
+            # The first scan runs right away, picking up jobs left by a previous loop or process
+            try:
+                await self._enqueue_pending()
+                await self._release_finished()
+                await asyncio.to_thread(self.store.purge, time.time() - self.ttl)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The store may be busy; retry on the next scan
+                logging.warning(f"Job store scan failed: {e}")
+            await asyncio.sleep(self.SCAN_INTERVAL)
+
+    async def stats(self) -> Dict[str, Any]:
+        """
+        Get job counts by status and the worker pool size for monitoring.
+
+        Returns:
+            A dictionary of counters
+        """
+        return {**await asyncio.to_thread(self.store.stats), "workers": self.workers}
+
+    async def close(self) -> None:
+        """Stop the workers; unfinished jobs stay in the store."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
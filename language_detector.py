@@ -0,0 +1,273 @@
+"""
+Fast language detection for choosing the response language.
+
+LanguageDetector looks only at a bounded prefix of the text, so its cost does
+not grow with article length. Texts in a script used by one language (Han,
+Kana, Hangul, Cyrillic, Arabic, Thai, ...) are identified by their script.
+Latin-script texts using letters only Vietnamese has are Vietnamese; other
+Latin-script texts are scored against character trigram profiles of the
+languages we serve, built once from short seed texts when the detector is
+created. A text of a few sentences that fits none of them well (German or
+Portuguese, say), or a text using letters its script's language does not have
+(Ukrainian in Cyrillic), is reported as undetermined, so callers can fall
+back to letting the model detect the language. Short texts such as single
+claims have too few trigrams for that test and get the best scoring language. Further languages can be added with
+add_language (a seed text) or add_script (a Unicode range). Results are
+cached by a hash of the sample.
+"""
+
+import hashlib
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+
+DEFAULT_LANGUAGE = "English"
+DEFAULT_SAMPLE_CHARS = 1000
+DEFAULT_CACHE_SIZE = 4096
+
+# Seed texts the trigram profiles are built from: news and fact check prose
+SEED_TEXTS = {
+    "English": (
+        "The government said on Monday that the new policy would reduce the number of people without "
+        "health insurance. According to the report, unemployment fell to its lowest level in twenty years, "
+        "but critics argue that the figures do not include workers who have stopped looking for a job. "
+        "Scientists have found no evidence that the vaccine causes the disease. The president claimed that "
+        "crime has doubled since last year, which is not supported by official statistics. It is true that "
+        "the city was founded in the eighteenth century and that its population has grown every decade. "
+        "This claim is misleading because it leaves out important context about the study and its results. "
+        "A viral post shared thousands of times on social media says the company's products contain dangerous "
+        "chemicals, but experts say there is no proof."
+    ),
+    "Vietnamese": (
+        "Chính phủ cho biết vào thứ hai rằng chính sách mới sẽ giảm số người không có bảo hiểm y tế. "
+        "Theo báo cáo, tỷ lệ thất nghiệp đã giảm xuống mức thấp nhất trong hai mươi năm, nhưng những người "
+        "chỉ trích cho rằng các số liệu này không bao gồm những người đã ngừng tìm việc. Các nhà khoa học "
+        "không tìm thấy bằng chứng nào cho thấy vắc xin gây ra bệnh này. Tổng thống tuyên bố rằng tội phạm "
+        "đã tăng gấp đôi kể từ năm ngoái, điều này không được thống kê chính thức ủng hộ. Đúng là thành phố "
+        "được thành lập vào thế kỷ mười tám và dân số của nó đã tăng lên qua mỗi thập kỷ. Tuyên bố này gây "
+        "hiểu lầm vì nó bỏ qua bối cảnh quan trọng về nghiên cứu và kết quả của nó. Trái đất có hình cầu."
+    ),
+    "Spanish": (
+        "El gobierno dijo el lunes que la nueva política reduciría el número de personas sin seguro médico. "
+        "Según el informe, el desempleo cayó a su nivel más bajo en veinte años, pero los críticos sostienen "
+        "que las cifras no incluyen a los trabajadores que han dejado de buscar empleo. Los científicos no "
+        "han encontrado pruebas de que la vacuna cause la enfermedad. El presidente afirmó que la delincuencia "
+        "se ha duplicado desde el año pasado, lo cual no está respaldado por las estadísticas oficiales. Es "
+        "cierto que la ciudad fue fundada en el siglo dieciocho y que su población ha crecido cada década. "
+        "Esta afirmación es engañosa porque omite un contexto importante sobre el estudio y sus resultados."
+    ),
+    "French": (
+        "Le gouvernement a déclaré lundi que la nouvelle politique réduirait le nombre de personnes sans "
+        "assurance maladie. Selon le rapport, le chômage est tombé à son niveau le plus bas depuis vingt ans, "
+        "mais les critiques affirment que les chiffres n'incluent pas les travailleurs qui ont cessé de "
+        "chercher un emploi. Les scientifiques n'ont trouvé aucune preuve que le vaccin provoque la maladie. "
+        "Le président a affirmé que la criminalité a doublé depuis l'année dernière, ce qui n'est pas confirmé "
+        "par les statistiques officielles. Il est vrai que la ville a été fondée au dix-huitième siècle et que "
+        "sa population a augmenté chaque décennie. Cette affirmation est trompeuse car elle omet un contexte "
+        "important sur l'étude et ses résultats."
+    ),
+}
+
+# Scripts that identify a language on their own: (first code point, last code point) -> language
+SCRIPT_LANGUAGES = {
+    (0x3040, 0x30FF): "Japanese",  # Hiragana and Katakana, checked before Han
+    (0xAC00, 0xD7AF): "Korean",
+    (0x4E00, 0x9FFF): "Chinese",
+    (0x0400, 0x04FF): "Russian",
+    (0x0600, 0x06FF): "Arabic",
+    (0x0E00, 0x0E7F): "Thai",
+    (0x0590, 0x05FF): "Hebrew",
+    (0x0370, 0x03FF): "Greek",
+    (0x0900, 0x097F): "Hindi",
+}
+
+# Letters outside the alphabet of a script's language: a sample containing one
+# is written in another language sharing the script
+FOREIGN_LETTERS = {
+    "Russian": "іїєґўјљњћџђѓќѕ",  # Ukrainian, Belarusian, Serbian, Macedonian
+    "Arabic": "پچژگکیٹڈڑںےۀ",  # Persian and Urdu
+}
+
+# Latin letters that identify a language among the profiled ones: a sample with
+# at least _MIN_DISTINCT_LETTERS different ones is in that language (one alone
+# may be a Croatian đ or a Romanian ă)
+DISTINCT_LETTERS = {
+    "Vietnamese": "ăơưđạảấầẩẫậắằẳẵặẹẻẽếềểễệĩỉịọỏốồổỗộớờởỡợũụủứừửữựỳỵỷỹ",
+}
+_MIN_DISTINCT_LETTERS = 2
+
+_NON_LETTERS_RE = re.compile(r"[\W\d_]+", re.UNICODE)
+# Share of letters a script must reach to decide the language
+_SCRIPT_SHARE = 0.3
+# Average log probability per trigram by which another language must beat the
+# default one, so short texts with few distinctive trigrams stay in the default
+_DEFAULT_MARGIN = 0.1
+# Share of the sample's trigrams the best profile must contain; texts in our
+# languages reach about 0.5, other Latin-script languages stay below 0.45
+_MIN_COVERAGE = 0.45
+# Trigrams a sample needs before coverage is checked: single claims cover too
+# few of a profile's trigrams to tell an unprofiled language from ours
+_MIN_COVERAGE_TRIGRAMS = 100
+
+
+def _trigrams(text: str) -> Counter:
+    """Count the character trigrams (as tuples of characters) of a text cleaned by _clean."""
+    padded = f" {text.strip()} "
+    return Counter(zip(padded, padded[1:], padded[2:]))
+
+
+def _clean(text: str) -> str:
+    """Lowercase a text and replace every run of non-letters with one space."""
+    return _NON_LETTERS_RE.sub(" ", unicodedata.normalize("NFC", text).lower())
+
+
+class LanguageDetector:
+    """Detects the language of a text from a bounded sample."""
+
+    def __init__(
+        self,
+        seed_texts: Optional[Dict[str, str]] = None,
+        sample_chars: int = DEFAULT_SAMPLE_CHARS,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        default_language: str = DEFAULT_LANGUAGE,
+    ):
+        """
+        Initialize the detector and build its trigram profiles.
+
+        Args:
+            seed_texts: Seed text per Latin-script language. If None, SEED_TEXTS is used.
+            sample_chars: Characters from the start of the text that are examined
+            cache_size: Number of detection results kept (0 disables caching)
+            default_language: Language returned when nothing can be detected
+        """
+        self.sample_chars = sample_chars
+        self.cache_size = cache_size
+        self.default_language = default_language
+        self.scripts: Dict[Tuple[int, int], str] = dict(SCRIPT_LANGUAGES)
+        self._profiles: Dict[str, Tuple[Dict[Tuple[str, str, str], float], float]] = {}
+        self._cache: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        for language, seed in (SEED_TEXTS if seed_texts is None else seed_texts).items():
+            self.add_language(language, seed)
+
+    def add_language(self, language: str, seed_text: str) -> None:
+        """
+        Add or replace a Latin-script language profile.
+
+        Args:
+            language: The language name used in prompts, e.g. "German"
+            seed_text: A few sentences of typical prose in the language
+        """
+        counts = _trigrams(_clean(seed_text))
+        total = sum(counts.values())
+        vocabulary = len(counts) + 1
+        # Add-one smoothed log probabilities, plus the log probability of unseen trigrams
+        profile = {gram: math.log((count + 1) / (total + vocabulary)) for gram, count in counts.items()}
+        with self._lock:
+            self._profiles[language] = (profile, math.log(1 / (total + vocabulary)))
+            self._cache.clear()
+
+    def add_script(self, first: int, last: int, language: str) -> None:
+        """
+        Map a Unicode range to a language.
+
+        Args:
+            first: First code point of the range
+            last: Last code point of the range
+            language: The language written in that script
+        """
+        with self._lock:
+            self.scripts[(first, last)] = language
+            self._cache.clear()
+
+    def detect(self, text: str) -> Optional[str]:
+        """
+        Detect the language of a text.
+
+        Args:
+            text: The text to analyze
+
+        Returns:
+            The language name, the default language for texts without letters or
+            without a clear winner among similar languages, or None if the text
+            is in a language none of the profiles or scripts fits
+        """
+        sample = text[:self.sample_chars]
+        if not self.cache_size:
+            return self._detect_sample(sample)
+        key = hashlib.blake2b(sample.encode("utf-8"), digest_size=16).hexdigest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        language = self._detect_sample(sample)
+        with self._lock:
+            self._cache[key] = language
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return language
+
+    def _detect_sample(self, sample: str) -> Optional[str]:
+        """Detect the language of a bounded sample."""
+        cleaned = _clean(sample)
+        if not cleaned.strip():
+            return self.default_language
+
+        if not cleaned.isascii():
+            script_counts: Counter = Counter()
+            for char in cleaned:
+                code = ord(char)
+                if code < 0x0370:
+                    continue
+                for (first, last), language in self.scripts.items():
+                    if first <= code <= last:
+                        script_counts[language] += 1
+                        break
+            if script_counts:
+                language, count = script_counts.most_common(1)[0]
+                if count >= _SCRIPT_SHARE * (len(cleaned) - cleaned.count(" ")):
+                    foreign = FOREIGN_LETTERS.get(language, "")
+                    return None if any(char in foreign for char in cleaned) else language
+
+        for language, letters in DISTINCT_LETTERS.items():
+            if language in self._profiles and len(set(cleaned) & set(letters)) >= _MIN_DISTINCT_LETTERS:
+                return language
+
+        grams = _trigrams(cleaned)
+        if not grams or not self._profiles:
+            return self.default_language
+        total = sum(grams.values())
+        scores = {
+            language: sum(count * profile.get(gram, unseen) for gram, count in grams.items()) / total
+            for language, (profile, unseen) in self._profiles.items()
+        }
+        best_language = max(scores, key=scores.get)
+        best_profile = self._profiles[best_language][0]
+        covered = sum(count for gram, count in grams.items() if gram in best_profile)
+        if total >= _MIN_COVERAGE_TRIGRAMS and covered < _MIN_COVERAGE * total:
+            return None
+        default_score = scores.get(self.default_language)
+        if default_score is not None and scores[best_language] - default_score < _DEFAULT_MARGIN:
+            return self.default_language
+        return best_language
+
+
+_default_detector: Optional[LanguageDetector] = None
+_default_detector_lock = threading.Lock()
+
+
+def get_language_detector() -> LanguageDetector:
+    """
+    Get the process-wide detector, building its profiles on first use.
+
+    Returns:
+        The shared LanguageDetector
+    """
+    global _default_detector
+    with _default_detector_lock:
+        if _default_detector is None:
+            _default_detector = LanguageDetector()
+        return _default_detector
@@ -0,0 +1,164 @@
+"""
+Model routing and hedging for fact checks.
+
+ModelRouter picks the Perplexity model for a request when the caller asks for
+the "auto" model: short claims go to the cheaper model and long texts to the
+pro model, unless the pro model's observed tail latency exceeds the caller's
+latency budget. It also records the latency of every call per model, and
+derives from it how long a hedged request should wait for the primary model
+before firing the cheaper hedge model.
+"""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+AUTO_MODEL = "auto"
+
+
+class ModelRouter:
+    """Chooses models by input length and latency budget and times hedged requests."""
+
+    DEFAULT_SHORT_MODEL = "sonar"
+    DEFAULT_LONG_MODEL = "sonar-pro"
+    DEFAULT_LENGTH_THRESHOLD = 1000  # characters
+    DEFAULT_HEDGE_PERCENTILE = 95.0
+    DEFAULT_HEDGE_DELAY = 12.0
+    MIN_SAMPLES = 20
+    WINDOW = 256
+
+    # Tail latency assumed for a model until enough calls have been observed
+    LATENCY_ESTIMATES = {"sonar": 6.0, "sonar-pro": 15.0, "sonar-reasoning": 25.0, "sonar-reasoning-pro": 40.0}
+
+    def __init__(
+        self,
+        short_model: str = DEFAULT_SHORT_MODEL,
+        long_model: str = DEFAULT_LONG_MODEL,
+        length_threshold: int = DEFAULT_LENGTH_THRESHOLD,
+        hedge_model: Optional[str] = DEFAULT_SHORT_MODEL,
+        hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            short_model: Model for texts up to length_threshold characters
+            long_model: Model for longer texts
+            length_threshold: Length in characters above which a text counts as long
+            hedge_model: Cheaper model fired when the primary is slow. If None, hedging is disabled.
+            hedge_percentile: Latency percentile of the primary model after which the hedge fires
+        """
+        self.short_model = short_model
+        self.long_model = long_model
+        self.length_threshold = length_threshold
+        self.hedge_model = hedge_model
+        self.hedge_percentile = hedge_percentile
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def route(self, text: str, latency_budget: Optional[float] = None) -> str:
+        """
+        Pick the model for a text.
+
+        Args:
+            text: The claim or article text to fact check
+            latency_budget: Seconds the caller is willing to wait, if limited
+
+        Returns:
+            The model name
+        """
+        model = self.long_model if len(text) > self.length_threshold else self.short_model
+        if latency_budget is not None and model != self.short_model:
+            if self.latency(model, self.hedge_percentile) > latency_budget:
+                model = self.short_model
+        return model
+
+    def record(self, model: str, seconds: float) -> None:
+        """
+        Record the latency of a successful call.
+
+        Args:
+            model: The model that answered
+            seconds: How long the call took
+        """
+        with self._lock:
+            samples = self._latencies.get(model)
+            if samples is None:
+                samples = self._latencies[model] = deque(maxlen=self.WINDOW)
+            samples.append(seconds)
+
+    def record_hedge(self, won: bool) -> None:
+        """
+        Count a fired hedge request.
+
+        Args:
+            won: Whether the hedge model's answer was used
+        """
+        with self._lock:
+            self.hedges += 1
+            if won:
+                self.hedge_wins += 1
+
+    def latency(self, model: str, percentile: float) -> float:
+        """
+        Estimate a latency percentile of a model from recent calls.
+
+        Args:
+            model: The model name
+            percentile: The percentile (0-100)
+
+        Returns:
+            The estimated latency in seconds, or a static estimate until
+            MIN_SAMPLES calls have been recorded
+        """
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < self.MIN_SAMPLES:
+            return self.LATENCY_ESTIMATES.get(model, self.DEFAULT_HEDGE_DELAY)
+        rank = min(len(samples) - 1, max(0, int(round(percentile / 100 * len(samples))) - 1))
+        return samples[rank]
+
+    def hedge_delay(self, model: str, latency_budget: Optional[float] = None) -> Optional[float]:
+        """
+        Get how long to wait for a model before firing the hedge model.
+
+        Args:
+            model: The primary model
+            latency_budget: Seconds the caller is willing to wait, if limited
+
+        Returns:
+            The delay in seconds, or None if the call should not be hedged
+        """
+        if not self.hedge_model or model == self.hedge_model:
+            return None
+        # Until MIN_SAMPLES calls are observed this is the model's static estimate, so a
+        # slow model is not hedged on almost every call while the window warms up
+        delay = self.latency(model, self.hedge_percentile)
+        if latency_budget is not None:
+            delay = min(delay, latency_budget / 2)
+        return delay
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get hedging counters and per-model latency percentiles for monitoring.
+
+        Returns:
+            A dictionary of counters and latencies
+        """
+        with self._lock:
+            models = list(self._latencies)
+            counts = {model: len(self._latencies[model]) for model in models}
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency": {
+                model: {
+                    "samples": counts[model],
+                    "p50": round(self.latency(model, 50), 3),
+                    f"p{self.hedge_percentile:g}": round(self.latency(model, self.hedge_percentile), 3),
+                }
+                for model in models
+            },
+        }
@@ -0,0 +1,253 @@
+"""
+Local token estimates and prompt budgeting for long inputs.
+
+Pasted pages and extracted articles often carry cookie banners, share
+buttons, repeated paragraphs and long stretches of context that do not
+contain a checkable claim, and every token of them is paid for and adds
+latency. fit_to_budget shrinks a text that would exceed the token budget of
+its model in three steps, stopping as soon as it fits:
+
+1. drop boilerplate paragraphs (short paragraphs about cookies, newsletters,
+   sharing, copyright and the like, and menu-like fragments)
+2. drop repeated paragraphs
+3. keep the opening sentence and the most claim-dense other sentences
+   (scored like claim_pipeline's local claim extraction), skipping repeated
+   ones, in their original order until the budget is used
+
+and reports what was dropped. Texts within budget are left untouched.
+
+Token counts are estimated locally from word shapes, without a tokenizer:
+common words count as one token, long words, digit runs, punctuation and
+non-Latin scripts count more.
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from claim_extraction import claim_score, split_sentences
+from result_cache import normalize_text
+
+# Prompt tokens allowed per request (system prompt, instructions and text)
+DEFAULT_TOKEN_BUDGETS = {
+    "sonar": 8000,
+    "sonar-pro": 16000,
+    "sonar-reasoning": 8000,
+    "sonar-reasoning-pro": 16000,
+}
+DEFAULT_TOKEN_BUDGET = 16000  # models missing from the budgets
+MIN_TEXT_TOKENS = 256  # never shrink the text itself below this
+MESSAGE_OVERHEAD_TOKENS = 16  # role markers and separators of the chat messages
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_", re.UNICODE)
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n|\n")
+_BOILERPLATE_RE = re.compile(
+    r"\b(cookies?|subscribe|subscription|newsletter|sign up|sign in|log in|all rights reserved|"
+    r"advertisement|sponsored|share (this|on)|follow us|read more|click here|terms of (use|service)|"
+    r"privacy policy|related (articles?|stories)|recommended for you)\b|©|\bcopyright\b",
+    re.IGNORECASE,
+)
+_BOILERPLATE_MAX_WORDS = 40
+_FRAGMENT_MAX_WORDS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens a text uses, without a tokenizer.
+
+    Args:
+        text: The text to measure
+
+    Returns:
+        The estimated token count
+    """
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text):
+        if piece.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif not piece[0].isalpha():
+            tokens += 1
+        elif piece.isascii():
+            tokens += math.ceil(len(piece) / 6)
+        else:
+            cjk = len(_CJK_RE.findall(piece))
+            tokens += cjk + math.ceil((len(piece) - cjk) / 3)
+    return tokens
+
+
+@lru_cache(maxsize=16)
+def estimate_prompt_tokens(prompt: str) -> int:
+    """Estimate the tokens of a system prompt or instruction, cached since they rarely change."""
+    return estimate_tokens(prompt)
+
+
+def parse_token_budgets(spec: str) -> Dict[str, int]:
+    """
+    Parse a token budget setting.
+
+    Args:
+        spec: Comma-separated "model=tokens" pairs, or a single number applied to
+            every model (for example "sonar=6000,sonar-pro=12000" or "12000").
+            A budget of 0 disables budgeting for that model.
+
+    Returns:
+        The budgets by model, on top of DEFAULT_TOKEN_BUDGETS; a single number
+        is stored under "*"
+
+    Raises:
+        ValueError: If the setting is malformed
+    """
+    spec = spec.strip()
+    if not spec:
+        return dict(DEFAULT_TOKEN_BUDGETS)
+    if "=" not in spec:
+        return {"*": _parse_budget(spec, spec)}
+    budgets = dict(DEFAULT_TOKEN_BUDGETS)
+    for pair in spec.split(","):
+        model, _, tokens = pair.partition("=")
+        if not model.strip():
+            raise ValueError(f"Invalid token budget {pair.strip()!r}: expected model=tokens")
+        budgets[model.strip()] = _parse_budget(tokens, pair.strip())
+    return budgets
+
+
+def _parse_budget(tokens: str, item: str) -> int:
+    """Parse one budget, a non-negative number of tokens."""
+    try:
+        budget = int(tokens)
+    except ValueError:
+        raise ValueError(f"Invalid token budget {item!r}: not a whole number of tokens") from None
+    if budget < 0:
+        raise ValueError(f"Invalid token budget {item!r}: must not be negative")
+    return budget
+
+
+def budget_for(model: str, budgets: Dict[str, int]) -> int:
+    """
+    Get the token budget of a model.
+
+    Args:
+        model: The Perplexity model
+        budgets: Budgets as returned by parse_token_budgets
+
+    Returns:
+        The budget in tokens, or 0 if budgeting is disabled for the model
+    """
+    if "*" in budgets:
+        return budgets["*"]
+    return budgets.get(model, DEFAULT_TOKEN_BUDGET)
+
+
+def _is_boilerplate(paragraph: str) -> bool:
+    """Whether a paragraph looks like page furniture rather than article content."""
+    words = paragraph.split()
+    if len(words) <= _FRAGMENT_MAX_WORDS and not paragraph.rstrip().endswith((".", "!", "?", ":", '"', "”")):
+        return True
+    return len(words) <= _BOILERPLATE_MAX_WORDS and _BOILERPLATE_RE.search(paragraph) is not None
+
+
+def fit_to_budget(text: str, max_tokens: int) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Shrink a text to a token budget, keeping its most claim-dense sentences.
+
+    Args:
+        text: The claim or article text
+        max_tokens: Tokens the text may use
+
+    Returns:
+        The text (unchanged if it already fits) and a report of what was
+        dropped, or None if nothing was dropped
+    """
+    original_tokens = estimate_tokens(text)
+    if original_tokens <= max_tokens:
+        return text, None
+
+    paragraphs = [p.strip() for p in _PARAGRAPH_RE.split(text) if p.strip()]
+    dropped = {"boilerplate_paragraphs": 0, "duplicate_paragraphs": 0, "sentences": 0}
+
+    # The first paragraph is usually the headline, which is short but worth keeping
+    kept: List[str] = paragraphs[:1]
+    for paragraph in paragraphs[1:]:
+        if _is_boilerplate(paragraph):
+            dropped["boilerplate_paragraphs"] += 1
+        else:
+            kept.append(paragraph)
+
+    seen = set()
+    unique: List[str] = []
+    for paragraph in kept:
+        key = normalize_text(paragraph).lower()
+        if key in seen:
+            dropped["duplicate_paragraphs"] += 1
+        else:
+            seen.add(key)
+            unique.append(paragraph)
+
+    result = "\n\n".join(unique)
+    tokens = estimate_tokens(result)
+    if tokens > max_tokens:
+        # (paragraph index, sentence) pairs without repeated sentences
+        sentences = []
+        seen_sentences = set()
+        total_sentences = 0
+        for p, paragraph in enumerate(unique):
+            for sentence in split_sentences(paragraph):
+                total_sentences += 1
+                key = normalize_text(sentence).lower()
+                if key not in seen_sentences:
+                    seen_sentences.add(key)
+                    sentences.append((p, sentence))
+        costs = [estimate_tokens(s) + 1 for _, s in sentences]
+        # The opening sentence first, then by claim density and position
+        order = sorted(range(len(sentences)), key=lambda i: (i != 0, -claim_score(sentences[i][1]), i))
+        chosen = set()
+        tokens = 0
+        for i in order:
+            if tokens + costs[i] <= max_tokens:
+                chosen.add(i)
+                tokens += costs[i]
+        dropped["sentences"] = total_sentences - len(chosen)
+
+        rebuilt: List[List[str]] = [[] for _ in unique]
+        for i in sorted(chosen):
+            p, sentence = sentences[i]
+            rebuilt[p].append(sentence)
+        result = "\n\n".join(" ".join(group) for group in rebuilt if group)
+        tokens = estimate_tokens(result)
+
+    dropped["tokens"] = original_tokens - tokens
+    return result, {
+        "token_budget": max_tokens,
+        "original_tokens": original_tokens,
+        "final_tokens": tokens,
+        "dropped": dropped,
+    }
+
+
+def fit_prompt(
+    text: str, model: str, budgets: Dict[str, int], *prompts: str
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Shrink a text so the whole request stays within its model's token budget.
+
+    Args:
+        text: The claim or article text
+        model: The Perplexity model the request goes to
+        budgets: Budgets as returned by parse_token_budgets
+        prompts: The system prompt and instructions sent along with the text
+
+    Returns:
+        The text to send and a report of what was dropped, or None if nothing was
+    """
+    budget = budget_for(model, budgets)
+    if budget <= 0:
+        return text, None
+    overhead = sum(estimate_prompt_tokens(prompt) for prompt in prompts if prompt) + MESSAGE_OVERHEAD_TOKENS
+    text, report = fit_to_budget(text, max(MIN_TEXT_TOKENS, budget - overhead))
+    if report is not None:
+        report["token_budget"] = budget
+        report["original_tokens"] += overhead
+        report["final_tokens"] += overhead
+    return text, report
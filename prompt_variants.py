@@ -0,0 +1,217 @@
+"""
+Compact system prompt variants with stable, cache-friendly prefixes.
+
+The system prompt is sent with every request, so PromptVariants compacts it
+once when it is loaded (decorative emoji, markdown emphasis, blank lines,
+repeated lines and runs of spaces are removed) and precompiles one variant
+per response language. Once the input language is known, the prompt's
+generic language detection instructions (sections whose heading mentions
+"language" and language lines before the first heading) are redundant, so a
+language variant is the compact prompt without them, followed by a short
+rule naming the language. The rule keeps a one-line fallback to the language
+the text is actually written in, in case detection was wrong. As a result:
+
+- every request in the same language sends a byte-identical system message,
+  and requests in different languages still share everything but the last
+  lines, which lets the upstream prompt cache reuse the prefix
+- the language rule no longer has to follow the text in the user message
+
+Each variant carries a stable hash of its content for logs and monitoring.
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, Optional, Tuple
+
+# Languages whose variants are built up front; others are built on first use
+SUPPORTED_LANGUAGES = ("English", "Vietnamese", "Spanish", "French")
+
+LANGUAGE_RULE = (
+    "\n## Response Language\n"
+    "The input text is in {language}. Write the summary, every explanation and all descriptive text "
+    "entirely in {language}; do not mix languages. Keep each claim exactly as written in the input. "
+    "Only rating values, overall rating values and JSON field names stay in English.\n"
+    "If the input text is clearly not in {language}, respond in the language it is written in instead."
+)
+
+# Used when system_prompt.md is missing or unreadable
+FALLBACK_SYSTEM_PROMPT = """MANDATORY: respond in the same language as the input text.
+You are a professional fact-checker with extensive research capabilities. Evaluate claims or articles for factual accuracy, focusing on false, misleading or unsubstantiated claims.
+## Language
+Detect the language of the input (English, Vietnamese, Spanish, etc.) and write the summary, every explanation and all descriptive text in that language. Never mix languages. Keep claims as written. Only rating values (TRUE, FALSE, MISLEADING, UNVERIFIABLE, MOSTLY_TRUE, MIXED, MOSTLY_FALSE) and JSON field names stay in English.
+Example: for "Trái đất có hình phẳng" the summary reads "Tuyên bố này hoàn toàn sai theo bằng chứng khoa học..." (Vietnamese).
+## Sources
+Each claim MUST have at least 3 but no more than 10 distinct, high-quality sources.
+## Evaluation Process
+1. Identify specific claims that can be verified
+2. Research each claim thoroughly using the most reliable sources available
+3. Rate each claim:
+- TRUE: Factually accurate and supported by credible evidence
+- FALSE: Contradicted by credible evidence
+- MISLEADING: Contains some truth but presented in a way that could lead to incorrect conclusions
+- UNVERIFIABLE: Cannot be conclusively verified with available information
+4. For claims rated FALSE or MISLEADING, explain why and provide corrections
+## Guidelines
+- Remain politically neutral and focus solely on factual accuracy
+- Prioritize official data, peer-reviewed research and reports from credible institutions
+- Consider context and intended meaning; distinguish factual claims from opinions
+- Pay attention to dates, numbers and specific details
+## Response Format
+Respond in JSON:
+```json
+{"overall_rating": "MOSTLY_TRUE|MIXED|MOSTLY_FALSE", "summary": "...", "claims": [{"claim": "...", "rating": "TRUE|FALSE|MISLEADING|UNVERIFIABLE", "explanation": "...", "sources": ["Source URL 1", "Source URL 2", "Source URL 3"]}]}
+```
+## Overall Rating
+- MOSTLY_TRUE: Most claims are true, with minor inaccuracies that don't affect the main message
+- MIXED: A roughly equal mix of true and false/misleading claims
+- MOSTLY_FALSE: Most claims are false or misleading"""
+
+_EMPHASIS_RE = re.compile(r"\*\*|__")
+_LANGUAGE_LINE_RE = re.compile(r"\blanguage\b|^if input is\b", re.IGNORECASE)
+_SPACES_RE = re.compile(r"(?<=\S)[ \t]{2,}")
+# Lines shorter than this (list markers, fences, short headings) may legitimately repeat
+_MIN_DEDUPE_LENGTH = 24
+
+
+def _is_decoration(char: str) -> bool:
+    """Whether a character is an emoji or other pictograph that only decorates the prompt."""
+    return unicodedata.category(char) == "So" or char in "\ufe0f\u200d"
+
+
+def compact_prompt(prompt: str) -> str:
+    """
+    Shrink a prompt without changing its instructions.
+
+    Removes emoji, markdown emphasis, trailing and repeated spaces, blank lines
+    and lines repeating an earlier line. Fenced code blocks are kept verbatim.
+
+    Args:
+        prompt: The prompt text
+
+    Returns:
+        The compacted prompt
+    """
+    lines = []
+    seen = set()
+    in_code = False
+    for line in unicodedata.normalize("NFC", prompt).splitlines():
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+            lines.append(line.strip())
+            continue
+        if in_code:
+            lines.append(line.rstrip())
+            continue
+        line = "".join(char for char in line if not _is_decoration(char))
+        line = _SPACES_RE.sub(" ", _EMPHASIS_RE.sub("", line)).rstrip()
+        if not line.strip():
+            continue
+        key = line.strip().lower()
+        if len(key) >= _MIN_DEDUPE_LENGTH:
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line.lstrip() if not line.lstrip().startswith(("-", "*")) else line)
+    return "\n".join(lines)
+
+
+def strip_language_sections(prompt: str) -> str:
+    """
+    Remove the generic language detection instructions from a compact prompt.
+
+    Args:
+        prompt: A prompt compacted by compact_prompt
+
+    Returns:
+        The prompt without sections whose heading mentions "language" and
+        without language lines before the first heading
+    """
+    lines = []
+    seen_heading = False
+    skipping = False
+    for line in prompt.splitlines():
+        if line.startswith("#"):
+            seen_heading = True
+            skipping = _LANGUAGE_LINE_RE.search(line) is not None
+        elif not seen_heading and _LANGUAGE_LINE_RE.search(line):
+            continue
+        if not skipping:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def prompt_hash(prompt: str) -> str:
+    """
+    Get a short stable hash of a prompt.
+
+    Args:
+        prompt: The prompt text
+
+    Returns:
+        The first 16 hex digits of the prompt's SHA-256
+    """
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class PromptVariants:
+    """Precompiled compact system prompts, one per response language."""
+
+    def __init__(self, prompt: str, languages: Iterable[str] = SUPPORTED_LANGUAGES):
+        """
+        Compact a system prompt and build its language variants.
+
+        Args:
+            prompt: The system prompt as written
+            languages: Languages to build variants for up front
+        """
+        self.original_bytes = len(prompt.encode("utf-8"))
+        self.base = compact_prompt(prompt)
+        self.base_hash = prompt_hash(self.base)
+        self._language_base = strip_language_sections(self.base)
+        self._variants: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        for language in languages:
+            self.get(language)
+
+    def get(self, language: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Get the system prompt for a response language.
+
+        Args:
+            language: The language of the input text, or None for the compact
+                prompt without a language rule
+
+        Returns:
+            The prompt and its stable hash
+        """
+        if language is None:
+            return self.base, self.base_hash
+        variant = self._variants.get(language)
+        if variant is None:
+            content = self._language_base + LANGUAGE_RULE.format(language=language)
+            variant = (content, prompt_hash(content))
+            # Inserting under the lock keeps stats() from iterating a dict that changes size
+            with self._lock:
+                variant = self._variants.setdefault(language, variant)
+        return variant
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Describe the variants for monitoring.
+
+        Returns:
+            Prompt sizes in bytes and hashes per language
+        """
+        with self._lock:
+            variants = sorted(self._variants.items())
+        return {
+            "original_bytes": self.original_bytes,
+            "compact_bytes": len(self.base.encode("utf-8")),
+            "base_hash": self.base_hash,
+            "variants": {
+                language: {"hash": variant_hash, "bytes": len(content.encode("utf-8"))}
+                for language, (content, variant_hash) in variants
+            },
+        }
@@ -0,0 +1,247 @@
+"""
+Client-side rate limiting and retries for Perplexity API calls.
+
+A RequestScheduler runs every API call through a token bucket sized to the
+account's requests-per-minute tier, retries 429 and 5xx responses and
+connection failures with exponential backoff and full jitter, honours
+Retry-After (which also pauses the bucket so concurrent callers back off
+together), and gives up once the per-request deadline would be exceeded.
+Chat completions have no side effects, so retrying them is safe.
+
+The same scheduler serves the blocking requests path and the aiohttp path;
+the bucket hands out reservations under a lock and callers sleep outside it.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Status codes worth retrying: timeouts, rate limiting and transient server errors
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class RetryableError(Exception):
+    """A failed API attempt that may succeed when retried."""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request cannot complete within its deadline."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Either a number of seconds or an HTTP date
+
+    Returns:
+        The number of seconds to wait, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """A thread-safe token bucket that hands out reservations instead of blocking."""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize the bucket, initially full.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (the allowed burst)
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Reserve one token.
+
+        Args:
+            max_wait: Longest acceptable wait in seconds
+
+        Returns:
+            Seconds to wait before using the token, or None (and nothing reserved)
+            if the wait would exceed max_wait
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, self._paused_until - now)
+            if self._tokens < 1:
+                wait = max(wait, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop handing out tokens for a while, e.g. after a Retry-After response.
+
+        Args:
+            seconds: How long to pause
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RequestScheduler:
+    """Rate limits, retries and time-boxes API calls."""
+
+    DEFAULT_RATE_LIMIT = 50  # requests per minute
+    DEFAULT_BURST = 10
+    DEFAULT_MAX_RETRIES = 3
+    DEFAULT_DEADLINE = 240.0  # seconds, under the Function's 5 minute functionTimeout
+    DEFAULT_BASE_DELAY = 1.0
+    DEFAULT_MAX_DELAY = 30.0
+
+    def __init__(
+        self,
+        rate_limit: float = DEFAULT_RATE_LIMIT,
+        burst: float = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        deadline: float = DEFAULT_DEADLINE,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            rate_limit: Requests per minute allowed by the API tier. 0 disables rate limiting.
+            burst: Number of requests that may be sent back to back before the rate applies
+            max_retries: Retries after the first attempt
+            deadline: Seconds a call may take in total, including waits and retries
+            base_delay: Backoff delay before the first retry
+            max_delay: Upper bound on a single backoff delay
+        """
+        self.bucket = TokenBucket(rate_limit / 60, burst) if rate_limit > 0 else None
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Compute an exponential backoff delay with full jitter.
+
+        Args:
+            attempt: Number of attempts made so far (1 for the first retry)
+
+        Returns:
+            Seconds to wait before the next attempt
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _acquire(self, deadline: float) -> float:
+        """Reserve a bucket token, returning the wait or raising if it would miss the deadline."""
+        if self.bucket is None:
+            return 0.0
+        wait = self.bucket.reserve(deadline - time.monotonic())
+        if wait is None:
+            raise DeadlineExceeded(f"rate limit wait would exceed the {self.deadline:g}s deadline")
+        return wait
+
+    def _next_delay(self, error: RetryableError, attempt: int, deadline: float) -> Optional[float]:
+        """Decide how long to wait before retrying, or None to give up."""
+        if attempt > self.max_retries:
+            return None
+        if error.retry_after is not None:
+            delay = error.retry_after
+            if self.bucket is not None:
+                self.bucket.pause(delay)
+        else:
+            delay = self.backoff(attempt)
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def _remaining(self, deadline: float) -> float:
+        """Seconds left before the deadline, raising once it has passed."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"request did not complete within the {self.deadline:g}s deadline")
+        return remaining
+
+    def run(self, send: Callable[[float], T]) -> T:
+        """
+        Call send until it succeeds, retries are exhausted or the deadline passes.
+
+        Args:
+            send: Performs one attempt given the seconds left before the deadline,
+                raising RetryableError for failures worth retrying
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            RetryableError: The last failure, once retries are exhausted
+            DeadlineExceeded: If the deadline passes before a response arrives
+        """
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            time.sleep(self._acquire(deadline))
+            try:
+                return send(self._remaining(deadline))
+            except RetryableError as e:
+                attempt += 1
+                delay = self._next_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    async def run_async(self, send: Callable[[float], Awaitable[T]]) -> T:
+        """
+        Asyncio version of run.
+
+        Args:
+            send: Coroutine function performing one attempt given the seconds left
+                before the deadline, raising RetryableError for failures worth retrying
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            RetryableError: The last failure, once retries are exhausted
+            DeadlineExceeded: If the deadline passes before a response arrives
+        """
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._acquire(deadline))
+            try:
+                return await send(self._remaining(deadline))
+            except RetryableError as e:
+                attempt += 1
+                delay = self._next_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
@@ -0,0 +1,131 @@
+"""
+Compact, content-negotiated encoding of JSON responses.
+
+Responses are serialized without pretty-print whitespace and as UTF-8
+(non-ASCII explanations are not \\u-escaped), with orjson when it is
+installed. Bodies of at least MIN_COMPRESS_BYTES are compressed with brotli
+(if installed) or gzip when the client's Accept-Encoding header allows it;
+compression levels favor speed, since a response is encoded once and most
+of the gain comes from the repeated explanation and source text. Clients
+that want readable output can ask for indentation.
+"""
+
+import gzip
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; compression would not pay off
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+# Encodings we can produce, in order of preference
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Set FACT_CHECK_JSON=json to serialize with the standard library even when orjson is installed
+USE_ORJSON = orjson is not None and os.environ.get("FACT_CHECK_JSON", "orjson") != "json"
+
+
+def dumps(payload: Any, pretty: bool = False) -> bytes:
+    """
+    Serialize a payload to UTF-8 JSON.
+
+    Args:
+        payload: The JSON-serializable payload
+        pretty: Whether to indent the output for reading
+
+    Returns:
+        The JSON document
+    """
+    if USE_ORJSON:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0))
+    if pretty:
+        return json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content encoding for a response.
+
+    Args:
+        accept_encoding: The request's Accept-Encoding header
+
+    Returns:
+        "br" or "gzip", or None to send the body uncompressed
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+    candidates = [
+        encoding for encoding in SUPPORTED_ENCODINGS
+        if weights.get(encoding, weights.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda encoding: weights.get(encoding, weights.get("*", 0.0)))
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    """
+    Compress a body with a negotiated encoding.
+
+    Args:
+        body: The uncompressed body
+        encoding: "br", "gzip" or None
+
+    Returns:
+        The encoded body
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def encode_response(
+    payload: Any, accept_encoding: Optional[str] = None, pretty: bool = False
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serialize and, if the client allows it, compress a JSON response.
+
+    Args:
+        payload: The JSON-serializable payload
+        accept_encoding: The request's Accept-Encoding header
+        pretty: Whether to indent the output for reading
+
+    Returns:
+        The body and the headers describing it (Content-Encoding and Vary)
+    """
+    body = dumps(payload, pretty)
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, headers
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is not None:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
@@ -0,0 +1,242 @@
+"""
+Result cache for fact check responses.
+
+Results are keyed on the normalized input text, the model, the structured
+output flag and a hash of the system prompt. Entries live in an in-memory
+LRU tier and, optionally, in a SQLite database on disk so they survive
+process restarts. Every entry expires after a configurable TTL. Other
+backends (Redis, a storage account table) can be plugged into FactChecker by
+implementing CacheBackend.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize input text so trivially different copies share a cache key.
+
+    Args:
+        text: The raw input text
+
+    Returns:
+        The text in NFKC form with runs of whitespace collapsed
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+@lru_cache(maxsize=16)
+def hash_prompt(system_prompt: str) -> str:
+    """
+    Hash a system prompt. Cached because the same prompt is used for every request.
+
+    Args:
+        system_prompt: The system prompt text
+
+    Returns:
+        Hex SHA-256 digest of the prompt
+    """
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Storage backend of the result cache, keyed by ResultCache.make_key."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key from ResultCache.make_key
+
+        Returns:
+            A copy of the cached result the caller may modify, or None on a miss
+        """
+
+    @abstractmethod
+    def set(self, key: str, result: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        Store a result in the cache.
+
+        Args:
+            key: Cache key from ResultCache.make_key
+            result: The fact check result to store
+            ttl: Seconds this entry stays valid. If None, uses the backend default.
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get counters for monitoring.
+
+        Returns:
+            A dictionary of backend-specific counters
+        """
+        return {}
+
+    def close(self) -> None:
+        """Release the backend's resources."""
+
+
+class ResultCache(CacheBackend):
+    """A two-tier (memory + optional SQLite) TTL cache for fact check results."""
+
+    DEFAULT_MAX_ENTRIES = 1024
+    DEFAULT_TTL = 24 * 60 * 60
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        db_path: Optional[str] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept in memory before LRU eviction
+            ttl: Seconds an entry stays valid after it is stored
+            db_path: Path to a SQLite database for the on-disk tier. If None, memory only.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(text: str, model: str, use_structured_output: bool, system_prompt: str) -> str:
+        """
+        Build the content-addressed cache key for a fact check request.
+
+        Args:
+            text: The claim or article text
+            model: The Perplexity model name
+            use_structured_output: Whether structured output was requested
+            system_prompt: The system prompt sent with the request
+
+        Returns:
+            Hex SHA-256 digest identifying the request
+        """
+        digest = hashlib.sha256()
+        for part in (normalize_text(text), model, "1" if use_structured_output else "0", hash_prompt(system_prompt)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            A fresh copy of the cached result, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = row
+                    if expires_at > now:
+                        self._store_in_memory(key, value, expires_at)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return json.loads(value)
+                    self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, result: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        Store a result in the cache.
+
+        Args:
+            key: Cache key from make_key
+            result: The fact check result to store
+            ttl: Seconds this entry stays valid. If None, uses the cache default.
+        """
+        value = json.dumps(result, ensure_ascii=False)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store_in_memory(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                self._db.commit()
+
+    def _store_in_memory(self, key: str, value: str, expires_at: float) -> None:
+        """Insert an entry into the memory tier, evicting the least recently used ones."""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters for monitoring.
+
+        Returns:
+            A dictionary with hit, miss and size counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def close(self) -> None:
+        """Close the on-disk tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,237 @@
+"""
+Validation and normalization of fact check results returned by the model.
+
+The model does not always follow the response format: ratings come back as
+"True", "Partly true" or "MOSTLY TRUE", sources as a single string, and
+fields go missing. Results are validated with pydantic TypeAdapters built
+once at import, which normalize the rating values and return plain
+dictionaries (extra fields such as "reused" are kept). Structured output is
+validated straight from the response content with validate_json, without a
+separate json.loads. Only results that fail validation go through a slower
+repair pass, which drops claims without text, fills in missing fields and
+derives a missing or unknown overall rating from the claim ratings.
+"""
+
+import json
+from typing import Any, Dict, List, Literal, Optional, Union
+
+from pydantic import BeforeValidator, ConfigDict, TypeAdapter, ValidationError, with_config
+from typing_extensions import Annotated, TypedDict
+
+CLAIM_RATINGS = ("TRUE", "FALSE", "MISLEADING", "UNVERIFIABLE")
+OVERALL_RATINGS = ("MOSTLY_TRUE", "MIXED", "MOSTLY_FALSE")
+
+# Rating values the model uses instead of the ones we asked for
+CLAIM_RATING_ALIASES = {
+    "ACCURATE": "TRUE",
+    "CORRECT": "TRUE",
+    "MOSTLY_TRUE": "TRUE",
+    "INACCURATE": "FALSE",
+    "INCORRECT": "FALSE",
+    "MOSTLY_FALSE": "FALSE",
+    "PANTS_ON_FIRE": "FALSE",
+    "PARTLY_TRUE": "MISLEADING",
+    "PARTIALLY_TRUE": "MISLEADING",
+    "HALF_TRUE": "MISLEADING",
+    "MIXED": "MISLEADING",
+    "MISSING_CONTEXT": "MISLEADING",
+    "OUT_OF_CONTEXT": "MISLEADING",
+    "EXAGGERATED": "MISLEADING",
+    "UNPROVEN": "UNVERIFIABLE",
+    "UNVERIFIED": "UNVERIFIABLE",
+    "UNSUBSTANTIATED": "UNVERIFIABLE",
+    "INSUFFICIENT_EVIDENCE": "UNVERIFIABLE",
+}
+OVERALL_RATING_ALIASES = {
+    "TRUE": "MOSTLY_TRUE",
+    "ACCURATE": "MOSTLY_TRUE",
+    "FALSE": "MOSTLY_FALSE",
+    "INACCURATE": "MOSTLY_FALSE",
+    "MISLEADING": "MIXED",
+    "PARTLY_TRUE": "MIXED",
+    "PARTIALLY_TRUE": "MIXED",
+    "HALF_TRUE": "MIXED",
+}
+
+
+def compute_overall_rating(ratings: List[str]) -> str:
+    """
+    Derive the overall rating from per-claim ratings.
+
+    UNVERIFIABLE claims are ignored. If at least two thirds of the remaining
+    claims are TRUE the result is MOSTLY_TRUE, if at most one third are it is
+    MOSTLY_FALSE, and MIXED otherwise (including when nothing was verifiable).
+
+    Args:
+        ratings: Claim ratings (TRUE, FALSE, MISLEADING, UNVERIFIABLE)
+
+    Returns:
+        MOSTLY_TRUE, MIXED, or MOSTLY_FALSE
+    """
+    normalized = [str(r).strip().upper() for r in ratings]
+    true_count = normalized.count("TRUE")
+    false_count = normalized.count("FALSE") + normalized.count("MISLEADING")
+    verifiable = true_count + false_count
+    if not verifiable:
+        return "MIXED"
+    if true_count * 3 >= verifiable * 2:
+        return "MOSTLY_TRUE"
+    if true_count * 3 <= verifiable:
+        return "MOSTLY_FALSE"
+    return "MIXED"
+
+
+def _rating_key(value: Any) -> str:
+    """Uppercase a rating and join its words with underscores."""
+    return "_".join(str(value).replace("-", " ").split()).upper()
+
+
+def normalize_claim_rating(value: Any) -> str:
+    """
+    Map a claim rating to TRUE, FALSE, MISLEADING or UNVERIFIABLE.
+
+    Args:
+        value: The rating as returned by the model
+
+    Returns:
+        The normalized rating; unknown values become UNVERIFIABLE
+    """
+    key = _rating_key(value)
+    if key in CLAIM_RATINGS:
+        return key
+    return CLAIM_RATING_ALIASES.get(key, "UNVERIFIABLE")
+
+
+def normalize_overall_rating(value: Any) -> str:
+    """
+    Map an overall rating to MOSTLY_TRUE, MIXED or MOSTLY_FALSE.
+
+    Args:
+        value: The overall rating as returned by the model
+
+    Returns:
+        The normalized rating
+
+    Raises:
+        ValueError: If the rating is unknown
+    """
+    key = _rating_key(value)
+    if key in OVERALL_RATINGS:
+        return key
+    if key in OVERALL_RATING_ALIASES:
+        return OVERALL_RATING_ALIASES[key]
+    raise ValueError(f"Unknown overall rating: {value}")
+
+
+def _as_string_list(value: Any) -> Any:
+    """Accept a single source string where a list of sources is expected."""
+    return [value] if isinstance(value, str) else value
+
+
+@with_config(ConfigDict(extra="allow"))
+class ClaimDict(TypedDict):
+    """A validated claim."""
+    claim: str
+    rating: Annotated[Literal[CLAIM_RATINGS], BeforeValidator(normalize_claim_rating)]
+    explanation: str
+    sources: Annotated[List[str], BeforeValidator(_as_string_list)]
+
+
+@with_config(ConfigDict(extra="allow"))
+class FactCheckResultDict(TypedDict):
+    """A validated fact check result."""
+    overall_rating: Annotated[Literal[OVERALL_RATINGS], BeforeValidator(normalize_overall_rating)]
+    summary: str
+    claims: List[ClaimDict]
+
+
+# Built once per process; validation itself runs in pydantic-core
+CLAIM_ADAPTER = TypeAdapter(ClaimDict)
+RESULT_ADAPTER = TypeAdapter(FactCheckResultDict)
+
+
+def _repair_claim(claim: Any) -> Optional[Dict[str, Any]]:
+    """Coerce one claim into the expected shape, or None if it has no claim text."""
+    if isinstance(claim, str):
+        claim = {"claim": claim}
+    if not isinstance(claim, dict) or not isinstance(claim.get("claim"), str) or not claim["claim"].strip():
+        return None
+    sources = _as_string_list(claim.get("sources"))
+    return {
+        **claim,
+        "rating": normalize_claim_rating(claim.get("rating", "UNVERIFIABLE")),
+        "explanation": str(claim.get("explanation") or ""),
+        "sources": [str(s) for s in sources if s] if isinstance(sources, list) else [],
+    }
+
+
+def _repair(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce a result that failed validation into the expected shape."""
+    claims = data.get("claims")
+    repaired = [c for c in map(_repair_claim, claims if isinstance(claims, list) else []) if c is not None]
+    try:
+        overall_rating = normalize_overall_rating(data.get("overall_rating"))
+    except ValueError:
+        overall_rating = compute_overall_rating([c["rating"] for c in repaired])
+    return {
+        **data,
+        "overall_rating": overall_rating,
+        "summary": str(data.get("summary") or ""),
+        "claims": repaired,
+    }
+
+
+def validate_result(data: Any) -> Dict[str, Any]:
+    """
+    Validate and normalize a parsed fact check result.
+
+    Args:
+        data: The result parsed from the model output
+
+    Returns:
+        The normalized result, or an error if it is not a JSON object
+    """
+    if not isinstance(data, dict):
+        return {"error": "Fact check result is not a JSON object", "raw_response": data}
+    try:
+        return RESULT_ADAPTER.validate_python(data)
+    except ValidationError:
+        return RESULT_ADAPTER.validate_python(_repair(data))
+
+
+def validate_result_json(content: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+    """
+    Parse and validate a fact check result in one step.
+
+    Args:
+        content: The model output, expected to be a JSON object
+
+    Returns:
+        The normalized result, or None if the content is not valid JSON
+    """
+    try:
+        return RESULT_ADAPTER.validate_json(content)
+    except ValidationError as e:
+        if e.error_count() == 1 and e.errors(include_url=False)[0]["type"] == "json_invalid":
+            return None
+    data = json.loads(content)
+    if not isinstance(data, dict):
+        return {"error": "Fact check result is not a JSON object", "raw_response": data}
+    return RESULT_ADAPTER.validate_python(_repair(data))
+
+
+def validate_claim(data: Any) -> Optional[Dict[str, Any]]:
+    """
+    Validate and normalize a single claim, as emitted while streaming.
+
+    Args:
+        data: The parsed claim
+
+    Returns:
+        The normalized claim, or None if it has no claim text
+    """
+    try:
+        return CLAIM_ADAPTER.validate_python(data)
+    except ValidationError:
+        repaired = _repair_claim(data)
+        return CLAIM_ADAPTER.validate_python(repaired) if repaired is not None else None
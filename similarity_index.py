@@ -0,0 +1,239 @@
+"""
+Near-duplicate detection for previously fact checked texts.
+
+Texts are reduced to word shingles and summarized with MinHash signatures.
+Signatures are bucketed with locality-sensitive hashing (LSH) so a lookup only
+compares against a handful of candidates, and the estimated Jaccard
+similarity decides whether an earlier verdict can be reused. Long texts are
+signed from a hash-based sample of their shingles (the ones with the
+smallest hashes), so identical and lightly edited copies keep the same
+sample while signing cost stays bounded. Texts without any word shingles
+get no signature and are never matched or indexed.
+
+The index is persisted as an append-only JSON lines file: each new entry is a
+single appended line, and the whole file is read back at startup.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import random
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingle(text: str, size: int) -> List[str]:
+    """
+    Split text into overlapping word shingles, ignoring case and punctuation.
+
+    Args:
+        text: The text to split
+        size: Number of words per shingle
+
+    Returns:
+        The list of shingles (a single shingle for texts shorter than size)
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class SimilarityIndex:
+    """A persistent MinHash LSH index mapping texts to their fact check results."""
+
+    DEFAULT_THRESHOLD = 0.8
+    DEFAULT_NUM_PERM = 128
+    DEFAULT_BANDS = 32
+    DEFAULT_SHINGLE_SIZE = 2
+    DEFAULT_MAX_ENTRIES = 50000
+    DEFAULT_MAX_SHINGLES = 256
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_shingles: int = DEFAULT_MAX_SHINGLES,
+    ):
+        """
+        Initialize the index, loading previously persisted entries from path.
+
+        Args:
+            path: JSON lines file used to persist entries. If None, the index is memory only.
+            threshold: Minimum estimated Jaccard similarity for a match
+            num_perm: Number of MinHash permutations per signature
+            bands: Number of LSH bands; must divide num_perm
+            shingle_size: Number of words per shingle
+            max_entries: Maximum entries kept before the oldest are dropped
+            max_shingles: Maximum shingles per text that go into its signature
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.max_shingles = max_shingles
+
+        # Fixed seed so signatures stay comparable across processes and restarts
+        rng = random.Random(0x5EED)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: The text to summarize
+
+        Returns:
+            A tuple of num_perm minimum hash values, or None if the text has no word shingles
+        """
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in set(shingle(text, self.shingle_size))
+        ]
+        if not hashes:
+            return None
+        if len(hashes) > self.max_shingles:
+            # Signing costs num_perm x shingles; keep a consistent sample of long texts
+            hashes = heapq.nsmallest(self.max_shingles, hashes)
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+            for a, b in self._perms
+        )
+
+    def _bands_of(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        """Split a signature into its LSH band keys."""
+        return [(i, signature[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+
+    def query(self, text: str, namespace: str = "") -> Optional[Tuple[float, Dict[str, Any]]]:
+        """
+        Find the most similar previously indexed text.
+
+        Args:
+            text: The text to look up
+            namespace: Only entries added under the same namespace are considered
+
+        Returns:
+            A (similarity, result) tuple for the best match above the threshold, or None
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        best: Optional[Tuple[float, str]] = None
+        with self._lock:
+            candidates = set()
+            for band in self._bands_of(signature):
+                candidates.update(self._buckets.get(band, ()))
+            for entry_id in candidates:
+                entry = self._entries.get(entry_id)
+                if entry is None or entry["namespace"] != namespace:
+                    continue
+                other = entry["signature"]
+                similarity = sum(1 for x, y in zip(signature, other) if x == y) / self.num_perm
+                if similarity >= self.threshold and (best is None or similarity > best[0]):
+                    best = (similarity, entry["result"])
+        if best is None:
+            return None
+        return best[0], json.loads(best[1])
+
+    def add(self, text: str, result: Dict[str, Any], namespace: str = "") -> None:
+        """
+        Index a text and its fact check result, appending it to the persisted file.
+
+        Args:
+            text: The text that was fact checked
+            result: The fact check result for the text
+            namespace: Namespace the entry belongs to (e.g. model and prompt hash)
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return
+        value = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._insert(signature, value, namespace)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(self._record(signature, value, namespace) + "\n")
+
+    @staticmethod
+    def _record(signature: Tuple[int, ...], value: str, namespace: str) -> str:
+        """Serialize an entry as one JSON line; the result is kept as an encoded string."""
+        return json.dumps({"namespace": namespace, "signature": signature, "result": value}, ensure_ascii=False)
+
+    def _insert(self, signature: Tuple[int, ...], value: str, namespace: str) -> None:
+        """Add a JSON-encoded result to the in-memory index, dropping the oldest beyond max_entries."""
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = {"namespace": namespace, "signature": signature, "result": value}
+        for band in self._bands_of(signature):
+            self._buckets[band].append(entry_id)
+        while len(self._entries) > self.max_entries:
+            old_id, old = self._entries.popitem(last=False)
+            for band in self._bands_of(old["signature"]):
+                bucket = self._buckets.get(band)
+                if bucket is not None:
+                    bucket.remove(old_id)
+                    if not bucket:
+                        del self._buckets[band]
+
+    def _load(self) -> None:
+        """Load persisted entries, compacting the file if it outgrew max_entries."""
+        loaded = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Tolerate a partially written last line after a crash
+                    continue
+                signature = tuple(record["signature"])
+                if len(signature) != self.num_perm:
+                    continue
+                self._insert(signature, record["result"], record.get("namespace", ""))
+                loaded += 1
+        if loaded > len(self._entries):
+            self._rewrite()
+
+    def save(self) -> None:
+        """Rewrite the persisted file with exactly the entries currently indexed."""
+        if not self.path:
+            return
+        with self._lock:
+            self._rewrite()
+
+    def _rewrite(self) -> None:
+        """Atomically replace the persisted file with the in-memory entries."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(self._record(entry["signature"], entry["result"], entry["namespace"]) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
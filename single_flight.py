@@ -0,0 +1,244 @@
+"""
+Single-flight deduplication of concurrent identical fact checks.
+
+While a call for a key is in flight, further calls with the same key wait
+for it and receive a copy of its result instead of starting their own. This
+works across threads (do) and across tasks of an event loop (do_async). If
+the task leading an async call is cancelled (a client disconnected), one of
+the tasks waiting on it takes over and makes the call itself.
+
+With a lock directory, calls are also serialized across worker processes
+through flock()-ed files. The function passed in is expected to look the
+shared result cache up again once it holds the lock, so a worker that waited
+for another worker's call picks the stored result up instead of calling the
+API a second time. Async callers poll the lock on the event loop rather than
+blocking a worker thread while they wait. Lock files are empty and never
+removed, since unlinking one while another process waits on it would let a
+third process lock a fresh file under the same name. Keys are therefore
+striped over a fixed pool of lock files, which keeps the directory bounded;
+unrelated keys that share a stripe are serialized across processes, while
+in-process deduplication stays per key.
+"""
+
+import asyncio
+import copy
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, IO, Optional, Tuple, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process deduplication is available
+    fcntl = None
+
+T = TypeVar("T")
+
+
+class _Call:
+    """An in-flight call that other threads can wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class LeaderCancelled(Exception):
+    """Set on a shared call whose leading task was cancelled; a waiter retries it."""
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one."""
+
+    DEFAULT_LOCK_TIMEOUT = 180.0
+    DEFAULT_LOCK_STRIPES = 256
+    LOCK_POLL_INTERVAL = 0.05  # seconds between attempts to take a cross-process lock
+
+    def __init__(
+        self,
+        lock_dir: Optional[str] = None,
+        lock_timeout: float = DEFAULT_LOCK_TIMEOUT,
+        lock_stripes: int = DEFAULT_LOCK_STRIPES,
+    ):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            lock_dir: Directory for the lock files shared by worker processes.
+                If None (or on platforms without flock), deduplication is in-process only.
+            lock_timeout: Longest time to wait for another process's call before
+                proceeding without the lock
+            lock_stripes: Number of lock files keys are spread over
+        """
+        self.lock_dir = lock_dir if fcntl is not None else None
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        self.lock_timeout = lock_timeout
+        self.lock_stripes = lock_stripes
+        self.leaders = 0
+        self.shared = 0
+        self._calls: Dict[str, _Call] = {}
+        self._futures: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Run fn once for all threads concurrently calling with the same key.
+
+        Args:
+            key: Identifies identical requests
+            fn: Performs the request
+
+        Returns:
+            The result of fn (a deep copy for threads that waited)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            lock_file = self._acquire_file_lock(key)
+            try:
+                call.result = fn()
+            finally:
+                self._release_file_lock(key, lock_file)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn once for all tasks of the running loop concurrently calling with the same key.
+
+        Args:
+            key: Identifies identical requests
+            fn: Coroutine function performing the request
+
+        Returns:
+            The result of fn (a deep copy for tasks that waited)
+        """
+        loop = asyncio.get_running_loop()
+        slot = (id(loop), key)
+        waited = False
+        while True:
+            future = self._futures.get(slot)
+            if future is None:
+                break
+            if not waited:
+                waited = True
+                with self._lock:
+                    self.shared += 1
+            try:
+                return copy.deepcopy(await asyncio.shield(future))
+            except LeaderCancelled:
+                # The first waiter to wake up becomes the new leader, the others wait for it
+                continue
+
+        future = self._futures[slot] = loop.create_future()
+        with self._lock:
+            self.leaders += 1
+        try:
+            lock_file = await self._acquire_file_lock_async(key)
+            try:
+                result = await fn()
+            finally:
+                self._release_file_lock(key, lock_file)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Only this caller gave up; the waiters must not be cancelled with it
+            future.set_exception(LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody was waiting
+            future.exception()
+            raise
+        finally:
+            del self._futures[slot]
+
+    def _lock_path(self, key: str) -> str:
+        """Path of the lock file of the stripe a key belongs to, the same in every process."""
+        stripe = int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big") % self.lock_stripes
+        return os.path.join(self.lock_dir, f"stripe-{stripe:03d}.lock")
+
+    def _open_lock_file(self, key: str) -> Optional[IO]:
+        """Open the lock file of a key, or None without a lock directory."""
+        if not self.lock_dir:
+            return None
+        return open(self._lock_path(key), "a")
+
+    @staticmethod
+    def _try_lock(f: IO) -> bool:
+        """Try to take a lock without blocking."""
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _acquire_file_lock(self, key: str) -> Optional[IO]:
+        """Take the cross-process lock for a key, waiting at most lock_timeout."""
+        f = self._open_lock_file(key)
+        if f is None:
+            return None
+        deadline = time.monotonic() + self.lock_timeout
+        while not self._try_lock(f):
+            if time.monotonic() >= deadline:
+                f.close()
+                return None
+            time.sleep(self.LOCK_POLL_INTERVAL)
+        return f
+
+    async def _acquire_file_lock_async(self, key: str) -> Optional[IO]:
+        """Take the cross-process lock for a key like _acquire_file_lock, polling on the event loop."""
+        f = self._open_lock_file(key)
+        if f is None:
+            return None
+        deadline = time.monotonic() + self.lock_timeout
+        try:
+            while not self._try_lock(f):
+                if time.monotonic() >= deadline:
+                    f.close()
+                    return None
+                await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+        except BaseException:
+            f.close()
+            raise
+        return f
+
+    def _release_file_lock(self, key: str, f: Optional[IO]) -> None:
+        """Release the lock file of a key; the file itself is kept for later callers."""
+        if f is None:
+            return
+        fcntl.flock(f, fcntl.LOCK_UN)
+        f.close()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get counters of calls made and calls answered by another call in flight.
+
+        Returns:
+            A dictionary of counters
+        """
+        with self._lock:
+            return {"leaders": self.leaders, "shared": self.shared, "in_flight": len(self._calls) + len(self._futures)}
@@ -0,0 +1,228 @@
+"""
+Incremental parsing of streamed fact check output.
+
+ClaimStreamParser consumes the model's content chunk by chunk and reports
+parts of the FactCheckResult JSON as soon as they are complete: the
+overall_rating and summary strings, and every object of the claims array
+the moment its closing brace arrives. Anything before the first "{" (leading
+prose or a ```json fence) is skipped.
+
+When the output stops early (for example at the max token limit, leaving the
+claims array unclosed), finish() rebuilds a result from the fields that did
+complete instead of discarding the whole response.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+Event = Tuple[str, Any]
+
+# Top-level string fields reported as soon as their value is complete
+_SCALAR_FIELDS = ("overall_rating", "summary")
+
+# Next character that can change the scanner state, outside and inside strings
+_STRUCTURAL_RE = re.compile(r'["{}\[\],:]')
+_STRING_END_RE = re.compile(r'["\\]')
+
+
+class ClaimStreamParser:
+    """A resumable scanner that emits completed fields of a streamed fact check."""
+
+    def __init__(self):
+        self.done = False
+        self.fields: Dict[str, Any] = {}
+        self.claims: List[Dict[str, Any]] = []
+        self._chunks: List[str] = []
+        # Unscanned tail of the content; _offset is the position of _buf[0] in the content
+        self._buf = ""
+        self._offset = 0
+        self._pos = 0
+        self._start = -1
+        self._end = -1
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key = None
+        self._in_claims = False
+        self._claim_start = -1
+
+    def feed(self, chunk: str) -> List[Event]:
+        """
+        Consume the next chunk of model output.
+
+        Args:
+            chunk: The next piece of the content string
+
+        Returns:
+            (event name, payload) tuples for every field completed by this chunk:
+            ("overall_rating", str), ("summary", str) or ("claim", dict)
+        """
+        self._chunks.append(chunk)
+        events: List[Event] = []
+        if self.done:
+            return events
+        buf = self._buf + chunk
+        i = self._pos
+
+        if self._start < 0:
+            start = buf.find("{", i)
+            if start < 0:
+                self._offset += len(buf)
+                self._buf = ""
+                self._pos = 0
+                return events
+            self._start = self._offset + start
+            i = start
+
+        length = len(buf)
+        while i < length and not self.done:
+            if self._in_string:
+                match = _STRING_END_RE.search(buf, i)
+                if match is None:
+                    i = length
+                    break
+                i = match.start()
+                if buf[i] == "\\":
+                    if i + 1 >= length:
+                        # The escaped character has not arrived yet
+                        break
+                    i += 2
+                    continue
+                self._in_string = False
+                self._on_string(buf[self._string_start:i + 1], events)
+                i += 1
+                continue
+
+            match = _STRUCTURAL_RE.search(buf, i)
+            if match is None:
+                i = length
+                break
+            i = match.start()
+            ch = buf[i]
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == "{" or ch == "[":
+                if self._depth == 1 and ch == "[" and self._key == "claims":
+                    self._in_claims = True
+                elif self._depth == 2 and ch == "{" and self._in_claims:
+                    self._claim_start = i
+                self._depth += 1
+                if ch == "{" and self._depth == 1:
+                    self._expect_key = True
+            elif ch == "}" or ch == "]":
+                self._depth -= 1
+                if self._depth == 2 and ch == "}" and self._claim_start >= 0:
+                    self._emit_claim(buf[self._claim_start:i + 1], events)
+                    self._claim_start = -1
+                elif self._depth == 1 and ch == "]":
+                    self._in_claims = False
+                elif self._depth == 0:
+                    self.done = True
+                    self._end = self._offset + i + 1
+            elif self._depth == 1:
+                self._expect_key = ch == ","
+            i += 1
+
+        # Drop the scanned prefix, keeping any string or claim still being read
+        keep = i
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        if self._claim_start >= 0:
+            keep = min(keep, self._claim_start)
+        self._buf = buf[keep:]
+        self._offset += keep
+        self._pos = i - keep
+        if self._in_string:
+            self._string_start -= keep
+        if self._claim_start >= 0:
+            self._claim_start -= keep
+        return events
+
+    def _on_string(self, raw: str, events: List[Event]) -> None:
+        """Handle a completed JSON string token."""
+        if self._depth != 1:
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        if self._expect_key:
+            self._key = value
+        elif self._key in _SCALAR_FIELDS:
+            self.fields[self._key] = value
+            events.append((self._key, value))
+
+    def _emit_claim(self, raw: str, events: List[Event]) -> None:
+        """Decode a completed claim object and report it."""
+        try:
+            claim = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        if isinstance(claim, dict):
+            self.claims.append(claim)
+            events.append(("claim", claim))
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """
+        Build the final result once all content has been fed.
+
+        A complete JSON object is decoded as is. If the output was cut off or
+        is not valid JSON, the result is rebuilt from the fields and claims
+        that did complete and marked with "truncated": true.
+
+        Returns:
+            The parsed result, or None if no usable JSON was found
+        """
+        if self.done:
+            try:
+                parsed = json.loads(self.content[self._start:self._end])
+                if isinstance(parsed, dict):
+                    return parsed
+            except json.JSONDecodeError:
+                pass
+
+        if not self.claims and not self.fields:
+            return None
+        repaired: Dict[str, Any] = dict(self.fields)
+        repaired["claims"] = list(self.claims)
+        repaired["truncated"] = True
+        return repaired
+
+    @property
+    def content(self) -> str:
+        """The full content consumed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+
+def parse_fact_check(content: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse complete model output into a fact check result.
+
+    Tolerates code fences and leading prose, and keeps the completed claims
+    of truncated output.
+
+    Args:
+        content: The full response content from the API
+
+    Returns:
+        The parsed result, or None if no usable JSON was found
+    """
+    # Fast path: a single well-formed object, possibly wrapped in prose or a code fence
+    start = content.find("{")
+    end = content.rfind("}")
+    if 0 <= start < end:
+        try:
+            parsed = json.loads(content[start:end + 1])
+            if isinstance(parsed, dict):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+
+    parser = ClaimStreamParser()
+    parser.feed(content)
+    return parser.finish()
@@ -0,0 +1,250 @@
+"""
+Per-request timing spans, token usage and process-wide metrics.
+
+Code paths wrap each stage of a fact check in ``span(stage)``. Every span is
+observed in a Prometheus-style histogram (rendered by render_metrics) and,
+when a request has called start_timings, also added to that request's
+Timings so it can be returned in the response. The current Timings lives in
+a context variable, so it follows the request into asyncio tasks and
+asyncio.to_thread workers without being passed around.
+
+Stages: fetch and extract (URL requests), cache_lookup, prompt_build, api
+(the Perplexity round trip including retries), parse, citations and request
+(the whole request). Durations of concurrent sub-requests, as in pipeline
+mode or hedged calls, are summed per stage.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Histogram buckets in seconds, from cache lookups up to slow reasoning calls
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a Prometheus label set."""
+    parts = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """A labelled histogram with cumulative buckets, like a Prometheus histogram."""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str], buckets: Sequence[float] = STAGE_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Record one observation.
+
+        Args:
+            value: The observed value
+            label_values: One value per label, in order
+        """
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Bucket counts, then sum and count
+                series = self._series[label_values] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        """Render the histogram in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                labels = _format_labels(self.labels, label_values, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{labels} {count:g}")
+            labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {values[-1]:g}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{labels} {values[-1]:g}")
+        return lines
+
+
+class Counter:
+    """A labelled monotonically increasing counter."""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str]):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float, *label_values: str) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            amount: The non-negative increment
+            label_values: One value per label, in order
+        """
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        """Render the counter in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("fact_check_stage_seconds", "Time spent in each fact check stage.", ["stage"])
+TOKENS = Counter("fact_check_tokens_total", "Tokens reported by the Perplexity API.", ["model", "type"])
+
+_METRICS = (STAGE_SECONDS, TOKENS)
+
+
+class Timings:
+    """Stage durations and token usage collected for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.usage: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Add time spent in a stage."""
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_usage(self, usage: Dict[str, Any]) -> None:
+        """Add the numeric token counts of an API usage block."""
+        with self._lock:
+            for key, value in usage.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.usage[key] = self.usage.get(key, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Express the timings as a JSON-serializable block.
+
+        Returns:
+            A dictionary with total_ms, per-stage milliseconds and token usage
+        """
+        with self._lock:
+            block: Dict[str, Any] = {
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+                "stages_ms": {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()},
+            }
+            if self.usage:
+                block["usage"] = dict(self.usage)
+        return block
+
+
+_current_timings: ContextVar[Optional[Timings]] = ContextVar("fact_check_timings", default=None)
+
+
+def start_timings(timings: Optional[Timings] = None) -> Timings:
+    """
+    Start collecting timings for the request running in the current context.
+
+    Args:
+        timings: Timings the request already started in another context (as when
+            a streamed response is produced after the handler returned). If None,
+            new Timings are started.
+
+    Returns:
+        The Timings, also available through current_timings()
+    """
+    if timings is None:
+        timings = Timings()
+    _current_timings.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[Timings]:
+    """
+    Get the Timings of the current request.
+
+    Returns:
+        The Timings, or None if start_timings was not called in this context
+    """
+    return _current_timings.get()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time a stage, recording it in the stage histogram and the current request's timings.
+
+    Args:
+        stage: The stage name
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(stage, elapsed)
+
+
+def record_usage(model: Optional[str], usage: Any) -> None:
+    """
+    Record the token usage block of an API response.
+
+    Args:
+        model: The model that answered
+        usage: The response's "usage" object, ignored if missing
+    """
+    if not isinstance(usage, dict):
+        return
+    for key in ("prompt_tokens", "completion_tokens", "citation_tokens", "reasoning_tokens"):
+        value = usage.get(key)
+        if isinstance(value, (int, float)) and value:
+            TOKENS.inc(value, model or "unknown", key[:-len("_tokens")])
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_usage(usage)
+
+
+def render_metrics() -> str:
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Returns:
+        The metrics text
+    """
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def finish_timings(timings: Timings) -> Dict[str, Any]:
+    """
+    Record a request's total duration in the stage histogram.
+
+    Args:
+        timings: The Timings returned by start_timings
+
+    Returns:
+        The request's timings block
+    """
+    STAGE_SECONDS.observe(time.perf_counter() - timings.started, "request")
+    return timings.to_dict()
@@ -0,0 +1,128 @@
+import article_cache
+from article_cache import ArticleCache
+
+
+class StubResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class StubSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+
+def _extract(url, html):
+    return html.upper()
+
+
+def _clock(monkeypatch, start=1000.0):
+    now = [start]
+    monkeypatch.setattr(article_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_fresh_entry_skips_the_network(monkeypatch):
+    now = _clock(monkeypatch)
+    session = StubSession(StubResponse(200, "article"))
+    cache = ArticleCache(ttl=60)
+
+    assert cache.fetch("https://example.com/a?utm_source=x", _extract, session) == "ARTICLE"
+    now[0] += 30
+    assert cache.fetch("https://EXAMPLE.com/a#top", _extract, session) == "ARTICLE"
+
+    assert len(session.calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_stale_entry_is_revalidated_with_validators(monkeypatch):
+    now = _clock(monkeypatch)
+    session = StubSession(
+        StubResponse(200, "article", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        StubResponse(304),
+    )
+    cache = ArticleCache(ttl=60)
+    cache.fetch("https://example.com/a", _extract, session)
+
+    now[0] += 61
+    assert cache.fetch("https://example.com/a", _extract, session) == "ARTICLE"
+
+    assert session.calls[1][1] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert cache.stats()["revalidations"] == 1
+
+    # A 304 renews the entry, so it is fresh again
+    now[0] += 30
+    assert cache.fetch("https://example.com/a", _extract, session) == "ARTICLE"
+    assert len(session.calls) == 2
+
+
+def test_changed_article_is_downloaded_and_extracted_again(monkeypatch):
+    now = _clock(monkeypatch)
+    session = StubSession(
+        StubResponse(200, "old", {"ETag": '"v1"'}),
+        StubResponse(200, "new", {"ETag": '"v2"'}),
+        StubResponse(304),
+    )
+    cache = ArticleCache(ttl=60)
+    cache.fetch("https://example.com/a", _extract, session)
+
+    now[0] += 61
+    assert cache.fetch("https://example.com/a", _extract, session) == "NEW"
+    now[0] += 61
+    assert cache.fetch("https://example.com/a", _extract, session) == "NEW"
+
+    assert session.calls[2][1] == {"If-None-Match": '"v2"'}
+    assert cache.stats()["misses"] == 2
+
+
+def test_empty_extraction_is_not_cached():
+    session = StubSession(StubResponse(200, ""), StubResponse(200, "article"))
+    cache = ArticleCache()
+
+    assert cache.fetch("https://example.com/a", _extract, session) == ""
+    assert cache.fetch("https://example.com/a", _extract, session) == "ARTICLE"
+    assert len(session.calls) == 2
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "articles.db")
+    cache = ArticleCache(db_path=db_path)
+    cache.fetch("https://example.com/a", _extract, StubSession(StubResponse(200, "article")))
+    cache.close()
+
+    session = StubSession()
+    reopened = ArticleCache(db_path=db_path)
+    assert reopened.fetch("https://example.com/a", _extract, session) == "ARTICLE"
+    assert session.calls == []
+    reopened.close()
+
+
+def test_disk_tier_evicts_least_recently_used_beyond_max_bytes(tmp_path, monkeypatch):
+    now = _clock(monkeypatch)
+    cache = ArticleCache(max_entries=1, db_path=str(tmp_path / "articles.db"), max_bytes=25)
+    for name in ("a", "b"):
+        cache.fetch(f"https://example.com/{name}", _extract, StubSession(StubResponse(200, "x" * 10)))
+        now[0] += 1
+    # Touch "a" so "b" is the least recently used
+    cache.fetch("https://example.com/a", _extract, StubSession())
+    now[0] += 1
+    cache.fetch("https://example.com/c", _extract, StubSession(StubResponse(200, "x" * 10)))
+
+    stored = {row[0] for row in cache._db.execute("SELECT url FROM articles")}
+    assert stored == {"https://example.com/a", "https://example.com/c"}
+    cache.close()
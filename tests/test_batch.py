@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+from batch import load_checkpoint, run_batch
+
+
+def _line(record_id, result):
+    return json.dumps({"id": record_id, "result": result}) + "\n"
+
+
+def test_missing_checkpoint_is_empty(tmp_path):
+    assert load_checkpoint(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_partial_last_line_is_truncated(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text(_line(1, {"summary": "ok"}) + '{"id": 2, "res', encoding="utf-8")
+
+    done = load_checkpoint(str(output))
+
+    assert done == {"1"}
+    assert output.read_text(encoding="utf-8") == _line(1, {"summary": "ok"})
+
+
+def test_errors_count_as_done_unless_retried(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text(_line(1, {"summary": "ok"}) + _line(2, {"error": "boom"}), encoding="utf-8")
+
+    assert load_checkpoint(str(output)) == {"1", "2"}
+    assert len(output.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_retried_errors_and_duplicates_are_rewritten(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text(
+        _line("a", {"error": "boom"}) + _line("b", {"error": "boom"}) + _line("a", {"summary": "ok"}),
+        encoding="utf-8",
+    )
+
+    done = load_checkpoint(str(output), retry_errors=True)
+
+    assert done == {'"a"'}
+    assert output.read_text(encoding="utf-8") == _line("a", {"summary": "ok"})
+
+
+class _EchoChecker:
+    def __init__(self):
+        self.checked = []
+
+    async def check_claim(self, text, model=None, use_structured_output=False, cache_only=False):
+        self.checked.append(text)
+        return {"summary": text}
+
+
+def test_resume_skips_finished_records(tmp_path):
+    source = tmp_path / "in.jsonl"
+    source.write_text(
+        "\n".join(json.dumps({"id": i, "text": f"claim {i}"}) for i in range(3)) + "\n", encoding="utf-8"
+    )
+    output = tmp_path / "out.jsonl"
+    output.write_text(_line(0, {"summary": "claim 0"}), encoding="utf-8")
+    checker = _EchoChecker()
+
+    stats = asyncio.run(run_batch(checker, str(source), str(output), workers=2, ordered=True, resume=True))
+
+    assert stats == {"processed": 2, "skipped": 1, "errors": 0}
+    assert sorted(checker.checked) == ["claim 1", "claim 2"]
+    assert [json.loads(line)["id"] for line in output.read_text(encoding="utf-8").splitlines()] == [0, 1, 2]
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from async_fact_checker import AsyncFactChecker
+from fact_check_core import FactChecker, Transport
+from result_cache import ResultCache
+from single_flight import SingleFlight
+
+TEXT = "Water boils at 100 degrees Celsius at sea level."
+RESULT = {
+    "overall_rating": "TRUE",
+    "summary": "Correct.",
+    "claims": [{"claim": TEXT, "rating": "TRUE", "explanation": "Correct.", "sources": []}],
+}
+
+
+class CountingTransport(Transport):
+    """Answers every request with RESULT and counts the calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def post(self, url, data, headers, timeout, total_timeout=None):
+        self.calls += 1
+        return {"model": data["model"], "choices": [{"message": {"content": json.dumps(RESULT)}}]}
+
+
+def _checker(**kwargs):
+    return FactChecker(api_key="test", transport=CountingTransport(), cache=ResultCache(), **kwargs)
+
+
+def _check_sync(checker, text, **kwargs):
+    return checker.check_claim(text, model="sonar", **kwargs)
+
+
+def _check_async(checker, text, **kwargs):
+    async_checker = AsyncFactChecker(checker)
+
+    async def fact_check(text, model, use_structured_output, known_claims=None):
+        return checker._fact_check(text, model, use_structured_output, known_claims)
+
+    async_checker._fact_check = fact_check
+    return asyncio.run(async_checker.check_claim(text, model="sonar", **kwargs))
+
+
+@pytest.fixture(params=[_check_sync, _check_async], ids=["sync", "async"])
+def check(request):
+    return request.param
+
+
+def test_empty_text_is_rejected(check):
+    checker = _checker()
+
+    assert "error" in check(checker, "  ")
+    assert checker.transport.calls == 0
+
+
+def test_result_is_cached(check):
+    checker = _checker()
+
+    first = check(checker, TEXT)
+    second = check(checker, TEXT)
+
+    assert second == first and "error" not in first
+    assert checker.transport.calls == 1
+
+
+def test_cache_only_miss_does_not_call_the_api(check):
+    checker = _checker()
+
+    result = check(checker, TEXT, cache_only=True)
+
+    assert result["cache_miss"]
+    assert checker.transport.calls == 0
+
+
+def test_single_flight_shares_the_check(check, tmp_path):
+    checker = _checker(single_flight=SingleFlight(lock_dir=str(tmp_path)))
+
+    first = check(checker, TEXT)
+    second = check(checker, TEXT)
+
+    assert second == first
+    assert checker.transport.calls == 1
+
+
+def test_flight_leader_sees_results_stored_meanwhile(tmp_path):
+    checker = _checker()
+    result = _check_sync(checker, TEXT)
+    cache_key = ResultCache.make_key(TEXT, "sonar", False, checker.system_prompt)
+
+    # Without single flight the caller just missed the cache, so it is not read again
+    assert checker._flight_cached(cache_key) is None
+    checker.single_flight = SingleFlight(lock_dir=str(tmp_path))
+    assert checker._flight_cached(cache_key) == result
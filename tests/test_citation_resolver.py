@@ -0,0 +1,45 @@
+from article_cache import canonicalize_url
+from citation_resolver import CitationResolver, compact_sources
+
+
+def test_canonicalize_url_drops_tracking_and_normalizes():
+    url = " HTTPS://Example.COM:443/a?utm_source=x&b=2&a=1#top "
+
+    assert canonicalize_url(url) == "https://example.com/a?a=1&b=2"
+    assert canonicalize_url("http://example.com") == "http://example.com/"
+    assert canonicalize_url("http://example.com:8080/x?fbclid=abc") == "http://example.com:8080/x"
+
+
+def test_canonical_unwraps_redirect_wrappers_and_short_links():
+    resolver = CitationResolver({"https://bit.ly/abc": "https://example.com/story?utm_medium=social"})
+
+    wrapped = "https://www.google.com/url?q=https://example.com/story&sa=D"
+
+    assert resolver.canonical(wrapped) == "https://example.com/story"
+    assert resolver.canonical("https://www.google.com/amp/s/example.com/story") == "https://example.com/story"
+    assert resolver.canonical("https://bit.ly/abc") == "https://example.com/story"
+    assert resolver.canonical("http://[::1") == "http://[::1"
+
+
+def test_resolve_sources_expands_references_and_deduplicates():
+    resolver = CitationResolver()
+    citations = ["https://example.com/a", "https://www.example.com/b/"]
+
+    sources = resolver.resolve_sources(
+        ["[1][2]", "http://example.com/a?utm_source=x", "[2, 9]", "WHO report", "who  report"], citations
+    )
+
+    assert sources == ["https://example.com/a", "https://www.example.com/b/", "[9]", "WHO report"]
+
+
+def test_compact_sources_shares_one_table():
+    results = {"claims": [
+        {"claim": "A", "sources": ["https://example.com/a", "https://example.com/b"]},
+        {"claim": "B", "sources": ["http://www.example.com/a/"]},
+    ]}
+
+    compact = compact_sources(results)
+
+    assert compact["sources"] == ["https://example.com/a", "https://example.com/b"]
+    assert [c["source_ids"] for c in compact["claims"]] == [[0, 1], [0]]
+    assert "sources" not in compact["claims"][0]
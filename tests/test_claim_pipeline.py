@@ -0,0 +1,53 @@
+from claim_extraction import extract_claims_locally, split_sentences
+from claim_pipeline import merge_claim_results
+
+
+def _result(*ratings):
+    return {
+        "summary": f"{len(ratings)} checked.",
+        "claims": [
+            {"claim": f"Claim {i}", "rating": rating, "explanation": "", "sources": []}
+            for i, rating in enumerate(ratings)
+        ],
+    }
+
+
+def test_split_sentences():
+    assert split_sentences('He said "it works." Then (he left.") Again!\n\nNew paragraph') == [
+        'He said "it works."',
+        'Then (he left.")',
+        "Again!",
+        "New paragraph",
+    ]
+
+
+def test_extract_claims_locally_prefers_specific_sentences_in_text_order():
+    text = (
+        "I think this is fine. "
+        "The Eiffel Tower in Paris was completed in 1889 for the World's Fair. "
+        "Is that really so surprising to anyone here? "
+        "Around 7 million people visited Paris landmarks in 2023, according to the city."
+    )
+
+    assert extract_claims_locally(text, max_claims=2) == [
+        "The Eiffel Tower in Paris was completed in 1889 for the World's Fair.",
+        "Around 7 million people visited Paris landmarks in 2023, according to the city.",
+    ]
+
+
+def test_merge_computes_overall_rating_and_keeps_failures():
+    merged = merge_claim_results(
+        ["a", "b", "c"],
+        [_result("TRUE"), {"error": "API request failed: timeout"}, _result("TRUE", "FALSE")],
+    )
+
+    assert merged["overall_rating"] == "MOSTLY_TRUE"
+    assert len(merged["claims"]) == 3
+    assert merged["summary"] == "1 checked.\n\n2 checked."
+    assert merged["failed_claims"] == [{"claim": "b", "error": "API request failed: timeout"}]
+
+
+def test_merge_reports_when_every_claim_failed():
+    merged = merge_claim_results(["a"], [{"error": "boom"}])
+
+    assert merged["error"] == "All claim checks failed: boom"
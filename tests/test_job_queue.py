@@ -0,0 +1,64 @@
+import asyncio
+import sqlite3
+
+from job_queue import DONE, JobQueue, SQLiteJobStore
+
+
+class FlakyStore(SQLiteJobStore):
+    """Fails the first claim and the first finish as a locked database would."""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = {"claim": 1, "finish": 1}
+
+    def _maybe_fail(self, name):
+        if self.failures[name]:
+            self.failures[name] -= 1
+            raise sqlite3.OperationalError("database is locked")
+
+    def claim(self, job_id, stale_after, max_attempts):
+        self._maybe_fail("claim")
+        return super().claim(job_id, stale_after, max_attempts)
+
+    def finish(self, job_id, result=None, error=None):
+        self._maybe_fail("finish")
+        super().finish(job_id, result=result, error=error)
+
+
+async def _echo(request):
+    return {"echo": request["text"]}
+
+
+def test_worker_survives_store_errors():
+    async def run():
+        queue = JobQueue(_echo, store=FlakyStore(), workers=1)
+        queue.SCAN_INTERVAL = 0.05
+        try:
+            job = await queue.submit({"text": "first"})
+            first = await queue.wait(job["job_id"], timeout=5)
+            job = await queue.submit({"text": "second"})
+            second = await queue.wait(job["job_id"], timeout=5)
+        finally:
+            await queue.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first["status"] == DONE and first["result"] == {"echo": "first"}
+    assert second["status"] == DONE and second["result"] == {"echo": "second"}
+
+
+def test_polling_process_runs_jobs_submitted_elsewhere(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    job_id = SQLiteJobStore(db_path).add("queued-by-another-process", {"text": "hello"})["job_id"]
+
+    async def run():
+        queue = JobQueue(_echo, store=SQLiteJobStore(db_path), workers=1)
+        try:
+            return await queue.wait(job_id, timeout=5)
+        finally:
+            await queue.close()
+
+    job = asyncio.run(run())
+
+    assert job["status"] == DONE and job["result"] == {"echo": "hello"}
@@ -0,0 +1,66 @@
+from language_detector import LanguageDetector
+
+GERMAN_PARAGRAPH = (
+    "Die Erde ist flach und die Mondlandung wurde von der Regierung gefälscht, behauptet ein Beitrag, "
+    "der tausendfach in sozialen Netzwerken geteilt wurde."
+)
+PORTUGUESE_PARAGRAPH = (
+    "A terra é plana e o homem nunca chegou à lua, segundo os especialistas citados numa publicação "
+    "partilhada milhares de vezes nas redes sociais."
+)
+
+
+def test_detects_profiled_languages():
+    detector = LanguageDetector()
+
+    assert detector.detect("The earth is flat and the moon landing was faked by the government.") == "English"
+    assert detector.detect("Trái đất có hình phẳng và con người chưa bao giờ lên mặt trăng.") == "Vietnamese"
+    assert detector.detect("La tierra es plana y el hombre nunca llegó a la luna según los expertos.") == "Spanish"
+    assert detector.detect("La terre est plate et l'homme n'a jamais marché sur la lune selon les experts.") == "French"
+
+
+def test_detects_script_languages():
+    detector = LanguageDetector()
+
+    assert detector.detect("地球是平的") == "Chinese"
+    assert detector.detect("Земля плоская, и люди никогда не были на Луне.") == "Russian"
+
+
+def test_unprofiled_latin_language_is_undetermined():
+    detector = LanguageDetector()
+
+    assert detector.detect(GERMAN_PARAGRAPH) is None
+    assert detector.detect(PORTUGUESE_PARAGRAPH) is None
+
+
+def test_vietnamese_letters_decide_short_texts():
+    detector = LanguageDetector()
+
+    assert detector.detect("Việt Nam là nước lớn nhất thế giới") == "Vietnamese"
+    assert detector.detect("Ăn tỏi giúp phòng chống virus corona") == "Vietnamese"
+
+
+def test_short_claims_skip_coverage_check():
+    detector = LanguageDetector()
+
+    assert detector.detect("Obama was born in Kenya") == "English"
+    assert detector.detect("Vaccines cause autism") == "English"
+
+
+def test_foreign_letters_make_script_language_undetermined():
+    detector = LanguageDetector()
+
+    assert detector.detect("Земля пласка, і люди ніколи не були на Місяці.") is None
+
+
+def test_text_without_letters_gets_default_language():
+    assert LanguageDetector().detect("1969 - 2024!") == "English"
+
+
+def test_undetermined_result_is_cached():
+    detector = LanguageDetector()
+    text = GERMAN_PARAGRAPH
+
+    assert detector.detect(text) is None
+    assert detector.detect(text) is None
+    assert len(detector._cache) == 1
@@ -0,0 +1,134 @@
+import asyncio
+from types import SimpleNamespace
+
+from async_fact_checker import AsyncFactChecker
+from model_router import ModelRouter
+
+SHORT = "The Earth is flat."
+LONG = "The Earth is flat. " * 100
+
+
+def _warm(router, model, seconds):
+    for _ in range(ModelRouter.MIN_SAMPLES):
+        router.record(model, seconds)
+
+
+def test_routes_by_length():
+    router = ModelRouter()
+
+    assert router.route(SHORT) == "sonar"
+    assert router.route(LONG) == "sonar-pro"
+
+
+def test_latency_budget_avoids_slow_long_model():
+    router = ModelRouter()
+
+    # Static estimate for sonar-pro (15s) until enough calls are observed
+    assert router.route(LONG, latency_budget=10) == "sonar"
+    assert router.route(LONG, latency_budget=20) == "sonar-pro"
+
+    _warm(router, "sonar-pro", 5.0)
+    assert router.route(LONG, latency_budget=10) == "sonar-pro"
+
+
+def test_latency_uses_estimate_until_min_samples():
+    router = ModelRouter()
+    for _ in range(ModelRouter.MIN_SAMPLES - 1):
+        router.record("sonar-pro", 1.0)
+
+    assert router.latency("sonar-pro", 95) == ModelRouter.LATENCY_ESTIMATES["sonar-pro"]
+    assert router.latency("unknown-model", 95) == ModelRouter.DEFAULT_HEDGE_DELAY
+
+    router.record("sonar-pro", 1.0)
+    assert router.latency("sonar-pro", 95) == 1.0
+
+
+def test_latency_percentile_of_recorded_calls():
+    router = ModelRouter()
+    for seconds in range(1, 101):
+        router.record("sonar-pro", float(seconds))
+
+    assert router.latency("sonar-pro", 50) == 50.0
+    assert router.latency("sonar-pro", 95) == 95.0
+
+
+def test_hedge_delay():
+    router = ModelRouter()
+
+    assert router.hedge_delay("sonar") is None
+    assert router.hedge_delay("sonar-pro") == 15.0
+    assert router.hedge_delay("sonar-pro", latency_budget=10) == 5.0
+    assert ModelRouter(hedge_model=None).hedge_delay("sonar-pro") is None
+
+
+def _hedging_checker(router, answers):
+    """An AsyncFactChecker whose calls answer after the given (delay, result) per model."""
+    checker = AsyncFactChecker(SimpleNamespace(router=router))
+    calls = []
+
+    async def fact_check(text, model, use_structured_output, known_claims=None):
+        calls.append(model)
+        delay, result = answers[model]
+        await asyncio.sleep(delay)
+        return dict(result)
+
+    checker._fact_check = fact_check
+    return checker, calls
+
+
+def test_slow_primary_is_hedged_and_hedge_wins():
+    router = ModelRouter()
+    checker, calls = _hedging_checker(router, {
+        "sonar-pro": (1.0, {"summary": "pro"}),
+        "sonar": (0.01, {"summary": "fast"}),
+    })
+
+    result = asyncio.run(checker._hedged_fact_check(LONG, "sonar-pro", False, latency_budget=0.1))
+
+    assert calls == ["sonar-pro", "sonar"]
+    assert result == {"summary": "fast", "hedged_model": "sonar"}
+    assert router.stats()["hedges"] == 1
+    assert router.stats()["hedge_wins"] == 1
+
+
+def test_fast_primary_is_not_hedged():
+    router = ModelRouter()
+    checker, calls = _hedging_checker(router, {
+        "sonar-pro": (0.01, {"summary": "pro"}),
+        "sonar": (0.01, {"summary": "fast"}),
+    })
+
+    result = asyncio.run(checker._hedged_fact_check(LONG, "sonar-pro", False, latency_budget=1.0))
+
+    assert calls == ["sonar-pro"]
+    assert result == {"summary": "pro"}
+    assert router.stats()["hedges"] == 0
+
+
+def test_failed_hedge_falls_back_to_primary():
+    router = ModelRouter()
+    checker, calls = _hedging_checker(router, {
+        "sonar-pro": (0.2, {"summary": "pro"}),
+        "sonar": (0.01, {"error": "API request failed"}),
+    })
+
+    result = asyncio.run(checker._hedged_fact_check(LONG, "sonar-pro", False, latency_budget=0.1))
+
+    assert calls == ["sonar-pro", "sonar"]
+    assert result == {"summary": "pro"}
+    assert router.stats()["hedge_wins"] == 0
+
+
+def test_explicit_model_is_never_hedged():
+    router = ModelRouter()
+    checker, calls = _hedging_checker(router, {
+        "sonar-pro": (0.2, {"summary": "pro"}),
+        "sonar": (0.01, {"summary": "fast"}),
+    })
+
+    result = asyncio.run(
+        checker._hedged_fact_check(LONG, "sonar-pro", False, latency_budget=0.1, allow_hedge=False)
+    )
+
+    assert calls == ["sonar-pro"]
+    assert result == {"summary": "pro"}
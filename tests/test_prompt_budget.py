@@ -0,0 +1,98 @@
+import pytest
+
+from prompt_budget import (
+    DEFAULT_TOKEN_BUDGET,
+    DEFAULT_TOKEN_BUDGETS,
+    MESSAGE_OVERHEAD_TOKENS,
+    budget_for,
+    estimate_tokens,
+    fit_prompt,
+    fit_to_budget,
+    parse_token_budgets,
+)
+
+CLAIM = "The Eiffel Tower in Paris was completed in 1889 and is 330 metres tall."
+
+
+def test_parse_token_budgets():
+    assert parse_token_budgets("") == DEFAULT_TOKEN_BUDGETS
+    assert parse_token_budgets(" 12000 ") == {"*": 12000}
+
+    budgets = parse_token_budgets("sonar=6000, my-model = 0")
+    assert budgets["sonar"] == 6000
+    assert budgets["my-model"] == 0
+    assert budgets["sonar-pro"] == DEFAULT_TOKEN_BUDGETS["sonar-pro"]
+
+
+@pytest.mark.parametrize("spec", ["lots", "sonar=", "sonar=many", "=6000", "sonar=-1", "-5"])
+def test_parse_token_budgets_rejects_malformed_settings(spec):
+    with pytest.raises(ValueError, match="Invalid token budget"):
+        parse_token_budgets(spec)
+
+
+def test_budget_for():
+    assert budget_for("sonar", DEFAULT_TOKEN_BUDGETS) == 8000
+    assert budget_for("unknown-model", DEFAULT_TOKEN_BUDGETS) == DEFAULT_TOKEN_BUDGET
+    assert budget_for("sonar", {"*": 500}) == 500
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("the cat sat") == 3
+    assert estimate_tokens("1889!") == 3
+    assert estimate_tokens("地球是平的") == 5
+
+
+def test_text_within_budget_is_untouched():
+    assert fit_to_budget(CLAIM, 1000) == (CLAIM, None)
+
+
+def test_boilerplate_and_repeated_paragraphs_are_dropped_first():
+    text = "\n\n".join([
+        "Tower turns 135",
+        CLAIM,
+        "Subscribe to our newsletter for more stories.",
+        "Share on",
+        CLAIM,
+    ])
+
+    trimmed, report = fit_to_budget(text, estimate_tokens(text) - 1)
+
+    assert trimmed == "Tower turns 135\n\n" + CLAIM
+    assert report["dropped"]["boilerplate_paragraphs"] == 2
+    assert report["dropped"]["duplicate_paragraphs"] == 1
+    assert report["dropped"]["sentences"] == 0
+    assert report["final_tokens"] == estimate_tokens(trimmed)
+    assert report["dropped"]["tokens"] == report["original_tokens"] - report["final_tokens"]
+
+
+def test_opening_and_claim_dense_sentences_are_kept_in_order():
+    opening = "Officials spoke about the city on Monday."
+    filler = " ".join(f"People said many things about it {word}." for word in ("again", "today", "there"))
+    text = f"{opening} {filler} {CLAIM}"
+    budget = estimate_tokens(opening) + estimate_tokens(CLAIM) + 2
+
+    trimmed, report = fit_to_budget(text, budget)
+
+    assert trimmed == f"{opening} {CLAIM}"
+    assert report["dropped"]["sentences"] == 3
+    assert report["final_tokens"] <= budget
+
+
+def test_fit_prompt_counts_prompts_against_the_budget():
+    text = " ".join([CLAIM] * 40)
+    prompt = "word " * 300
+
+    trimmed, report = fit_prompt(text, "sonar", {"sonar": 600}, prompt)
+
+    assert report["token_budget"] == 600
+    assert report["final_tokens"] <= 600
+    assert report["original_tokens"] == estimate_tokens(text) + estimate_tokens(prompt) + MESSAGE_OVERHEAD_TOKENS
+    # Repeated sentences are dropped before anything else
+    assert trimmed == CLAIM
+
+
+def test_zero_budget_disables_trimming():
+    text = " ".join([CLAIM] * 40)
+
+    assert fit_prompt(text, "sonar", {"sonar": 0}, "prompt") == (text, None)
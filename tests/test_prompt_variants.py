@@ -0,0 +1,20 @@
+from prompt_variants import FALLBACK_SYSTEM_PROMPT, PromptVariants
+
+
+def test_language_variant_replaces_generic_rules_but_keeps_fallback():
+    variants = PromptVariants(FALLBACK_SYSTEM_PROMPT)
+
+    prompt, _ = variants.get("Vietnamese")
+
+    assert "Detect the language of the input" not in prompt
+    assert "The input text is in Vietnamese." in prompt
+    assert "respond in the language it is written in instead" in prompt
+
+
+def test_undetermined_language_gets_compact_prompt():
+    variants = PromptVariants(FALLBACK_SYSTEM_PROMPT)
+
+    prompt, prompt_hash = variants.get(None)
+
+    assert "Detect the language of the input" in prompt
+    assert (prompt, prompt_hash) == (variants.base, variants.base_hash)
@@ -0,0 +1,76 @@
+import pytest
+
+from request_scheduler import DeadlineExceeded, RequestScheduler, RetryableError, TokenBucket, parse_retry_after
+
+
+def test_token_bucket_allows_burst_then_spaces_requests():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.reserve(0) == 0
+    assert bucket.reserve(0) == 0
+    assert bucket.reserve(0) is None  # nothing reserved when the wait is too long
+    wait = bucket.reserve(1)
+    assert 0.09 < wait <= 0.1
+    assert 0.19 < bucket.reserve(1) <= 0.2
+
+
+def test_token_bucket_pause_delays_reservations():
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.pause(2)
+
+    assert bucket.reserve(1) is None
+    assert 1.9 < bucket.reserve(3) <= 2
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after("-1") == 0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_run_retries_retryable_errors():
+    scheduler = RequestScheduler(rate_limit=0, max_retries=2, base_delay=0.001)
+    attempts = []
+
+    def send(remaining):
+        attempts.append(remaining)
+        if len(attempts) < 3:
+            raise RetryableError("503 Service Unavailable", status=503)
+        return "ok"
+
+    assert scheduler.run(send) == "ok"
+    assert len(attempts) == 3
+
+
+def test_run_gives_up_after_max_retries():
+    scheduler = RequestScheduler(rate_limit=0, max_retries=1, base_delay=0.001)
+    attempts = []
+
+    def send(remaining):
+        attempts.append(remaining)
+        raise RetryableError("429 Too Many Requests", status=429)
+
+    with pytest.raises(RetryableError):
+        scheduler.run(send)
+    assert len(attempts) == 2
+
+
+def test_run_does_not_wait_past_the_deadline():
+    scheduler = RequestScheduler(rate_limit=0, max_retries=3, deadline=0.5)
+
+    def send(remaining):
+        assert remaining <= 0.5
+        raise RetryableError("429 Too Many Requests", status=429, retry_after=10)
+
+    with pytest.raises(RetryableError):
+        scheduler.run(send)
+
+
+def test_rate_limit_wait_past_the_deadline_is_refused():
+    scheduler = RequestScheduler(rate_limit=60, burst=1, deadline=0.5)
+    scheduler.run(lambda remaining: "first")
+
+    with pytest.raises(DeadlineExceeded):
+        scheduler.run(lambda remaining: "second")
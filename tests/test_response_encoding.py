@@ -0,0 +1,110 @@
+import gzip
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import response_encoding
+from response_encoding import compress, dumps, encode_response, negotiate_encoding
+
+PAYLOAD = {
+    "overall_rating": "FALSE",
+    "claims": [{"claim": "Trái đất phẳng", "explanation": "Hình ảnh vệ tinh cho thấy Trái đất hình cầu. " * 40}],
+}
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "json"])
+def serializer(request, monkeypatch):
+    if request.param:
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(response_encoding, "USE_ORJSON", request.param)
+    return request.param
+
+
+@pytest.fixture
+def fake_brotli(monkeypatch):
+    """Installs a stand-in brotli module that tags its output."""
+    module = SimpleNamespace(compress=lambda body, quality: b"br:" + body)
+    monkeypatch.setattr(response_encoding, "brotli", module)
+    monkeypatch.setattr(response_encoding, "SUPPORTED_ENCODINGS", ("br", "gzip"))
+    return module
+
+
+@pytest.fixture
+def no_brotli(monkeypatch):
+    monkeypatch.setattr(response_encoding, "brotli", None)
+    monkeypatch.setattr(response_encoding, "SUPPORTED_ENCODINGS", ("gzip",))
+
+
+def test_dumps_is_compact_utf8(serializer):
+    body = dumps({"claim": "Trái đất", "n": 1})
+
+    assert body == '{"claim":"Trái đất","n":1}'.encode("utf-8")
+
+
+def test_dumps_pretty_is_indented(serializer):
+    body = dumps({"claim": "x", "n": 1}, pretty=True)
+
+    assert body.decode("utf-8").splitlines() == ["{", '  "claim": "x",', '  "n": 1', "}"]
+
+
+def test_negotiation_prefers_brotli(fake_brotli):
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert negotiate_encoding("br;q=0, gzip") == "gzip"
+    assert negotiate_encoding("*") == "br"
+
+
+def test_negotiation_without_acceptable_encoding(fake_brotli):
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("deflate, *;q=0") is None
+    assert negotiate_encoding("gzip;q=bogus") is None
+
+
+def test_negotiation_falls_back_without_brotli(no_brotli):
+    assert negotiate_encoding("br, gzip") == "gzip"
+    assert negotiate_encoding("br") is None
+
+
+def test_large_body_is_gzipped(serializer):
+    body, headers = encode_response(PAYLOAD, "gzip")
+
+    assert headers == {"Vary": "Accept-Encoding", "Content-Encoding": "gzip"}
+    assert json.loads(gzip.decompress(body)) == PAYLOAD
+
+
+def test_large_body_is_brotli_compressed(fake_brotli):
+    body, headers = encode_response(PAYLOAD, "br, gzip")
+
+    assert headers["Content-Encoding"] == "br"
+    assert json.loads(body[len(b"br:"):]) == PAYLOAD
+
+
+def test_brotli_round_trip():
+    brotli = pytest.importorskip("brotli")
+    body = dumps(PAYLOAD)
+
+    assert brotli.decompress(compress(body, "br")) == body
+
+
+def test_identity_when_brotli_is_not_installed(no_brotli):
+    body, headers = encode_response(PAYLOAD, "br")
+
+    assert "Content-Encoding" not in headers
+    assert json.loads(body) == PAYLOAD
+
+
+def test_small_body_is_not_compressed():
+    body, headers = encode_response({"overall_rating": "TRUE"}, "gzip")
+
+    assert headers == {"Vary": "Accept-Encoding"}
+    assert json.loads(body) == {"overall_rating": "TRUE"}
+
+
+def test_gzip_output_is_deterministic():
+    body = dumps(PAYLOAD)
+
+    assert compress(body, "gzip") == compress(body, "gzip")
+    assert compress(body, None) is body
@@ -0,0 +1,105 @@
+import result_cache
+from result_cache import ResultCache
+
+
+def _result(rating="FALSE"):
+    return {"overall_rating": rating, "summary": "Checked.", "claims": []}
+
+
+def test_make_key_ignores_whitespace_but_not_model():
+    key = ResultCache.make_key("The Earth  is flat.", "sonar-pro", False, "prompt")
+
+    assert key == ResultCache.make_key(" The Earth is\nflat. ", "sonar-pro", False, "prompt")
+    assert key != ResultCache.make_key("The Earth is flat.", "sonar", False, "prompt")
+    assert key != ResultCache.make_key("The Earth is flat.", "sonar-pro", True, "prompt")
+    assert key != ResultCache.make_key("The Earth is flat.", "sonar-pro", False, "other prompt")
+
+
+def test_get_returns_independent_copies():
+    cache = ResultCache()
+    cache.set("key", _result())
+
+    first = cache.get("key")
+    first["overall_rating"] = "TRUE"
+
+    assert cache.get("key")["overall_rating"] == "FALSE"
+    assert cache.stats()["hits"] == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    cache = ResultCache(ttl=60)
+    cache.set("default", _result())
+    cache.set("short", _result(), ttl=10)
+
+    now[0] += 30
+    assert cache.get("short") is None
+    assert cache.get("default") is not None
+
+    now[0] += 31
+    assert cache.get("default") is None
+    assert cache.stats()["memory_entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.set("a", _result())
+    cache.set("b", _result())
+    cache.get("a")
+    cache.set("c", _result())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disk_tier_survives_restart_and_refills_memory(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    cache = ResultCache(db_path=db_path)
+    cache.set("key", _result("TRUE"))
+    cache.close()
+
+    reopened = ResultCache(db_path=db_path)
+    assert reopened.get("key")["overall_rating"] == "TRUE"
+    assert reopened.stats()["disk_hits"] == 1
+
+    assert reopened.get("key") is not None
+    assert reopened.stats()["disk_hits"] == 1
+    reopened.close()
+
+
+def test_evicted_entry_is_still_on_disk(tmp_path):
+    cache = ResultCache(max_entries=1, db_path=str(tmp_path / "results.db"))
+    cache.set("a", _result())
+    cache.set("b", _result())
+
+    assert cache.get("a") is not None
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+
+def test_expired_disk_entry_is_deleted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    db_path = str(tmp_path / "results.db")
+    cache = ResultCache(ttl=60, db_path=db_path)
+    cache.set("key", _result())
+    cache.close()
+
+    now[0] += 61
+    reopened = ResultCache(db_path=db_path)
+    assert reopened.get("key") is None
+    assert reopened._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
+    reopened.close()
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    cache = ResultCache(db_path=str(tmp_path / "results.db"))
+    cache.set("key", _result())
+    cache.clear()
+
+    assert cache.get("key") is None
+    assert cache.stats()["misses"] == 1
+    cache.close()
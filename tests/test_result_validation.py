@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from result_validation import compute_overall_rating, validate_claim, validate_result, validate_result_json
+
+
+@pytest.mark.parametrize(
+    "ratings, expected",
+    [
+        (["TRUE", "TRUE", "FALSE"], "MOSTLY_TRUE"),
+        (["TRUE", "FALSE", "MISLEADING"], "MOSTLY_FALSE"),
+        (["TRUE", "FALSE"], "MIXED"),
+        (["true", "UNVERIFIABLE", "UNVERIFIABLE"], "MOSTLY_TRUE"),
+        (["UNVERIFIABLE"], "MIXED"),
+        ([], "MIXED"),
+    ],
+)
+def test_compute_overall_rating(ratings, expected):
+    assert compute_overall_rating(ratings) == expected
+
+
+def test_valid_result_is_kept_with_extra_fields():
+    result = {
+        "overall_rating": "MOSTLY_FALSE",
+        "summary": "Wrong.",
+        "claims": [
+            {"claim": "The Earth is flat.", "rating": "FALSE", "explanation": "No.", "sources": ["a"], "reused": True}
+        ],
+        "reused_claims": 1,
+    }
+
+    assert validate_result(result) == result
+
+
+def test_nonstandard_values_are_normalized():
+    result = validate_result({
+        "overall_rating": "True",
+        "summary": "Mostly right.",
+        "claims": [
+            {"claim": "A", "rating": "Partly true", "explanation": "Context.", "sources": "https://example.com"},
+            {"claim": "B", "rating": "mostly-false", "explanation": "No.", "sources": []},
+            {"claim": "C", "rating": "who knows", "explanation": "", "sources": []},
+        ],
+    })
+
+    assert result["overall_rating"] == "MOSTLY_TRUE"
+    assert [c["rating"] for c in result["claims"]] == ["MISLEADING", "FALSE", "UNVERIFIABLE"]
+    assert result["claims"][0]["sources"] == ["https://example.com"]
+
+
+def test_broken_result_is_repaired():
+    result = validate_result({
+        "overall_rating": "Unclear",
+        "claims": [{"claim": "A", "rating": "TRUE"}, {"rating": "FALSE"}, "B is true", {"claim": "  "}],
+    })
+
+    assert result["overall_rating"] == "MOSTLY_TRUE"
+    assert result["summary"] == ""
+    assert [(c["claim"], c["rating"]) for c in result["claims"]] == [("A", "TRUE"), ("B is true", "UNVERIFIABLE")]
+    assert all(c["explanation"] == "" and c["sources"] == [] for c in result["claims"])
+
+
+def test_validate_result_json():
+    content = json.dumps({"overall_rating": "MIXED", "summary": "s", "claims": [{"claim": "A", "rating": "False"}]})
+
+    result = validate_result_json(content)
+
+    assert result["claims"] == [{"claim": "A", "rating": "FALSE", "explanation": "", "sources": []}]
+    assert validate_result_json('{"overall_rating": "MIX') is None
+    assert "error" in validate_result_json("[1, 2]")
+    assert "error" in validate_result([1, 2])
+
+
+def test_validate_claim():
+    claim = validate_claim({"claim": "A", "rating": "accurate", "explanation": "Yes.", "sources": []})
+
+    assert claim["rating"] == "TRUE"
+    assert validate_claim({"rating": "TRUE"}) is None
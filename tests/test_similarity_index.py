@@ -0,0 +1,108 @@
+from similarity_index import SimilarityIndex, shingle
+
+TEXT = (
+    "The city council voted on Tuesday to close the old bridge for repairs after "
+    "inspectors found serious cracks in two of its main support beams last month."
+)
+EDITED = TEXT.replace("Tuesday", "Wednesday")
+UNRELATED = "Water boils at one hundred degrees Celsius at sea level under normal pressure."
+
+
+def _result(rating="FALSE"):
+    return {"overall_rating": rating, "summary": "Checked.", "claims": []}
+
+
+def test_shingle_ignores_case_and_punctuation():
+    assert shingle("The Earth, is FLAT!", 2) == ["the earth", "earth is", "is flat"]
+    assert shingle("Flat.", 2) == ["flat"]
+    assert shingle("...", 2) == []
+
+
+def test_query_finds_identical_and_lightly_edited_text():
+    index = SimilarityIndex()
+    index.add(TEXT, _result("TRUE"))
+
+    similarity, result = index.query(TEXT)
+    assert similarity == 1.0
+    assert result["overall_rating"] == "TRUE"
+
+    match = index.query(EDITED)
+    assert match is not None
+    assert match[0] >= index.threshold
+
+
+def test_query_misses_unrelated_text():
+    index = SimilarityIndex()
+    index.add(TEXT, _result())
+
+    assert index.query(UNRELATED) is None
+
+
+def test_threshold_decides_match():
+    loose = SimilarityIndex(threshold=0.5)
+    strict = SimilarityIndex(threshold=1.0)
+    for index in (loose, strict):
+        index.add(TEXT, _result())
+
+    assert loose.query(EDITED) is not None
+    assert strict.query(EDITED) is None
+
+
+def test_namespaces_are_isolated():
+    index = SimilarityIndex()
+    index.add(TEXT, _result(), namespace="sonar|0|abc")
+
+    assert index.query(TEXT, namespace="sonar|0|abc") is not None
+    assert index.query(TEXT, namespace="sonar-pro|0|abc") is None
+    assert index.query(TEXT) is None
+
+
+def test_text_without_words_is_not_indexed():
+    index = SimilarityIndex()
+    index.add("!!! ???", _result())
+
+    assert len(index) == 0
+    assert index.query("!!! ???") is None
+
+
+def test_oldest_entries_are_dropped_beyond_max_entries():
+    index = SimilarityIndex(max_entries=1)
+    index.add(TEXT, _result())
+    index.add(UNRELATED, _result())
+
+    assert len(index) == 1
+    assert index.query(TEXT) is None
+    assert index.query(UNRELATED) is not None
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    SimilarityIndex(path=path).add(TEXT, _result("TRUE"), namespace="ns")
+
+    reopened = SimilarityIndex(path=path)
+    assert len(reopened) == 1
+    assert reopened.query(TEXT, namespace="ns")[1]["overall_rating"] == "TRUE"
+
+
+def test_load_tolerates_truncated_last_line(tmp_path):
+    path = tmp_path / "index.jsonl"
+    SimilarityIndex(path=str(path)).add(TEXT, _result())
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"namespace": "", "signature": [1, 2')
+
+    reopened = SimilarityIndex(path=str(path))
+    assert len(reopened) == 1
+    assert reopened.query(TEXT) is not None
+
+
+def test_load_compacts_file_beyond_max_entries(tmp_path):
+    path = tmp_path / "index.jsonl"
+    writer = SimilarityIndex(path=str(path))
+    writer.add(TEXT, _result())
+    writer.add(UNRELATED, _result())
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+
+    reopened = SimilarityIndex(path=str(path), max_entries=1)
+    assert len(reopened) == 1
+    assert reopened.query(UNRELATED) is not None
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 1
@@ -0,0 +1,57 @@
+import asyncio
+import os
+
+from single_flight import SingleFlight
+
+
+def test_cross_process_lock_serializes_calls_and_keeps_lock_file(tmp_path):
+    # Two instances sharing a lock directory stand in for two worker processes
+    first = SingleFlight(lock_dir=str(tmp_path))
+    second = SingleFlight(lock_dir=str(tmp_path))
+    order = []
+
+    async def call(flight, name):
+        async def fn():
+            order.append(f"{name} start")
+            await asyncio.sleep(0.1)
+            order.append(f"{name} end")
+            return name
+
+        return await flight.do_async("key", fn)
+
+    async def run():
+        leader = asyncio.ensure_future(call(first, "first"))
+        await asyncio.sleep(0.02)
+        return await asyncio.gather(leader, call(second, "second"))
+
+    assert asyncio.run(run()) == ["first", "second"]
+    assert order == ["first start", "first end", "second start", "second end"]
+    assert os.listdir(tmp_path) == [os.path.basename(first._lock_path("key"))]
+
+
+def test_lock_files_are_striped_over_a_fixed_pool(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path), lock_stripes=4)
+
+    for i in range(50):
+        flight.do(f"key {i}", lambda: None)
+
+    assert len(os.listdir(tmp_path)) <= 4
+    assert flight._lock_path("key 1") == SingleFlight(lock_dir=str(tmp_path), lock_stripes=4)._lock_path("key 1")
+
+
+def test_async_lock_wait_times_out_without_blocking_the_loop(tmp_path):
+    holder = SingleFlight(lock_dir=str(tmp_path))
+    waiter = SingleFlight(lock_dir=str(tmp_path), lock_timeout=0.2)
+    lock_file = holder._acquire_file_lock("key")
+
+    async def run():
+        waiting = asyncio.ensure_future(waiter._acquire_file_lock_async("key"))
+        # The loop stays responsive while the other lock is held
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        return await waiting
+
+    try:
+        assert asyncio.run(run()) is None
+    finally:
+        holder._release_file_lock("key", lock_file)
@@ -0,0 +1,67 @@
+import json
+
+from stream_parser import ClaimStreamParser, parse_fact_check
+
+RESULT = {
+    "overall_rating": "MIXED",
+    "summary": "One claim holds, one does not {or so it seems}.",
+    "claims": [
+        {
+            "claim": "The Earth is flat.",
+            "rating": "FALSE",
+            "explanation": "It is an \"oblate\" spheroid.",
+            "sources": [],
+        },
+        {"claim": "Water boils at 100 °C.", "rating": "TRUE", "explanation": "At sea level.", "sources": ["a"]},
+    ],
+}
+CONTENT = "Here is the result:\n```json\n" + json.dumps(RESULT, ensure_ascii=False) + "\n```"
+
+
+def _feed_in_chunks(parser, content, size):
+    events = []
+    for start in range(0, len(content), size):
+        events.extend(parser.feed(content[start:start + size]))
+    return events
+
+
+def test_events_arrive_as_fields_complete_regardless_of_chunking():
+    for size in (1, 3, 17, len(CONTENT)):
+        parser = ClaimStreamParser()
+
+        events = _feed_in_chunks(parser, CONTENT, size)
+
+        assert events == [
+            ("overall_rating", "MIXED"),
+            ("summary", RESULT["summary"]),
+            ("claim", RESULT["claims"][0]),
+            ("claim", RESULT["claims"][1]),
+        ]
+        assert parser.finish() == RESULT
+
+
+def test_claim_is_reported_before_the_output_ends():
+    parser = ClaimStreamParser()
+    first_claim_end = CONTENT.index("}", CONTENT.index('"claims"')) + 1
+
+    events = parser.feed(CONTENT[:first_claim_end])
+
+    assert events[-1] == ("claim", RESULT["claims"][0])
+
+
+def test_truncated_output_keeps_completed_claims():
+    cut = CONTENT.index('"Water boils')
+
+    parsed = parse_fact_check(CONTENT[:cut])
+
+    assert parsed == {
+        "overall_rating": "MIXED",
+        "summary": RESULT["summary"],
+        "claims": [RESULT["claims"][0]],
+        "truncated": True,
+    }
+
+
+def test_output_without_json_is_not_parsed():
+    assert parse_fact_check("I could not check this text.") is None
+    assert parse_fact_check('{"overall_rating": "MIX') is None
@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fact_check_core import RequestsTransport
+from request_scheduler import RetryableError
+
+BODY = json.dumps({"choices": [{"message": {"content": "x" * 400}}]}).encode("utf-8")
+
+
+class _TrickleHandler(BaseHTTPRequestHandler):
+    """Sends the body a few bytes at a time, each write well within the read timeout."""
+
+    delay = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        for start in range(0, len(BODY), 8):
+            self.wfile.write(BODY[start:start + 8])
+            self.wfile.flush()
+            time.sleep(self.delay)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _TrickleHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(httpd):
+    return f"http://127.0.0.1:{httpd.server_address[1]}/chat/completions"
+
+
+def test_post_returns_decoded_body(server):
+    _TrickleHandler.delay = 0.0
+    transport = RequestsTransport()
+
+    assert transport.post(_url(server), {}, {}, (1, 1), total_timeout=5) == json.loads(BODY)
+
+
+def test_post_stops_a_trickling_response_at_the_total_timeout(server):
+    _TrickleHandler.delay = 0.05
+    transport = RequestsTransport()
+    start = time.monotonic()
+
+    with pytest.raises(RetryableError):
+        transport.post(_url(server), {}, {}, (1, 1), total_timeout=0.3)
+
+    assert time.monotonic() - start < 1.0
@@ -0,0 +1,102 @@
+from verdict_store import VerdictStore, merge_known_claims, reused_claim
+
+
+def _claim(text, rating="FALSE"):
+    return {"claim": text, "rating": rating, "explanation": "Checked.", "sources": []}
+
+
+def test_known_claims_finds_short_sentence():
+    store = VerdictStore()
+    store.add_claims([_claim("The Earth is flat.")])
+
+    known, complete = store.known_claims("The Earth is flat.")
+
+    assert complete
+    assert [claim["claim"] for claim in known] == ["The Earth is flat."]
+    assert known[0]["rating"] == "FALSE"
+
+
+def test_known_claims_incomplete_with_unknown_sentence():
+    store = VerdictStore()
+    store.add_claims([_claim("The Earth is flat.")])
+
+    known, complete = store.known_claims("The Earth is flat. Water boils at 100 degrees Celsius at sea level.")
+
+    assert not complete
+    assert [claim["claim"] for claim in known] == ["The Earth is flat."]
+
+
+def test_verdicts_are_namespaced():
+    store = VerdictStore()
+    store.add_claims([_claim("The Earth is flat.")], namespace="sonar|0|abc")
+
+    assert store.lookup(["The Earth is flat."], "sonar|0|abc")
+    assert not store.lookup(["The Earth is flat."], "sonar-pro|0|abc")
+    assert not store.lookup(["The Earth is flat."])
+
+
+def test_paraphrased_claim_is_stored_under_its_sentence():
+    store = VerdictStore()
+    text = "Some people say the Earth is flat. Water boils at 100 degrees Celsius at sea level."
+    stored = store.add_claims(
+        [
+            _claim("The Earth is flat"),
+            _claim("Water boils at 100 °C at sea level", rating="TRUE"),
+            _claim("Penguins can fly over the Atlantic"),
+        ],
+        text,
+    )
+
+    known, complete = store.known_claims(text)
+
+    assert stored == 2
+    assert complete
+    assert [claim["rating"] for claim in known] == ["FALSE", "TRUE"]
+    assert not store.lookup(["The Earth is flat"])
+
+
+def test_sentence_split_into_several_claims_is_not_stored():
+    store = VerdictStore()
+    text = "The Earth is flat and the Moon is made of cheese. Water boils at 100 degrees Celsius at sea level."
+
+    stored = store.add_claims([_claim("The Earth is flat and the Moon"), _claim("the Moon is made of cheese")], text)
+
+    assert stored == 0
+
+
+def test_merge_known_claims_skips_restated_claim():
+    results = {"claims": [_claim("The Earth is flat", rating="FALSE")]}
+    known = [
+        reused_claim("Some people say the Earth is flat.", _claim("x")),
+        reused_claim("Water boils at 100 degrees Celsius at sea level.", _claim("x", rating="TRUE")),
+    ]
+
+    merge_known_claims(results, known)
+
+    assert [claim["claim"] for claim in results["claims"]] == [
+        "The Earth is flat",
+        "Water boils at 100 degrees Celsius at sea level.",
+    ]
+    assert results["reused_claims"] == 1
+
+
+def test_context_dependent_sentences_are_not_reused():
+    store = VerdictStore()
+    text = "He was born in 1990. The company denied it."
+
+    stored = store.add_claims([_claim("He was born in 1990."), _claim("The company denied it.")], text)
+    known, complete = store.known_claims(text)
+
+    assert stored == 0
+    assert known == [] and not complete
+    assert not store.lookup(["He was born in 1990."])
+
+
+def test_text_with_context_dependent_sentence_is_incomplete():
+    store = VerdictStore()
+    store.add_claims([_claim("The Earth is flat."), _claim("This was proven in 1990.")])
+
+    known, complete = store.known_claims("The Earth is flat. This was proven in 1990.")
+
+    assert [claim["claim"] for claim in known] == ["The Earth is flat."]
+    assert not complete
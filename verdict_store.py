@@ -0,0 +1,419 @@
+"""
+Per-claim verdict store for reusing fact checks across articles.
+
+Articles often repeat the same claims (a statistic from a press release, a
+popular myth), while the result cache only matches whole texts. VerdictStore
+keeps the verdict (rating, explanation, sources and when it was checked) of
+every claim the API rated, keyed by its normalized text, in memory or in a
+SQLite file, and looks lists of claims up in bulk. Verdicts are namespaced
+by the model, structured output flag and system prompt of the request, like
+result cache keys, so one configuration never reuses another's verdicts.
+A returned claim is stored under the input sentence it was checked from, the
+text later lookups use, rather than under the model's rewording of it. The
+fact checkers use it in three places:
+
+- a text whose sentences are all known claims is answered from the store
+  without calling the API
+- for other texts, the known claims among the candidate claims are listed in
+  the prompt as already verified, and their verdicts are merged into the
+  results afterwards (marked "reused")
+- the claim pipeline only sends sub-requests for claims it does not know
+
+UNVERIFIABLE verdicts are not stored, since new evidence may settle them.
+Neither are sentences that depend on their context ("He was born in 1990.",
+"The company denied it."): the same words make a different claim in another
+article, so they are always checked again.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from claim_extraction import split_sentences
+from result_cache import normalize_text
+from result_validation import compute_overall_rating
+
+# Sentences of one text looked up in the store
+MAX_LOOKUP_CLAIMS = 32
+# Ratings worth remembering
+STORED_RATINGS = ("TRUE", "FALSE", "MISLEADING")
+
+SKIP_INSTRUCTION = (
+    "\n\nThe following claims from the text were already fact checked. "
+    "Do not check or list them again; check only the remaining claims:\n"
+)
+
+# Dice similarity of word sets above which a claim is taken to restate a sentence
+MIN_SENTENCE_SIMILARITY = 0.6
+
+# Words below which a sentence is too short to make a claim of its own
+MIN_CLAIM_WORDS = 3
+# Words referring to something named elsewhere in the text
+CONTEXT_WORDS = frozenset((
+    "he", "she", "it", "they", "him", "her", "them", "his", "hers", "its", "their", "theirs",
+    "i", "me", "my", "we", "us", "our", "you", "your",
+))
+# Words that refer back to the context when they open a sentence
+CONTEXT_OPENERS = CONTEXT_WORDS | {"this", "that", "these", "those", "such", "there", "here", "then"}
+
+_TRIM_CHARS = " \"'“”‘’«».,!?;:"
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+# SQLite limits the number of parameters of one statement
+_LOOKUP_CHUNK = 500
+
+
+def claim_key(claim: str, namespace: str = "") -> str:
+    """
+    Build the store key of a claim.
+
+    Args:
+        claim: The claim text
+        namespace: The request configuration the verdict belongs to (see
+            FactChecker.result_namespace)
+
+    Returns:
+        Hex SHA-256 digest of the namespace and the claim, normalized and
+        without surrounding quotes and punctuation
+    """
+    normalized = normalize_text(claim).casefold().strip(_TRIM_CHARS)
+    return hashlib.sha256(f"{namespace}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+def _words(text: str) -> set:
+    """Get the set of casefolded words of a text."""
+    return set(_WORD_RE.findall(normalize_text(text).casefold()))
+
+
+def is_self_contained(sentence: str) -> bool:
+    """
+    Check whether a sentence makes the same claim in any text.
+
+    Args:
+        sentence: A sentence or claim
+
+    Returns:
+        False if it has fewer than MIN_CLAIM_WORDS words, opens with a
+        pronoun or demonstrative, or uses a pronoun anywhere, else True
+    """
+    words = _WORD_RE.findall(normalize_text(sentence).casefold())
+    if len(words) < MIN_CLAIM_WORDS or words[0] in CONTEXT_OPENERS:
+        return False
+    return not CONTEXT_WORDS.intersection(words)
+
+
+def match_sentence(claim: str, sentences: List[str]) -> Optional[str]:
+    """
+    Find the sentence a claim restates.
+
+    Args:
+        claim: A claim as returned by the model, possibly reworded
+        sentences: The sentences of the checked text
+
+    Returns:
+        The sentence with the same key, else the one sharing the most words
+        (Dice similarity of at least MIN_SENTENCE_SIMILARITY), else None
+    """
+    key = claim_key(claim)
+    for sentence in sentences:
+        if claim_key(sentence) == key:
+            return sentence
+    words = _words(claim)
+    best, best_similarity = None, MIN_SENTENCE_SIMILARITY
+    for sentence in sentences:
+        sentence_words = _words(sentence)
+        if words and sentence_words:
+            similarity = 2 * len(words & sentence_words) / (len(words) + len(sentence_words))
+            if similarity >= best_similarity:
+                best, best_similarity = sentence, similarity
+    return best
+
+
+def reused_claim(claim: str, verdict: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the claim entry of a result from a stored verdict.
+
+    Args:
+        claim: The claim as it appears in the checked text
+        verdict: The verdict returned by VerdictStore.lookup
+
+    Returns:
+        A claim dictionary marked "reused", with the time it was checked
+    """
+    return dict(verdict, claim=claim, reused=True)
+
+
+def skip_instruction(known: List[Dict[str, Any]]) -> str:
+    """
+    Build the prompt addition listing claims that need not be checked again.
+
+    Args:
+        known: Claims built by reused_claim
+
+    Returns:
+        The instruction to append to the user prompt, or "" if nothing is known
+    """
+    if not known:
+        return ""
+    return SKIP_INSTRUCTION + "\n".join(f"- {claim['claim']}" for claim in known)
+
+
+def merge_known_claims(results: Dict[str, Any], known: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Add the known claims to fact check results, unless the API checked them anyway.
+
+    A returned claim that restates a known claim's sentence (see
+    match_sentence) counts as checked, so its verdict is not listed twice.
+
+    Args:
+        results: The parsed fact check results
+        known: Claims built by reused_claim
+
+    Returns:
+        The results, updated in place
+    """
+    claims = results.get("claims")
+    if not known or not isinstance(claims, list):
+        return results
+    sentences = [c["claim"] for c in known]
+    checked = set()
+    for claim in claims:
+        if isinstance(claim, dict):
+            text = str(claim.get("claim", ""))
+            checked.add(claim_key(match_sentence(text, sentences) or text))
+    reused = [c for c in known if claim_key(c["claim"]) not in checked]
+    claims.extend(reused)
+    if reused:
+        results["reused_claims"] = len(reused)
+    return results
+
+
+def known_result(known: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build a complete fact check result from known claims only.
+
+    Args:
+        known: Claims built by reused_claim
+
+    Returns:
+        A FactCheckResult-shaped dictionary
+    """
+    return {
+        "overall_rating": compute_overall_rating([c["rating"] for c in known]),
+        "summary": " ".join(c["explanation"] for c in known if c["explanation"]),
+        "claims": known,
+        "reused_claims": len(known),
+    }
+
+
+class VerdictStore:
+    """Claim verdicts in memory or in a SQLite file, with a TTL."""
+
+    DEFAULT_TTL = 30 * 24 * 60 * 60
+
+    def __init__(self, db_path: str = ":memory:", ttl: float = DEFAULT_TTL):
+        """
+        Open the store.
+
+        Args:
+            db_path: Path to the SQLite database, or ":memory:" for a per-process store
+            ttl: Seconds a verdict stays valid after the claim was checked
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, claim TEXT NOT NULL, "
+            "rating TEXT NOT NULL, explanation TEXT NOT NULL, sources TEXT NOT NULL, checked_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def add(self, claim: str, verdict: Dict[str, Any], namespace: str = "") -> bool:
+        """
+        Store the verdict of one claim.
+
+        Args:
+            claim: The claim text the verdict is stored under
+            verdict: A claim dictionary with rating, explanation and sources
+            namespace: The request configuration the verdict belongs to
+
+        Returns:
+            Whether the verdict was stored (rated TRUE, FALSE or MISLEADING)
+        """
+        return self.add_claims([dict(verdict, claim=claim)], namespace=namespace) == 1
+
+    def add_claims(self, claims: Iterable[Any], text: Optional[str] = None, namespace: str = "") -> int:
+        """
+        Store the verdicts of the claims in fact check results.
+
+        Claims that were themselves reused from the store are skipped, and so
+        are claims whose sentence is not self-contained (see is_self_contained).
+
+        Args:
+            claims: The "claims" list of fact check results
+            text: The checked text. If given, each claim is stored under the
+                sentence of the text it restates (see match_sentence), which is
+                what known_claims looks up; claims matching no sentence, and
+                claims sharing a sentence with another claim, are not stored.
+                If None, claims are stored under their own text.
+            namespace: The request configuration the verdicts belong to
+
+        Returns:
+            The number of verdicts stored
+        """
+        now = time.time()
+        verdicts = []
+        for claim in claims:
+            if not isinstance(claim, dict) or claim.get("reused"):
+                continue
+            rating = str(claim.get("rating", "")).strip().upper()
+            claim_text = str(claim.get("claim", "")).strip()
+            if rating not in STORED_RATINGS or not claim_text:
+                continue
+            sources = claim.get("sources")
+            verdicts.append((claim_text, (
+                rating,
+                str(claim.get("explanation") or ""),
+                json.dumps(sources if isinstance(sources, list) else [], ensure_ascii=False),
+                now,
+            )))
+        if text is not None:
+            sentences = list(dict.fromkeys(split_sentences(text)))[:MAX_LOOKUP_CLAIMS]
+            if len(sentences) == 1 and len(verdicts) == 1:
+                matched = [(sentences[0], verdicts[0][1])]
+            else:
+                matched = [(match_sentence(claim_text, sentences), row) for claim_text, row in verdicts]
+            counts: Dict[Optional[str], int] = {}
+            for sentence, _ in matched:
+                counts[sentence] = counts.get(sentence, 0) + 1
+            # A sentence split into several claims has no single verdict
+            verdicts = [
+                (sentence, row) for sentence, row in matched if sentence is not None and counts[sentence] == 1
+            ]
+        rows = [
+            (claim_key(claim_text, namespace), claim_text) + row
+            for claim_text, row in verdicts
+            if is_self_contained(claim_text)
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO verdicts (key, claim, rating, explanation, sources, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+        return len(rows)
+
+    def lookup(self, claims: Iterable[str], namespace: str = "") -> Dict[str, Dict[str, Any]]:
+        """
+        Look claims up in bulk.
+
+        Args:
+            claims: The claim texts
+            namespace: The request configuration the verdicts must belong to
+
+        Returns:
+            The verdict (claim, rating, explanation, sources, checked_at) of each
+            known claim, by claim text as given. Claims that are not
+            self-contained are never found.
+        """
+        keys: Dict[str, List[str]] = {}
+        for claim in claims:
+            if not is_self_contained(claim):
+                continue
+            keys.setdefault(claim_key(claim, namespace), []).append(claim)
+        if not keys:
+            return {}
+
+        found: Dict[str, Dict[str, Any]] = {}
+        cutoff = time.time() - self.ttl
+        key_list = list(keys)
+        with self._lock:
+            for start in range(0, len(key_list), _LOOKUP_CHUNK):
+                chunk = key_list[start:start + _LOOKUP_CHUNK]
+                rows = self._db.execute(
+                    "SELECT key, claim, rating, explanation, sources, checked_at FROM verdicts "
+                    f"WHERE checked_at > ? AND key IN ({','.join('?' * len(chunk))})",
+                    [cutoff] + chunk,
+                ).fetchall()
+                for key, claim, rating, explanation, sources, checked_at in rows:
+                    verdict = {
+                        "claim": claim,
+                        "rating": rating,
+                        "explanation": explanation,
+                        "sources": json.loads(sources),
+                        "checked_at": checked_at,
+                    }
+                    for text in keys[key]:
+                        found[text] = verdict
+            self.hits += len(found)
+            self.misses += sum(len(texts) for texts in keys.values()) - len(found)
+        return found
+
+    def known_claims(self, text: str, namespace: str = "") -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Find the known claims among a text's sentences.
+
+        Every self-contained sentence is a candidate, short ones included, so
+        a claim stored on its own (such as "The Earth is flat.") is found
+        again. A text with a sentence that depends on its context is never
+        complete, so it is sent to the API.
+
+        Args:
+            text: The claim or article text
+            namespace: The request configuration the verdicts must belong to
+
+        Returns:
+            The known claims, built by reused_claim in text order, and whether
+            they cover every sentence of the text
+        """
+        sentences = list(dict.fromkeys(split_sentences(text)))
+        candidates = sentences[:MAX_LOOKUP_CLAIMS]
+        if not candidates:
+            return [], False
+        found = self.lookup(candidates, namespace)
+        known = [reused_claim(claim, found[claim]) for claim in candidates if claim in found]
+        complete = bool(known) and len(known) == len(sentences)
+        return known, complete
+
+    def purge(self) -> int:
+        """
+        Delete expired verdicts.
+
+        Returns:
+            The number of verdicts deleted
+        """
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM verdicts WHERE checked_at <= ?", (time.time() - self.ttl,))
+            self._db.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get lookup counters and the number of stored verdicts for monitoring.
+
+        Returns:
+            A dictionary with hit, miss and size counters
+        """
+        with self._lock:
+            (stored,) = self._db.execute("SELECT COUNT(*) FROM verdicts").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "verdicts": stored,
+            }
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()